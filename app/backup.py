@@ -0,0 +1,158 @@
+import sqlite3
+import os, re, gzip, shutil, tempfile
+from datetime import datetime
+
+BACKUP_PREFIX = "db_backup_"
+BACKUP_TIME_FORMAT = "%Y-%m-%d__%H-%M-%S"
+BACKUP_TIME_FORMAT_OLD = "%Y-%m-%d__%H-%M"  # копії, створені попередніми версіями
+BACKUP_NAME_PATTERN = re.compile(r"^db_backup_(\d{4}-\d{2}-\d{2}__\d{2}-\d{2}(?:-\d{2})?)\.db(\.gz|\.zst)?$")
+COMPRESSION_EXTENSIONS = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+
+def get_zstd():
+    """Повертає модуль zstandard, якщо він встановлений (необов'язкова залежність)."""
+    try:
+        import zstandard
+        return zstandard
+    except ImportError:
+        return None
+
+
+class BackupManager:
+    def __init__(self, db_path: str, backup_dir: str, settings: dict):
+        """
+        Резервне копіювання через sqlite3 backup API без закриття основного з'єднання.
+
+        :param db_path: Шлях до файлу бази даних.
+        :param backup_dir: Папка для резервних копій.
+        :param settings: Налаштування з секції "backup" файлу конфігурації
+            (compression, keep_daily, keep_weekly, pages_per_step).
+        """
+        self.db_path = db_path
+        self.backup_dir = backup_dir
+        self.compression = settings.get("compression", "gzip")
+        self.keep_daily = int(settings.get("keep_daily", 7))
+        self.keep_weekly = int(settings.get("keep_weekly", 4))
+        self.pages_per_step = int(settings.get("pages_per_step", 256))
+
+        if self.compression not in COMPRESSION_EXTENSIONS:
+            print(f"Невідомий тип стиснення '{self.compression}', використовую gzip")
+            self.compression = "gzip"
+        if self.compression == "zstd" and get_zstd() is None:
+            print("Пакет zstandard не встановлено, використовую gzip")
+            self.compression = "gzip"
+
+    def list_backups(self):
+        """Повертає список (час, шлях) резервних копій, від найновішої до найстарішої."""
+        if not os.path.exists(self.backup_dir):
+            return []
+        backups = []
+        for name in os.listdir(self.backup_dir):
+            match = BACKUP_NAME_PATTERN.match(name)
+            if match:
+                time_format = BACKUP_TIME_FORMAT if match.group(1).count("-") == 4 else BACKUP_TIME_FORMAT_OLD
+                created = datetime.strptime(match.group(1), time_format)
+                backups.append((created, os.path.join(self.backup_dir, name)))
+        backups.sort(key=lambda backup: (backup[0], os.path.getmtime(backup[1])), reverse=True)
+        return backups
+
+    def create_backup(self, progress=None):
+        """
+        Створює резервну копію. Може виконуватись в окремому потоці - відкриває власне з'єднання.
+
+        :param progress: Функція progress(percent), яка викликається після кожного кроку копіювання.
+        :return: Шлях до створеної копії.
+        """
+        if not os.path.exists(self.backup_dir):
+            os.makedirs(self.backup_dir)
+        timestamp = datetime.now().strftime(BACKUP_TIME_FORMAT)
+        backup_path = os.path.join(self.backup_dir, f"{BACKUP_PREFIX}{timestamp}.db{COMPRESSION_EXTENSIONS[self.compression]}")
+
+        def on_step(status, remaining, total):
+            if progress and total:
+                progress(int((total - remaining) * 100 / total))
+
+        fd, tmp_db_path = tempfile.mkstemp(suffix=".db", dir=self.backup_dir)
+        os.close(fd)
+        try:
+            source = sqlite3.connect(self.db_path)
+            target = sqlite3.connect(tmp_db_path)
+            try:
+                source.backup(target, pages=self.pages_per_step, progress=on_step)
+            finally:
+                target.close()
+                source.close()
+
+            if self.compression == "none":
+                os.replace(tmp_db_path, backup_path)
+            else:
+                tmp_packed_path = tmp_db_path + COMPRESSION_EXTENSIONS[self.compression]
+                self.compress(tmp_db_path, tmp_packed_path)
+                os.replace(tmp_packed_path, backup_path)
+        finally:
+            if os.path.exists(tmp_db_path):
+                os.remove(tmp_db_path)
+
+        if progress:
+            progress(100)
+        return backup_path
+
+    def compress(self, source_path, target_path):
+        """Стискає файл вибраним алгоритмом."""
+        with open(source_path, 'rb') as source, open(target_path, 'wb') as target:
+            if self.compression == "zstd":
+                get_zstd().ZstdCompressor().copy_stream(source, target)
+            else:
+                with gzip.GzipFile(fileobj=target, mode='wb') as packed:
+                    shutil.copyfileobj(source, packed)
+
+    @staticmethod
+    def unpack(file_path):
+        """
+        Повертає шлях до нестисненої бази даних. Для стиснених копій створюється тимчасовий файл,
+        який потрібно видалити після використання (повертається другим значенням).
+        """
+        if file_path.endswith(".gz"):
+            opener = lambda: gzip.open(file_path, 'rb')
+        elif file_path.endswith(".zst"):
+            zstd = get_zstd()
+            if zstd is None:
+                raise Exception("Для відновлення копії .zst потрібно встановити пакет zstandard")
+            opener = lambda: zstd.ZstdDecompressor().stream_reader(open(file_path, 'rb'), closefd=True)
+        else:
+            return file_path, None
+
+        fd, tmp_path = tempfile.mkstemp(suffix=".db")
+        with os.fdopen(fd, 'wb') as target, opener() as source:
+            shutil.copyfileobj(source, target)
+        return tmp_path, tmp_path
+
+    def apply_retention(self):
+        """
+        Видаляє старі копії: залишає найновішу копію за кожен з останніх keep_daily днів
+        і найновішу копію за кожен з останніх keep_weekly тижнів.
+        """
+        backups = self.list_backups()
+        keep = set()
+        days, weeks = [], []
+        for created, path in backups:
+            day = created.date()
+            week = created.isocalendar()[:2]
+            if day not in days and len(days) < self.keep_daily:
+                days.append(day)
+                keep.add(path)
+            if week not in weeks and len(weeks) < self.keep_weekly:
+                weeks.append(week)
+                keep.add(path)
+        if backups:
+            keep.add(backups[0][1])  # найновіша копія залишається завжди
+
+        removed = 0
+        for _, path in backups:
+            if path not in keep:
+                try:
+                    os.remove(path)
+                    removed += 1
+                except OSError as e:
+                    print(f"Не вдалося видалити стару копію {path}: {e}")
+        return removed
@@ -1,19 +1,90 @@
 from app.database import Database
 
+BULK_CHUNK_SIZE = 5000
+
 class SilentCloseExeption(Exception):
     pass
 
+class OperationCancelled(Exception):
+    """Тривалу операцію скасовано користувачем."""
+    pass
+
+def run_in_chunks(records, function, progress=None, is_cancelled=None, chunk_size:int = BULK_CHUNK_SIZE):
+    """
+    Викликає function для частин списку records і повідомляє прогрес після кожної частини.
+
+    :param progress: Функція progress(percent)
+    :param is_cancelled: Функція, яка повертає True, якщо операцію потрібно перервати (OperationCancelled).
+        Викликати всередині транзакції, щоб скасування відкотило вже записані частини.
+    """
+    total = len(records)
+    for start in range(0, total, chunk_size):
+        if is_cancelled and is_cancelled():
+            raise OperationCancelled()
+        function(records[start:start + chunk_size])
+        if progress:
+            progress(int(min(start + chunk_size, total) * 100 / total))
+
+def raise_row_errors(row_errors:dict, preview_ids:int = 10):
+    """
+    Піднімає одну помилку з переліком унікальних помилок для рядків, які не вдалося оновити.
+
+    :param row_errors: Словник {текст помилки: [id рядків]}
+    :param preview_ids: Скільки id показувати для кожної помилки
+    """
+    if not row_errors:
+        return
+    count = sum(len(ids) for ids in row_errors.values())
+    lines = []
+    for error, ids in row_errors.items():
+        shown = ", ".join(str(id) for id in ids[:preview_ids])
+        if len(ids) > preview_ids:
+            shown += f", ... (+{len(ids) - preview_ids})"
+        lines.append(f"{error} (id: {shown})")
+    raise Exception(f"для ({count}) рядків. Перелік унікальних помилок:\n" + "\n".join(lines))
+
 class BaseRepository:
     def __init__(self, database: Database):
         self.db = database
         self.table_name = ""
         self.columns = []
+        self._statements = None
     
     def get_table_columns(self):
         """Отримання списку стовпців таблиці."""
-        cursor = self.db.connection.execute(f'SELECT * FROM {self.table_name} WHERE 1=0')
-        columns = [description[0] for description in cursor.description]
-        return columns
+        return self.db.get_table_columns(self.table_name)
+
+    @property
+    def statements(self) -> dict:
+        """
+        Незмінні SQL запити таблиці (назва -> текст). Будуються один раз для репозиторію -
+        при першому використанні, коли підклас вже задав table_name і columns.
+        """
+        if self._statements is None:
+            self._statements = self.build_statements()
+        return self._statements
+
+    def build_statements(self) -> dict:
+        """Запити для таблиці з ключем id у першому стовпці, який генерує база даних."""
+        key = self.columns[0]
+        columns = self.columns[1:]
+        return {
+            "select_by_id": f"SELECT * FROM {self.table_name} WHERE {key} = ?",
+            "insert": f"""
+            INSERT INTO {self.table_name} ({', '.join(columns)})
+            VALUES ({', '.join(['?' for _ in columns])})
+            """,
+            "update": f"""
+            UPDATE {self.table_name} 
+            SET {', '.join([f"{column} = ?" for column in columns])}
+            WHERE {key} = ?
+            """,
+            "delete": f"DELETE FROM {self.table_name} WHERE {key} = ?",
+        }
+
+    def on_table_changed(self):
+        """Викликається після кожної зміни таблиці через add/update/delete методи (наприклад, для скидання кешу)."""
+        pass
 
     def get_all_record(self):
         """Отримання списку всіх елементів з таблиці."""
@@ -21,29 +92,117 @@ class BaseRepository:
         return self.db.execute_query(query)
     
     def get_record_by_id(self, record_id):
-        query = f"SELECT * FROM {self.table_name} WHERE {self.columns[0]} = ?"
-        results = self.db.execute_query(query, (record_id,))
+        results = self.db.execute_query(self.statements["select_by_id"], (record_id,))
         return results[0] if results else None
     
     def add_record(self, values):
         """Додавання нового запису в таблицю."""
-        query = f"""
-        INSERT INTO {self.table_name} ({', '.join(self.columns[1:])})
-        VALUES ({', '.join(['?' for _ in values])})
-        """
-        return self.db.execute_non_query(query, values)
+        record_id = self.db.execute_non_query(self.statements["insert"], values)
+        self.on_table_changed()
+        return record_id
 
     def update_record(self, record_id, values):
         """Оновлення існуючого запису в таблиці."""
-        query = f"""
-        UPDATE {self.table_name} 
-        SET {', '.join([f"{column} = ?" for column in self.columns[1:]])}
-        WHERE {self.columns[0]} = ?
-        """
-        self.db.execute_non_query(query, tuple(values) + (record_id,))
+        self.db.execute_non_query(self.statements["update"], tuple(values) + (record_id,))
+        self.on_table_changed()
 
     def delete_record(self, record_id):
         """Видаляє запис з таблиці."""
-        query = f"DELETE FROM {self.table_name} WHERE {self.columns[0]} = ?"
-        self.db.execute_non_query(query, (record_id,))
-    
\ No newline at end of file
+        self.db.execute_non_query(self.statements["delete"], (record_id,))
+        self.on_table_changed()
+
+    def add_records(self, records):
+        """Пакетне додавання записів (values для кожного) одним executemany. Повертає кількість доданих рядків."""
+        count = self.db.execute_many(self.statements["insert"], records)
+        self.on_table_changed()
+        return count
+
+    def add_records_returning_ids(self, records):
+        """Пакетне додавання записів (values для кожного) в одній транзакції. Повертає список id нових записів."""
+        record_ids = self.db.execute_many_returning_ids(self.statements["insert"], records)
+        self.on_table_changed()
+        return record_ids
+
+    def update_records(self, records):
+        """Пакетне оновлення записів: records - пари (id, values). Повертає кількість змінених рядків."""
+        count = self.db.execute_many(
+            self.statements["update"], (tuple(values) + (record_id,) for record_id, values in records)
+        )
+        self.on_table_changed()
+        return count
+
+    def delete_records(self, record_ids):
+        """Пакетне видалення записів за id. Повертає кількість видалених рядків."""
+        count = self.db.execute_many(self.statements["delete"], ((record_id,) for record_id in record_ids))
+        self.on_table_changed()
+        return count
+
+
+class YearRecordRepository(BaseRepository):
+    """
+    Таблиця з ключем (id запису, рік) у перших двох стовпцях: податки, нормативно грошові оцінки.
+    Під час додавання значення задаються для всіх стовпців, включно з ключем.
+    """
+    def build_statements(self) -> dict:
+        key_condition = f"{self.columns[0]} = ? AND {self.columns[1]} = ?"
+        return {
+            "select_by_id": f"SELECT * FROM {self.table_name} WHERE {self.columns[0]} = ?",
+            "select_by_id_and_year": f"SELECT * FROM {self.table_name} WHERE {key_condition}",
+            "insert": f"""
+            INSERT INTO {self.table_name} ({', '.join(self.columns)})
+            VALUES ({', '.join(['?' for _ in self.columns])})
+            """,
+            "update": f"""
+            UPDATE {self.table_name} 
+            SET {', '.join([f"{column} = ?" for column in self.columns[2:]])}
+            WHERE {key_condition}
+            """,
+            "delete": f"DELETE FROM {self.table_name} WHERE {self.columns[0]} = ?",
+        }
+
+    def get_by_id_and_year(self, record_id, year):
+        result = self.db.execute_query(self.statements["select_by_id_and_year"], (record_id, year))
+        return result[0] if result else None
+
+    def update_record(self, record_id, year, values):
+        self.db.execute_non_query(self.statements["update"], tuple(values) + (record_id, year))
+        self.on_table_changed()
+
+    def update_records(self, records):
+        """Пакетне оновлення записів: records - трійки (id, рік, values). Повертає кількість змінених рядків."""
+        count = self.db.execute_many(
+            self.statements["update"], (tuple(values) + (record_id, year) for record_id, year, values in records)
+        )
+        self.on_table_changed()
+        return count
+    
+
+
+class TaxesRepository(YearRecordRepository):
+    """
+    Податки за рік: (id запису, рік, податок, сплачено, сплачена сума).
+    Ключ - id запису нерухомості або земельної ділянки (перший стовпець) і рік.
+    """
+    def build_statements(self) -> dict:
+        statements = super().build_statements()
+        key_condition = f"{self.columns[0]} = ? AND {self.columns[1]} = ?"
+        statements["update_tax"] = f"UPDATE {self.table_name} SET {self.columns[2]} = ? WHERE {key_condition}"
+        statements["upsert_tax"] = f"""
+        INSERT INTO {self.table_name} ({', '.join(self.columns)})
+        VALUES (?, ?, ?, 0, 0)
+        ON CONFLICT({self.columns[0]}, {self.columns[1]}) DO UPDATE SET {self.columns[2]} = excluded.{self.columns[2]}
+        """
+        return statements
+
+    def update_tax(self, record_id, year, tax):
+        self.db.execute_non_query(self.statements["update_tax"], (tax, record_id, year))
+        self.on_table_changed()
+
+    def upsert_taxes(self, records):
+        """
+        Пакетно записує податки (id, рік, податок) в одній транзакції.
+        Нові записи створюються як несплачені, для існуючих оновлюється лише сума податку.
+        """
+        count = self.db.execute_many(self.statements["upsert_tax"], records)
+        self.on_table_changed()
+        return count
@@ -1,10 +1,43 @@
 import sqlite3
-import os, shutil
-from datetime import datetime
+import os, shutil, json, threading, queue
+from contextlib import contextmanager
+from app.backup import BackupManager
+from app.migrations import MIGRATIONS
+from app.query_cache import QueryCache
 
 class UniqueFieldException(Exception):
     pass
 
+# Профілі налаштувань SQLite, які застосовуються при кожному підключенні
+DB_PROFILES = {
+    "performance": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -64000,  # від'ємне значення - розмір в КБ (64 МБ)
+        "mmap_size": 268435456,  # 256 МБ
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,  # мс
+    },
+    "safe": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -2000,
+        "mmap_size": 0,
+        "temp_store": "DEFAULT",
+        "busy_timeout": 5000,
+    },
+}
+DEFAULT_PROFILE = "performance"
+CONFIG_FILE_NAME = "db_config.json"
+DEFAULT_READERS = 4  # найбільша кількість з'єднань для читання
+READER_WAIT_INTERVAL = 0.1  # с, як часто потік, що чекає на з'єднання для читання, перевіряє, чи не закрито пул
+STATEMENT_CACHE_SIZE = 512  # підготовлених запитів на з'єднання (у sqlite3 за замовчуванням 128)
+DEFAULT_BACKUP_SETTINGS = {
+    "compression": "gzip",  # none | gzip | zstd (потрібен пакет zstandard)
+    "keep_daily": 7,
+    "keep_weekly": 4,
+    "pages_per_step": 256,
+}
 
 class Database:
     def __init__(self, app_data_path: str, sql_file: str):
@@ -16,26 +49,208 @@ class Database:
         """
         self.db_path = os.path.join(app_data_path, "db.db")
         self.backup_dir = os.path.join(app_data_path, "backup")
+        self.config_path = os.path.join(app_data_path, CONFIG_FILE_NAME)
         self.sql_file = sql_file
-        self.connection = None
+        self.connection = None  # з'єднання для запису (і читання в потоці інтерфейсу)
+        self._backup_marker = None
+        # Пул з'єднань: одне з'єднання для запису, яке потоки використовують по черзі (write_lock),
+        # і до max_readers з'єднань лише для читання (у WAL читання не чекає на запис і навпаки).
+        self._local = threading.local()  # глибина транзакції і видане з'єднання для читання - для кожного потоку
+        self._write_lock = threading.RLock()
+        self._readers = queue.LifoQueue()
+        self._readers_created = 0  # з'єднання для читання поточного покоління (вільні і видані)
+        self._readers_in_use = 0  # видані з'єднання для читання поточного покоління
+        self._readers_generation = 0  # змінюється при close(): видані раніше з'єднання після повернення закриваються
+        self._readers_lock = threading.Lock()
+        self._table_columns = {}  # назва таблиці -> назви стовпців
+        self._repositories = {}  # клас репозиторію -> спільний екземпляр
+        self._repositories_lock = threading.RLock()
+        self.cache = QueryCache()  # довідкові дані (ставки, мінімальна зарплата), які читаються при кожному розрахунку
+        
+        self.config = self.load_config()
+        self.max_readers = max(int(self.config.get("readers") or 1), 1)
+        self.backup_manager = BackupManager(self.db_path, self.backup_dir, self.config["backup"])
         
         self.initialize_database()
 
+    def load_config(self):
+        """
+        Завантаження налаштувань бази даних з файлу конфігурації в папці даних.
+        Якщо файлу немає - створюється файл з профілем за замовчуванням.
+
+        Формат файлу: {"profile": "performance" | "safe", "pragmas": {"cache_size": -32000, ...}, "backup": {...}, "readers": 4}
+        Значення з "pragmas" перекривають значення вибраного профілю.
+        "readers" - найбільша кількість з'єднань для читання, які можуть працювати одночасно.
+        """
+        config = {"profile": DEFAULT_PROFILE, "pragmas": {}, "backup": dict(DEFAULT_BACKUP_SETTINGS), "readers": DEFAULT_READERS}
+        if os.path.exists(self.config_path):
+            try:
+                with open(self.config_path, 'r', encoding='utf-8') as file:
+                    config.update(json.load(file))
+            except (OSError, ValueError) as e:
+                print(f"Помилка читання конфігурації бази даних, використовую профіль за замовчуванням: {e}")
+        else:
+            try:
+                with open(self.config_path, 'w', encoding='utf-8') as file:
+                    json.dump(config, file, indent=4)
+            except OSError as e:
+                print(f"Не вдалося створити файл конфігурації бази даних: {e}")
+        
+        if config["profile"] not in DB_PROFILES:
+            print(f"Невідомий профіль бази даних '{config['profile']}', використовую '{DEFAULT_PROFILE}'")
+            config["profile"] = DEFAULT_PROFILE
+        return config
+    
+    def get_pragmas(self):
+        """Повертає налаштування PRAGMA вибраного профілю з урахуванням перевизначень."""
+        pragmas = dict(DB_PROFILES[self.config["profile"]])
+        pragmas.update(self.config.get("pragmas") or {})
+        return pragmas
+
     def connect(self):
         """Підключення до бази даних."""
         try:
-            self.connection = sqlite3.connect(self.db_path)
+            # з'єднанням для запису користуються різні потоки, доступ до нього обмежує write_lock
+            self.connection = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
             print(f"Підключено до бази даних: {self.db_path}")
             self.connection.execute("PRAGMA foreign_keys = ON;")
+            self.apply_pragmas(self.connection)
+            self.check_settings()
+            self._backup_marker = self.get_change_marker()
+            self.cache.reset()
         except sqlite3.Error as e:
             print(f"Помилка підключення до бази даних: {e}")
             raise e
+    
+    def create_reader(self):
+        """Нове з'єднання лише для читання з налаштуваннями профілю (journal_mode задається з'єднанням для запису)."""
+        connection = sqlite3.connect(self.db_path, check_same_thread=False, cached_statements=STATEMENT_CACHE_SIZE)
+        for name, value in self.get_pragmas().items():
+            if name != "journal_mode":
+                connection.execute(f"PRAGMA {name} = {value};")
+        connection.execute("PRAGMA query_only = ON;")
+        return connection
+    
+    @contextmanager
+    def reader(self):
+        """
+        Видає з'єднання для читання з пулу на час блоку.
+        Вкладені виклики в тому ж потоці отримують те саме з'єднання.
+        Якщо всі max_readers з'єднань зайняті - чекає, поки якесь звільниться.
+        """
+        connection = getattr(self._local, "reader", None)
+        if connection is not None:
+            yield connection
+            return
+        connection, generation = self._take_reader()
+        self._local.reader = connection
+        try:
+            yield connection
+        finally:
+            self._local.reader = None
+            with self._readers_lock:
+                current = generation == self._readers_generation
+                if current:
+                    self._readers_in_use -= 1
+                    self._readers.put((connection, generation))
+            if not current:
+                # з'єднання видане до close() (наприклад, до відновлення бази) - у пул не повертається
+                connection.close()
+
+    def _take_reader(self):
+        """Вільне з'єднання з пулу, нове (якщо створено менше max_readers) або перше звільнене. Повертає (з'єднання, покоління)."""
+        while True:
+            with self._readers_lock:
+                generation = self._readers_generation
+                try:
+                    connection, _ = self._readers.get_nowait()  # у пулі лише з'єднання поточного покоління
+                except queue.Empty:
+                    if self._readers_created < self.max_readers:
+                        self._readers_created += 1
+                        self._readers_in_use += 1
+                        break
+                else:
+                    self._readers_in_use += 1
+                    return connection, generation
+            # чекаємо на звільнене з'єднання; з'єднання попереднього покоління пулу закривається
+            try:
+                connection, connection_generation = self._readers.get(timeout=READER_WAIT_INTERVAL)
+            except queue.Empty:
+                continue
+            with self._readers_lock:
+                if connection_generation == self._readers_generation:
+                    self._readers_in_use += 1
+                    return connection, connection_generation
+            connection.close()
+        try:
+            return self.create_reader(), generation
+        except BaseException:
+            with self._readers_lock:
+                if generation == self._readers_generation:
+                    self._readers_created -= 1
+                    self._readers_in_use -= 1
+            raise
+
+    def readers_in_use(self) -> int:
+        """Кількість виданих зараз з'єднань для читання (фонові запити, що виконуються)."""
+        with self._readers_lock:
+            return self._readers_in_use
+    
+    def close_readers(self):
+        """
+        Закриває вільні з'єднання для читання і починає нове покоління пулу:
+        з'єднання, видані до цього, закриваються при поверненні замість повторного використання.
+        """
+        with self._readers_lock:
+            while True:
+                try:
+                    self._readers.get_nowait()[0].close()
+                except queue.Empty:
+                    break
+            self._readers_generation += 1
+            self._readers_created = 0
+            self._readers_in_use = 0
+    
+    @property
+    def _transaction_depth(self):
+        """Глибина вкладеності transaction() у поточному потоці."""
+        return getattr(self._local, "transaction_depth", 0)
+    
+    @_transaction_depth.setter
+    def _transaction_depth(self, value):
+        self._local.transaction_depth = value
+    
+    def apply_pragmas(self, connection: sqlite3.Connection):
+        """Застосовує налаштування продуктивності профілю до з'єднання."""
+        for name, value in self.get_pragmas().items():
+            connection.execute(f"PRAGMA {name} = {value};")
+    
+    def check_settings(self):
+        """
+        Перевірка фактичних налаштувань з'єднання.
+        Виводить ефективні значення і попереджає, якщо SQLite не прийняв якесь значення
+        (наприклад WAL недоступний на мережевому диску).
+        """
+        requested = self.get_pragmas()
+        effective = {}
+        for name in ["foreign_keys"] + list(requested):
+            effective[name] = self.connection.execute(f"PRAGMA {name};").fetchone()[0]
+        print(f"Профіль бази даних '{self.config['profile']}': " + ", ".join(f"{k}={v}" for k, v in effective.items()))
+        
+        if str(effective["journal_mode"]).upper() != str(requested["journal_mode"]).upper():
+            print(f"Увага: journal_mode={effective['journal_mode']} замість {requested['journal_mode']}")
+        return effective
 
     def close(self):
-        """Закриття з'єднання з базою даних."""
-        if self.connection:
-            self.connection.close()
-            print("З'єднання з базою даних закрито.")
+        """
+        Закриття з'єднань з базою даних. Чекає, поки інші потоки завершать транзакції на з'єднанні для запису.
+        """
+        with self._write_lock:
+            self.close_readers()
+            if self.connection:
+                self.connection.close()
+                self.connection = None
+                print("З'єднання з базою даних закрито.")
 
     def initialize_database(self):
         """
@@ -46,7 +261,7 @@ class Database:
             print("База даних не знайдена. Ініціалізація...")
             try:
                 # Створення підключення для виконання SQL-скрипту
-                self.connection = sqlite3.connect(self.db_path)
+                self.connect()
                 with open(self.sql_file, 'r') as file:
                     sql_script = file.read()
 
@@ -60,12 +275,90 @@ class Database:
             print("База даних вже існує. Пропускаю ініціалізацію.")
             # Підключення до існуючої бази
             self.connect()
+        self.apply_migrations()
+
+    def apply_migrations(self):
+        """
+        Застосовує до бази даних міграції схеми, новіші за її PRAGMA user_version.
+        Кожна міграція виконується в окремій транзакції разом зі зміною версії.
+        """
+        version = self.connection.execute("PRAGMA user_version;").fetchone()[0]
+        for new_version, statements in enumerate(MIGRATIONS, start=1):
+            if new_version <= version:
+                continue
+            try:
+                with self.transaction():
+                    for statement in statements:
+                        self.connection.execute(statement)
+                    self.connection.execute(f"PRAGMA user_version = {new_version};")
+                self._table_columns = {}
+                self.cache.reset()
+                print(f"Схему бази даних оновлено до версії {new_version}")
+            except sqlite3.Error as e:
+                print(f"Помилка оновлення схеми бази даних до версії {new_version}: {e}")
+                raise e
+
+    @contextmanager
+    def transaction(self):
+        """
+        Об'єднує всі запити всередині блоку в одну транзакцію з одним комітом.
+        execute_* всередині не комітять окремо; при помилці зміни відкочуються.
+        Вкладені виклики створюють SAVEPOINT і відкочують лише свою частину.
+        Поки транзакція триває, з'єднання для запису зайняте потоком, який її почав.
+        """
+        depth = self._transaction_depth
+        savepoint = f"sp_{depth}"
+        if depth == 0:
+            self._write_lock.acquire()
+        try:
+            if depth == 0:
+                if not self.connection.in_transaction:
+                    self.connection.execute("BEGIN")
+            else:
+                self.connection.execute(f"SAVEPOINT {savepoint}")
+            self._transaction_depth += 1
+            try:
+                yield self
+            except BaseException:
+                self._transaction_depth = depth
+                if depth == 0:
+                    self.connection.rollback()
+                else:
+                    self.connection.execute(f"ROLLBACK TO {savepoint}")
+                    self.connection.execute(f"RELEASE {savepoint}")
+                raise
+            self._transaction_depth = depth
+            if depth == 0:
+                self.connection.commit()
+            else:
+                self.connection.execute(f"RELEASE {savepoint}")
+        finally:
+            if depth == 0:
+                self._flush_cache_invalidations()
+                self._write_lock.release()
+
+    @contextmanager
+    def _statement_scope(self):
+        """
+        З'єднання для запиту зміни даних: окремий коміт, лише якщо запит виконується поза transaction().
+        """
+        with self._write_lock:
+            if self._transaction_depth:
+                yield self.connection
+            else:
+                with self.connection:
+                    yield self.connection
 
     def execute_query(self, query: str, params: tuple = None):
+        """
+        Запит читання. Всередині transaction() - через з'єднання для запису (видно власні незакомічені зміни),
+        інакше - через з'єднання для читання з пулу, тому не чекає на запис з інших потоків.
+        """
         try:
-            with self.connection:
-                cursor = self.connection.execute(query, params or ())
-                return cursor.fetchall()
+            if self._transaction_depth:
+                return self.connection.execute(query, params or ()).fetchall()
+            with self.reader() as connection:
+                return connection.execute(query, params or ()).fetchall()
         except sqlite3.Error as e:
             print(f"Помилка запиту отримання даних: {e}")
             raise e
@@ -73,8 +366,8 @@ class Database:
     def execute_non_query(self, query: str, params: tuple = None):
         '''Повертає ID елемента'''
         try:
-            with self.connection:
-                cursor = self.connection.execute(query, params or ())
+            with self._statement_scope() as connection:
+                cursor = connection.execute(query, params or ())
                 return cursor.lastrowid
         except sqlite3.Error as e:
             print(f"Помилка запиту зміни даних: {e}")
@@ -82,18 +375,154 @@ class Database:
                 raise UniqueFieldException()
             raise e
 
-    def save_DB_backup(self):
-        """Функція резервного копіювання бази даних."""
-        if not os.path.exists(self.backup_dir):
-            os.makedirs(self.backup_dir)
-        timestamp = datetime.now().strftime("%Y-%m-%d__%H-%M")
-        backup_name = f"db_backup_{timestamp}.db"
-        backup_path = os.path.join(self.backup_dir, backup_name)
+    def execute_many(self, query: str, params_seq):
+        '''Виконує запит для кожного набору параметрів в одній транзакції. Повертає кількість змінених рядків'''
+        try:
+            with self._statement_scope() as connection:
+                cursor = connection.executemany(query, params_seq)
+                return cursor.rowcount
+        except sqlite3.Error as e:
+            print(f"Помилка пакетного запиту зміни даних: {e}")
+            if "UNIQUE" in str(e):
+                raise UniqueFieldException()
+            raise e
+
+    def execute_many_returning_ids(self, query: str, params_seq):
+        '''Виконує запит вставки для кожного набору параметрів в одній транзакції. Повертає ID нових елементів'''
+        try:
+            with self._statement_scope() as connection:
+                # executemany не повертає id вставлених рядків, тому кожен рядок - окремий execute
+                # того самого підготовленого запиту з кешу з'єднання
+                return [connection.execute(query, params).lastrowid for params in params_seq]
+        except sqlite3.Error as e:
+            print(f"Помилка пакетного запиту зміни даних: {e}")
+            if "UNIQUE" in str(e):
+                raise UniqueFieldException()
+            raise e
+
+    def get_table_columns(self, table_name: str):
+        """Назви стовпців таблиці. Схема читається один раз - до наступної міграції."""
+        columns = self._table_columns.get(table_name)
+        if columns is None:
+            if self._transaction_depth:
+                cursor = self.connection.execute(f'SELECT * FROM {table_name} WHERE 1=0')
+                columns = [description[0] for description in cursor.description]
+            else:
+                with self.reader() as connection:
+                    cursor = connection.execute(f'SELECT * FROM {table_name} WHERE 1=0')
+                    columns = [description[0] for description in cursor.description]
+            self._table_columns[table_name] = columns
+        return list(columns)
+
+    def get_cached(self, namespace: str, key, load, version=None):
+        """
+        Значення з кешу запитів або результат load() (див. QueryCache, version - версія даних значення).
+        Перед читанням перевіряється, чи не змінило дані інше з'єднання -
+        якщо з'єднання для запису зараз зайняте іншим потоком, перевірка пропускається, щоб не чекати.
+        """
+        if self._write_lock.acquire(blocking=False):
+            try:
+                data_version = self.connection.execute("PRAGMA data_version;").fetchone()[0]
+            finally:
+                self._write_lock.release()
+            self.cache.check_data_version(data_version)
+        return self.cache.get(namespace, key, load, version)
+
+    def invalidate_cache(self, namespace: str = None):
+        """
+        Скидає кеш запитів для таблиці namespace (None - весь кеш). Викликати після зміни таблиці.
+        Всередині transaction() кеш скидається ще раз після її завершення:
+        до коміту інші потоки могли прочитати і зберегти в кеші старі значення.
+        """
+        self.cache.invalidate(namespace)
+        if self._transaction_depth:
+            pending = getattr(self._local, "pending_invalidations", None)
+            if pending is None:
+                pending = self._local.pending_invalidations = set()
+            pending.add(namespace)
+
+    def _flush_cache_invalidations(self):
+        pending = getattr(self._local, "pending_invalidations", None)
+        if pending:
+            self._local.pending_invalidations = None
+            for namespace in pending:
+                self.cache.invalidate(namespace)
+
+    def get_repository(self, repository_class):
+        """
+        Спільний для цієї бази даних екземпляр репозиторію (створюється при першому запиті).
+        Репозиторії зберігають лише посилання на базу даних і назви стовпців,
+        тому один екземпляр можна використовувати у всіх вікнах і потоках.
+        """
+        repository = self._repositories.get(repository_class)
+        if repository is None:
+            # RLock - конструктор репозиторію сам отримує вкладені репозиторії
+            with self._repositories_lock:
+                repository = self._repositories.get(repository_class)
+                if repository is None:
+                    repository = repository_class(self)
+                    self._repositories[repository_class] = repository
+        return repository
+
+    def get_change_marker(self, blocking: bool = True):
+        """
+        Позначка стану даних: кількість змін цього з'єднання і data_version
+        (змінюється, коли дані змінює інше з'єднання).
+
+        :param blocking: False - не чекати, поки інший потік пише в базу даних, а повернути None.
+            Під час запису позначка не підходить для кешу: незакомічені зміни можуть бути закомічені
+            вже без нових змін, і позначка після коміту буде та сама. Те саме - у транзакції цього потоку.
+        """
+        if not blocking and self._transaction_depth:
+            return None
+        if not self._write_lock.acquire(blocking=blocking):
+            return None
         try:
-            self.close()
-            shutil.copy(self.db_path, backup_path)
+            data_version = self.connection.execute("PRAGMA data_version;").fetchone()[0]
+            return (self.connection.total_changes, data_version)
+        finally:
+            self._write_lock.release()
+
+    def has_changes_since_backup(self):
+        """Чи змінювались дані з моменту підключення або останньої резервної копії."""
+        if not self.backup_manager.list_backups():
+            return True
+        return self.get_change_marker() != self._backup_marker
+
+    def save_DB_backup(self, progress=None):
+        """
+        Функція резервного копіювання бази даних (через sqlite3 backup API, без закриття з'єднання).
+        Копія не створюється, якщо дані не змінювались з моменту останньої копії.
+
+        :param progress: Функція progress(percent) для відображення прогресу.
+        """
+        if not self.has_changes_since_backup():
+            print("Дані не змінювались - резервна копія не потрібна.")
+            return None
+        self._run_backup(self.get_change_marker(), progress)
+
+    def start_DB_backup(self, progress=None):
+        """
+        Запускає резервне копіювання в окремому потоці, щоб не блокувати інтерфейс.
+        Потік не є daemon - інтерпретатор дочекається завершення копіювання перед виходом.
+
+        :return: Потік копіювання або None, якщо копія не потрібна.
+        """
+        if not self.has_changes_since_backup():
+            print("Дані не змінювались - резервна копія не потрібна.")
+            return None
+        thread = threading.Thread(target=self._run_backup, args=(self.get_change_marker(), progress), name="db-backup")
+        thread.start()
+        return thread
+
+    def _run_backup(self, marker, progress=None):
+        try:
+            backup_path = self.backup_manager.create_backup(progress)
+            self._backup_marker = marker
             print(f"Резервна копія створена: {backup_path}")
-            self.connect()
+            removed = self.backup_manager.apply_retention()
+            if removed:
+                print(f"Видалено старих резервних копій: {removed}")
         except Exception as e:
             print(f"Помилка під час копіювання: {e}")
             
@@ -103,6 +532,18 @@ class Database:
             print(f"Файл резервної копії не знайдено: {file_path}")
             return False
         
+        try:
+            file_path, tmp_path = self.backup_manager.unpack(file_path)
+        except Exception as e:
+            print(f"Помилка розпакування резервної копії: {e}")
+            return False
+        try:
+            return self._restore_from_file(file_path)
+        finally:
+            if tmp_path and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def _restore_from_file(self, file_path):
         # Перевіряємо чи файл є SQLite базою даних
         try:
             with open(file_path, 'rb') as file:
@@ -119,12 +560,27 @@ class Database:
             print(f"Помилка перевірки файлу бази даних: {e}")
             return False
         
-        # відновлення
-        try:
-            self.close()
-            shutil.copy(file_path, self.db_path)
-            self.connect()
-            return True
-        except Exception as e:
-            print(f"Помилка при відновленні бази: {e}")
-            return False
\ No newline at end of file
+        # відновлення: з'єднання для запису не використовується іншими потоками до кінця відновлення
+        with self._write_lock:
+            if self.readers_in_use():
+                print("Неможливо відновити базу даних, поки виконуються фонові запити")
+                return False
+            try:
+                self.close()
+                # старі -wal/-shm файли належать попередній базі і не повинні застосовуватись до відновленої
+                self.remove_wal_files()
+                shutil.copy(file_path, self.db_path)
+                self.connect()
+                # копія могла бути створена старішою версією схеми
+                self.apply_migrations()
+                return True
+            except Exception as e:
+                print(f"Помилка при відновленні бази: {e}")
+                return False
+
+    def remove_wal_files(self):
+        """Видаляє службові файли WAL (-wal, -shm) бази даних. Викликати лише при закритому з'єднанні."""
+        for suffix in ("-wal", "-shm"):
+            path = self.db_path + suffix
+            if os.path.exists(path):
+                os.remove(path)
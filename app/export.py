@@ -0,0 +1,325 @@
+import os, csv, tempfile
+from contextlib import ExitStack
+from app.base_repository import OperationCancelled
+
+EXPORT_CHUNK_SIZE = 1000
+
+
+def get_pyarrow():
+    """Повертає модуль pyarrow, якщо він встановлений (необов'язкова залежність)."""
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError:
+        return None
+
+
+def get_numpy():
+    """Повертає модуль numpy, якщо він встановлений (необов'язкова залежність)."""
+    try:
+        import numpy
+        return numpy
+    except ImportError:
+        return None
+
+
+class ExportCancelled(OperationCancelled):
+    """Експорт скасовано користувачем."""
+    pass
+
+
+class ExportSheet:
+    def __init__(self, name: str, file_name: str, columns, query: str, params=(), skip_columns: int = 0):
+        """
+        Опис одного аркуша (таблиці) експорту.
+
+        :param name: Назва аркуша в Excel
+        :param file_name: Назва файлу для форматів, де кожна таблиця - окремий файл
+        :param columns: Назви всіх колонок, які повертає запит
+        :param query: SQL запит, рядки якого експортуються
+        :param params: Параметри запиту
+        :param skip_columns: Скільки перших колонок (id) не експортувати
+        """
+        self.name = name
+        self.file_name = file_name
+        self.columns = list(columns)
+        self.query = query
+        self.params = tuple(params)
+        self.skip_columns = skip_columns
+
+    def get_headers(self, flat=False):
+        """Назви експортованих колонок. flat=True - в один рядок (для CSV і колонкових форматів)."""
+        headers = self.columns[self.skip_columns:]
+        if flat:
+            headers = [str(header).replace("\n", " ") for header in headers]
+        return headers
+
+
+class ExportWriter:
+    """
+    Базовий клас формату експорту. Файли пишуться в тимчасові і замінюють
+    цільові лише у finish(), тому незавершений експорт не псує попередні файли.
+    """
+    def __init__(self, output_path: str):
+        self.output_path = output_path
+        self.pending = []  # (тимчасовий файл, цільовий файл)
+
+    def write_sheet(self, sheet: ExportSheet, chunks):
+        """Записує одну таблицю. chunks - ітератор списків рядків (вже без пропущених колонок)."""
+        raise NotImplementedError
+
+    def get_temp_path(self, target_path):
+        directory = os.path.dirname(os.path.abspath(target_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(suffix=os.path.splitext(target_path)[1], dir=directory)
+        os.close(fd)
+        self.pending.append((tmp_path, target_path))
+        return tmp_path
+
+    def get_sheet_path(self, sheet: ExportSheet, extension: str):
+        return os.path.join(self.output_path, sheet.file_name + extension)
+
+    def finish(self):
+        for tmp_path, target_path in self.pending:
+            os.replace(tmp_path, target_path)
+        self.pending = []
+
+    def abort(self):
+        for tmp_path, _ in self.pending:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+        self.pending = []
+
+
+class ExcelWriter(ExportWriter):
+    """Один файл .xlsx, кожна таблиця - окремий аркуш (openpyxl у режимі write_only)."""
+    def __init__(self, output_path: str):
+        super().__init__(output_path)
+        from openpyxl import Workbook
+        self.workbook = Workbook(write_only=True)
+
+    def write_sheet(self, sheet, chunks):
+        worksheet = self.workbook.create_sheet(sheet.name)
+        worksheet.append(sheet.get_headers())
+        for rows in chunks:
+            for row in rows:
+                worksheet.append(row)
+
+    def finish(self):
+        self.workbook.save(self.get_temp_path(self.output_path))
+        super().finish()
+
+    def abort(self):
+        for worksheet in self.workbook.worksheets:
+            worksheet.close()  # завершує тимчасові файли аркушів, які вже не будуть збережені
+        super().abort()
+
+
+class CsvWriter(ExportWriter):
+    """Папка з файлом .csv (UTF-8) для кожної таблиці. Рядки пишуться потоково."""
+    def write_sheet(self, sheet, chunks):
+        tmp_path = self.get_temp_path(self.get_sheet_path(sheet, ".csv"))
+        with open(tmp_path, 'w', newline='', encoding='utf-8') as file:
+            writer = csv.writer(file)
+            writer.writerow(sheet.get_headers(flat=True))
+            for rows in chunks:
+                writer.writerows(rows)
+
+
+class ColumnarWriter(ExportWriter):
+    """
+    Папка зі стисненим колонковим файлом для кожної таблиці:
+    Parquet або Arrow IPC (потрібен pyarrow), або .npz з масивом numpy на кожну колонку.
+    Parquet і Arrow пишуться потоково: рядки накопичуються до ROW_GROUP_SIZE і записуються окремою групою рядків,
+    типи колонок визначаються за першою частиною рядків. Для .npz колонки збираються в пам'яті,
+    бо масиви записуються у файл цілими.
+    """
+    EXTENSIONS = {"parquet": ".parquet", "arrow": ".arrow", "npz": ".npz"}
+    ROW_GROUP_SIZE = 100000
+
+    def __init__(self, output_path: str, file_format: str):
+        super().__init__(output_path)
+        if file_format not in self.EXTENSIONS:
+            raise Exception(f"Невідомий формат експорту: {file_format}")
+        if file_format in ("parquet", "arrow") and get_pyarrow() is None:
+            raise Exception(f"Для формату {file_format} потрібно встановити пакет pyarrow")
+        if file_format == "npz" and get_numpy() is None:
+            raise Exception("Для формату npz потрібно встановити пакет numpy")
+        self.file_format = file_format
+
+    def write_sheet(self, sheet, chunks):
+        headers = sheet.get_headers(flat=True)
+        tmp_path = self.get_temp_path(self.get_sheet_path(sheet, self.EXTENSIONS[self.file_format]))
+        if self.file_format == "npz":
+            self.write_npz(tmp_path, headers, chunks)
+        else:
+            self.write_arrow(tmp_path, headers, chunks)
+
+    @staticmethod
+    def get_columns(rows, width):
+        """Колонки частини рядків. Порожній рядок - це відсутнє значення (COALESCE(..., '') у запитах)."""
+        return [[None if value == '' else value for value in column] for column in zip(*rows)] or \
+            [[] for _ in range(width)]
+
+    @staticmethod
+    def get_column_type(values):
+        """"int", "float" або "str" - за всіма непорожніми значеннями колонки (порожня колонка - "str")."""
+        column_type = None
+        for value in values:
+            if value is None:
+                continue
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                return "str"
+            if isinstance(value, float):
+                column_type = "float"
+            elif column_type is None:
+                column_type = "int"
+        return column_type or "str"
+
+    def write_arrow(self, path, headers, chunks):
+        pa = get_pyarrow()
+        arrow_types = {"int": pa.int64(), "float": pa.float64(), "str": pa.string()}
+        schema = None
+        batches = []
+        batch_rows = 0
+        with ExitStack() as stack:
+            for rows in chunks:
+                columns = self.get_columns(rows, len(headers))
+                if schema is None:
+                    types = [self.get_column_type(column) for column in columns]
+                    schema = pa.schema([(header, arrow_types[column_type]) for header, column_type in zip(headers, types)])
+                    writer = self.open_arrow_writer(stack, path, schema)
+                arrays = []
+                for header, column, column_type in zip(headers, columns, types):
+                    if column_type == "str":
+                        column = [None if value is None else str(value) for value in column]
+                    try:
+                        arrays.append(pa.array(column, type=arrow_types[column_type]))
+                    except (pa.ArrowInvalid, pa.ArrowTypeError, TypeError):
+                        raise Exception(f"Колонка '{header}' містить значення іншого типу, ніж у перших рядках таблиці")
+                batches.append(pa.record_batch(arrays, schema=schema))
+                batch_rows += len(rows)
+                if batch_rows >= self.ROW_GROUP_SIZE:
+                    writer.write_table(pa.Table.from_batches(batches, schema=schema))
+                    batches = []
+                    batch_rows = 0
+            if schema is None:  # порожня таблиця - файл лише із заголовками
+                schema = pa.schema([(header, pa.string()) for header in headers])
+                writer = self.open_arrow_writer(stack, path, schema)
+            if batches:
+                writer.write_table(pa.Table.from_batches(batches, schema=schema))
+
+    def open_arrow_writer(self, stack: ExitStack, path, schema):
+        """Writer файлу Parquet або Arrow IPC, який закривається разом зі stack."""
+        pa = get_pyarrow()
+        if self.file_format == "parquet":
+            return stack.enter_context(pa.parquet.ParquetWriter(path, schema, compression="zstd"))
+        sink = stack.enter_context(pa.OSFile(path, 'wb'))
+        options = pa.ipc.IpcWriteOptions(compression="zstd")
+        return stack.enter_context(pa.ipc.new_file(sink, schema, options=options))
+
+    def write_npz(self, path, headers, chunks):
+        np = get_numpy()
+        columns = [[] for _ in headers]
+        for rows in chunks:
+            for column, values in zip(columns, zip(*rows)):
+                column.extend(None if value == '' else value for value in values)
+
+        arrays = {}
+        for position, header in enumerate(headers):
+            column = columns[position]
+            columns[position] = None  # список колонки не потрібен, щойно з нього створено масив
+            column_type = self.get_column_type(column)
+            if column_type == "str":
+                arrays[header] = np.array(["" if value is None else str(value) for value in column], dtype=str)
+            elif column_type == "int" and None not in column:
+                arrays[header] = np.array(column, dtype=np.int64)
+            else:
+                arrays[header] = np.fromiter((np.nan if value is None else value for value in column),
+                                             dtype=np.float64, count=len(column))
+        with open(path, 'wb') as file:
+            np.savez_compressed(file, **arrays)
+
+
+EXPORT_FORMATS = ["xlsx", "csv", "parquet", "arrow", "npz", "columnar"]
+
+
+def get_export_writer(file_format: str, output_path: str) -> ExportWriter:
+    """
+    Створює writer для формату.
+    "columnar" - Parquet, якщо встановлено pyarrow, інакше npz (потрібен numpy).
+    """
+    if file_format == "columnar":
+        if get_pyarrow() is not None:
+            file_format = "parquet"
+        elif get_numpy() is not None:
+            file_format = "npz"
+        else:
+            raise Exception("Для формату columnar потрібно встановити пакет pyarrow (parquet) або numpy (npz)")
+    if file_format == "xlsx":
+        return ExcelWriter(output_path)
+    if file_format == "csv":
+        return CsvWriter(output_path)
+    return ColumnarWriter(output_path, file_format)
+
+
+class Exporter:
+    def __init__(self, db, sheets, chunk_size: int = EXPORT_CHUNK_SIZE):
+        """
+        Потоковий експорт: рядки читаються з курсора частинами і одразу передаються у writer,
+        без завантаження всієї таблиці в пам'ять. Читає через з'єднання для читання з пулу бази даних,
+        тому може виконуватись в окремому потоці паралельно із записом.
+
+        :param db: База даних (Database)
+        :param sheets: Список ExportSheet
+        :param chunk_size: Кількість рядків, що читаються з курсора за раз
+        """
+        self.db = db
+        self.sheets = sheets
+        self.chunk_size = chunk_size
+
+    def export(self, writer: ExportWriter, progress=None, is_cancelled=None):
+        """
+        Записує всі таблиці через writer.
+
+        :param progress: Функція progress(percent), яка викликається після кожної частини рядків
+        :param is_cancelled: Функція, яка повертає True, якщо експорт потрібно перервати (ExportCancelled)
+        :return: Кількість записаних рядків
+        """
+        with self.db.reader() as connection:
+            connection.execute("BEGIN")  # всі таблиці читаються з одного знімка бази даних
+            total = sum(
+                connection.execute(f"SELECT COUNT(*) FROM ({sheet.query})", sheet.params).fetchone()[0]
+                for sheet in self.sheets
+            )
+            written = 0
+
+            def read_chunks(sheet):
+                nonlocal written
+                cursor = connection.execute(sheet.query, sheet.params)
+                while True:
+                    if is_cancelled and is_cancelled():
+                        raise ExportCancelled()
+                    rows = cursor.fetchmany(self.chunk_size)
+                    if not rows:
+                        return
+                    yield [row[sheet.skip_columns:] for row in rows]
+                    written += len(rows)
+                    if progress and total:
+                        progress(int(written * 100 / total))
+
+            try:
+                for sheet in self.sheets:
+                    writer.write_sheet(sheet, read_chunks(sheet))
+                writer.finish()
+            except Exception:
+                writer.abort()
+                raise
+            finally:
+                connection.rollback()
+
+        if progress:
+            progress(100)
+        return written
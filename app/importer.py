@@ -0,0 +1,380 @@
+import os, csv
+from app.user_repository import UserRepository
+from app.real_estate_repository import RealEstateRepository
+from app.real_estate_type_repository import RealEstateTypeRepository, RealEstateRatesRepository
+from app.land_parcel_repository import LandParcelRepository, NormativeMonetaryValuesRepository
+from app.land_parcel_type_repository import LandParcelTypeRepository, LandParcelRatesRepository
+from app.salary_repository import SalaryRepository
+from app.base_repository import OperationCancelled
+
+IMPORT_CHUNK_SIZE = 5000
+YES = "Так"
+
+
+class ImportCancelled(OperationCancelled):
+    """Імпорт скасовано користувачем. result - рядки, які встигли імпортуватись до скасування."""
+    def __init__(self, result):
+        super().__init__("Імпорт скасовано")
+        self.result = result
+
+
+class ImportSheet:
+    def __init__(self, name: str, file_name: str, fields):
+        """
+        Опис одного аркуша (таблиці) імпорту. Формат такий самий, як у експорту:
+        перший рядок - заголовки, колонки йдуть у порядку fields.
+
+        :param name: Назва аркуша в Excel
+        :param file_name: Назва CSV файлу без розширення і вид таблиці: users, real_estate або land_parcel
+        :param fields: Назви полів у порядку колонок файлу
+        """
+        self.name = name
+        self.file_name = file_name
+        self.fields = list(fields)
+
+
+class ImportResult:
+    def __init__(self, report_path: str):
+        self.report_path = report_path
+        self.imported = {}  # назва аркуша -> кількість імпортованих рядків
+        self.rejected = {}  # назва аркуша -> кількість відхилених рядків
+
+    def has_rejected(self):
+        return any(self.rejected.values())
+
+    def get_summary(self):
+        lines = [
+            f"{name}: імпортовано {self.imported.get(name, 0)}, відхилено {self.rejected.get(name, 0)}"
+            for name in self.imported
+        ]
+        if self.has_rejected():
+            lines.append(f"Відхилені рядки збережено у файл: {self.report_path}")
+        return "\n".join(lines)
+
+
+class ImportSource:
+    """
+    Джерело рядків імпорту: файл .xlsx (аркуші за назвою), папка з CSV файлами
+    (users.csv, real_estate.csv, land_parcel.csv) або один такий CSV файл.
+    Рядки читаються потоково, без завантаження всього файлу в пам'ять.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.workbook = None
+        if os.path.isdir(path):
+            self.kind = "folder"
+        elif path.lower().endswith(".xlsx"):
+            from openpyxl import load_workbook
+            self.kind = "xlsx"
+            self.workbook = load_workbook(path, read_only=True, data_only=True)
+        elif path.lower().endswith(".csv"):
+            self.kind = "csv"
+        else:
+            raise Exception("Непідтримуваний формат файлу. Виберіть файл .xlsx або .csv")
+
+    def get_csv_path(self, sheet: ImportSheet):
+        if self.kind == "folder":
+            return os.path.join(self.path, sheet.file_name + ".csv")
+        return self.path
+
+    def has_sheet(self, sheet: ImportSheet):
+        if self.kind == "xlsx":
+            return sheet.name in self.workbook.sheetnames
+        if self.kind == "csv":
+            return os.path.splitext(os.path.basename(self.path))[0] == sheet.file_name
+        return os.path.exists(self.get_csv_path(sheet))
+
+    def count_rows(self, sheet: ImportSheet):
+        """Кількість рядків даних (без заголовка) - для відображення прогресу."""
+        if self.kind == "xlsx":
+            max_row = self.workbook[sheet.name].max_row
+            if max_row is None:  # розмір аркуша не записаний у файлі
+                max_row = sum(1 for _ in self.workbook[sheet.name].iter_rows(values_only=True))
+            return max(max_row - 1, 0)
+        with open(self.get_csv_path(sheet), 'r', newline='', encoding='utf-8-sig') as file:
+            return max(sum(1 for _ in csv.reader(file)) - 1, 0)
+
+    def read_rows(self, sheet: ImportSheet):
+        """Повертає (номер рядка у файлі, значення колонок) для кожного рядка даних."""
+        width = len(sheet.fields)
+        if self.kind == "xlsx":
+            rows = self.workbook[sheet.name].iter_rows(min_row=2, values_only=True)
+            for row_number, row in enumerate(rows, start=2):
+                yield row_number, self.normalize_row(row, width)
+            return
+        with open(self.get_csv_path(sheet), 'r', newline='', encoding='utf-8-sig') as file:
+            reader = csv.reader(file)
+            next(reader, None)
+            for row_number, row in enumerate(reader, start=2):
+                yield row_number, self.normalize_row(row, width)
+
+    @staticmethod
+    def normalize_row(row, width):
+        """Рядок фіксованої ширини з текстовими значеннями без зайвих пробілів (порожня клітинка - '')."""
+        values = []
+        for value in row[:width]:
+            if value is None:
+                value = ""
+            elif isinstance(value, float) and value.is_integer():
+                value = str(int(value))  # Excel зберігає цілі числа (наприклад РНОКПП) як float
+            values.append(str(value).strip())
+        values.extend([""] * (width - len(values)))
+        return values
+
+    def close(self):
+        if self.workbook is not None:
+            self.workbook.close()
+
+
+class RejectedRowsReport:
+    """CSV звіт з відхиленими рядками. Файл створюється лише при першому відхиленому рядку."""
+    def __init__(self, path: str):
+        self.path = path
+        self.file = None
+        self.writer = None
+
+    def add(self, sheet: ImportSheet, row_number: int, error: str, values):
+        if self.file is None:
+            self.file = open(self.path, 'w', newline='', encoding='utf-8')
+            self.writer = csv.writer(self.file)
+            self.writer.writerow(["Аркуш", "Рядок", "Помилка", "Значення"])
+        self.writer.writerow([sheet.name, row_number, error] + list(values))
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+
+def parse_number(value: str):
+    """Число з тексту клітинки (допускається кома як десятковий роздільник) або None."""
+    try:
+        return float(value.replace(",", "."))
+    except ValueError:
+        return None
+
+
+def get_type_name(value: str):
+    """Назва типу без ставки, яку додає експорт: 'Житлова (1.5%)' -> 'Житлова'."""
+    if value.endswith("%)") and " (" in value:
+        return value[:value.rfind(" (")]
+    return value
+
+
+def get_owner_code(value: str):
+    """РНОКПП власника - останнє слово колонки власника ('Прізвище Ім'я По батькові РНОКПП' або лише код)."""
+    parts = value.split()
+    return parts[-1] if parts else ""
+
+
+class Importer:
+    def __init__(self, db, sheets, year: int, chunk_size: int = IMPORT_CHUNK_SIZE):
+        """
+        Пакетний імпорт людей, нерухомості та земельних ділянок (з НГО) за рік.
+        Довідники (РНОКПП, типи, ставки, мінімальна зарплата) завантажуються один раз,
+        рядки перевіряються і вставляються частинами через пакетні методи репозиторіїв, кожна частина - в окремій
+        транзакції, податки розраховуються для всієї частини одразу. Може виконуватись в окремому потоці -
+        запис іде через з'єднання для запису бази даних по черзі з іншими потоками.
+
+        :param db: База даних (Database)
+        :param sheets: Список ImportSheet (люди імпортуються першими, щоб їх можна було вказати власниками)
+        :param year: Рік, за який записуються НГО і податки
+        :param chunk_size: Кількість рядків в одній транзакції
+        """
+        self.db = db
+        self.sheets = sheets
+        self.year = year
+        self.chunk_size = chunk_size
+        self.user_repo = db.get_repository(UserRepository)
+        self.estate_repo = db.get_repository(RealEstateRepository)
+        self.land_repo = db.get_repository(LandParcelRepository)
+        self.nmv_repo = db.get_repository(NormativeMonetaryValuesRepository)
+        self.handlers = {
+            "users": self.import_users,
+            "real_estate": self.import_real_estate,
+            "land_parcel": self.import_land_parcels,
+        }
+
+    def import_file(self, source_path: str, report_path: str, progress=None, is_cancelled=None):
+        """
+        Імпортує всі таблиці, знайдені у файлі (або папці з CSV файлами).
+
+        :param report_path: Файл CSV для відхилених рядків (створюється, лише якщо такі рядки є)
+        :param progress: Функція progress(percent), яка викликається після кожної частини рядків
+        :param is_cancelled: Функція, яка повертає True, якщо імпорт потрібно перервати (ImportCancelled).
+            Вже записані частини залишаються в базі даних.
+        :return: ImportResult
+        """
+        source = ImportSource(source_path)
+        report = RejectedRowsReport(report_path)
+        result = ImportResult(report_path)
+        try:
+            sheets = [sheet for sheet in self.sheets if source.has_sheet(sheet)]
+            if not sheets:
+                raise Exception("У файлі не знайдено таблиць для імпорту")
+            total = sum(source.count_rows(sheet) for sheet in sheets)
+            processed = 0
+            self.load_lookups()
+
+            for sheet in sheets:
+                result.imported[sheet.name] = 0
+                result.rejected[sheet.name] = 0
+                handler = self.handlers[sheet.file_name]
+                for chunk in self.read_chunks(source.read_rows(sheet)):
+                    if is_cancelled and is_cancelled():
+                        raise ImportCancelled(result)
+                    with self.db.transaction():
+                        imported, rejected = handler(sheet, chunk)
+                    for row_number, error, values in rejected:
+                        report.add(sheet, row_number, error, values)
+                    result.imported[sheet.name] += imported
+                    result.rejected[sheet.name] += len(rejected)
+                    processed += len(chunk)
+                    if progress and total:
+                        progress(min(int(processed * 100 / total), 100))
+        finally:
+            report.close()
+            source.close()
+
+        if progress:
+            progress(100)
+        return result
+
+    def read_chunks(self, rows):
+        chunk = []
+        for row in rows:
+            chunk.append(row)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def load_lookups(self):
+        """Довідники для перевірки рядків - один запит на кожен."""
+        self.user_ids = self.user_repo.get_ids_by_code()
+        self.estate_type_ids = self.db.get_repository(RealEstateTypeRepository).get_ids_by_name()
+        self.land_type_ids = self.db.get_repository(LandParcelTypeRepository).get_ids_by_name()
+        self.estate_rates = self.db.get_repository(RealEstateRatesRepository).get_rates_by_year(self.year)
+        self.land_rates = self.db.get_repository(LandParcelRatesRepository).get_rates_by_year(self.year)
+        self.salary = self.db.get_repository(SalaryRepository).get_salary(self.year)
+
+    def find_owner(self, value: str):
+        user_id = self.user_ids.get(get_owner_code(value))
+        if user_id is None:
+            return None, f"Не знайдено людину з РНОКПП '{get_owner_code(value)}'"
+        return user_id, None
+
+    def import_users(self, sheet, chunk):
+        records = []
+        rejected = []
+        for row_number, values in chunk:
+            last_name, name, middle_name, rnokpp, address, email, phone = values[:7]
+            if not all((last_name, name, middle_name, rnokpp, address)):
+                rejected.append((row_number, "Не заповнені обов'язкові поля", values))
+            elif rnokpp in self.user_ids:
+                rejected.append((row_number, "Людина з таким кодом вже існує", values))
+            else:
+                self.user_ids[rnokpp] = None  # повтор коду далі у файлі також відхиляється
+                records.append((last_name, name, middle_name, rnokpp, address, email, phone))
+
+        if records:
+            ids = self.user_repo.add_records_returning_ids(records)
+            for record, user_id in zip(records, ids):
+                self.user_ids[record[3]] = user_id
+        return len(records), rejected
+
+    def import_real_estate(self, sheet, chunk):
+        fields = sheet.fields
+        name_i, address_i, area_i = fields.index("name"), fields.index("address"), fields.index("area")
+        paid_i, sum_paid_i = fields.index("paid"), fields.index("sum_paid")
+        owner_i, type_i, notes_i = fields.index("owner"), fields.index("type"), fields.index("notes")
+
+        records = []
+        taxes = []
+        rejected = []
+        for row_number, values in chunk:
+            error = None
+            area = parse_number(values[area_i])
+            sum_paid = parse_number(values[sum_paid_i] or "0")
+            type_id = self.estate_type_ids.get(get_type_name(values[type_i]))
+            user_id, owner_error = self.find_owner(values[owner_i])
+            if not all((values[name_i], values[address_i], values[area_i], values[owner_i], values[type_i])):
+                error = "Не заповнені обов'язкові поля"
+            elif area is None or area <= 0:
+                error = "Значення площі повинно бути числом більшим за 0!"
+            elif sum_paid is None:
+                error = "Значення сплати податку повинно бути числом!"
+            elif owner_error:
+                error = owner_error
+            elif type_id is None:
+                error = f"Не знайдено такий тип нерухомості: '{get_type_name(values[type_i])}'"
+            elif self.salary is None:
+                error = RealEstateRepository.NO_SALARY_ERROR
+            elif type_id not in self.estate_rates:
+                error = RealEstateRepository.NO_RATE_ERROR
+            if error:
+                rejected.append((row_number, error, values))
+                continue
+
+            tax = RealEstateRepository.compute_tax(self.salary, area, *self.estate_rates[type_id])
+            paid = 1 if values[paid_i] == YES or tax == 0 else 0
+            records.append((values[name_i], values[address_i], area, values[notes_i], user_id, type_id))
+            taxes.append((tax, paid, sum_paid))
+
+        if records:
+            ids = self.estate_repo.add_records_returning_ids(records)
+            self.estate_repo.estate_tax_repo.add_records(
+                (estate_id, self.year) + tax for estate_id, tax in zip(ids, taxes)
+            )
+        return len(records), rejected
+
+    def import_land_parcels(self, sheet, chunk):
+        fields = sheet.fields
+        address_i, area_i, privileged_i = fields.index("address"), fields.index("area"), fields.index("privileged")
+        nmv_i, paid_i, sum_paid_i = fields.index("normative_monetary_value"), fields.index("paid"), fields.index("sum_paid")
+        owner_i, type_i, notes_i = fields.index("owner"), fields.index("type"), fields.index("notes")
+
+        records = []
+        values_and_taxes = []
+        rejected = []
+        for row_number, values in chunk:
+            error = None
+            area = parse_number(values[area_i])
+            normative_monetary_value = parse_number(values[nmv_i])
+            sum_paid = parse_number(values[sum_paid_i] or "0")
+            privileged = 1 if values[privileged_i] == YES else 0
+            type_id = self.land_type_ids.get(get_type_name(values[type_i]))
+            user_id, owner_error = self.find_owner(values[owner_i])
+            if not all((values[address_i], values[area_i], values[nmv_i], values[owner_i], values[type_i])):
+                error = "Не заповнені обов'язкові поля"
+            elif area is None or area <= 0:
+                error = "Значення площі повинно бути числом більшим за 0!"
+            elif normative_monetary_value is None or normative_monetary_value < 0:
+                error = "Значення нормативно грошової оцінки повинно бути невід'ємним числом!"
+            elif sum_paid is None:
+                error = "Значення сплати податку повинно бути числом!"
+            elif owner_error:
+                error = owner_error
+            elif type_id is None:
+                error = f"Не знайдено такий тип земельної ділянки: '{get_type_name(values[type_i])}'"
+            elif not privileged and type_id not in self.land_rates:
+                error = LandParcelRepository.NO_RATE_ERROR
+            if error:
+                rejected.append((row_number, error, values))
+                continue
+
+            tax = 0 if privileged else LandParcelRepository.compute_tax(
+                area, normative_monetary_value, self.land_rates[type_id])
+            paid = 1 if values[paid_i] == YES or tax == 0 else 0
+            records.append((user_id, type_id, values[address_i], area, privileged, values[notes_i]))
+            values_and_taxes.append((normative_monetary_value, tax, paid, sum_paid))
+
+        if records:
+            ids = self.land_repo.add_records_returning_ids(records)
+            self.nmv_repo.add_records(
+                (land_id, self.year, value[0]) for land_id, value in zip(ids, values_and_taxes)
+            )
+            self.land_repo.land_tax_repo.add_records(
+                (land_id, self.year) + value[1:] for land_id, value in zip(ids, values_and_taxes)
+            )
+        return len(records), rejected
@@ -1,16 +1,19 @@
-from app.base_repository import BaseRepository, SilentCloseExeption
+from app.base_repository import BaseRepository, YearRecordRepository, TaxesRepository, SilentCloseExeption, OperationCancelled, raise_row_errors, run_in_chunks
 import app.land_parcel_type_repository as land_type_base_repo
 
 class LandParcelRepository(BaseRepository):
+    NO_NMV_ERROR = "Неможливо розрахувати податок - немає інформації нормативно грошову оцінку!"
+    NO_RATE_ERROR = "Неможливо розрахувати податок - немає інформації про ставку податку!"
+    
     def __init__(self, database):
         super().__init__(database)
         self.db = database
         self.table_name = "land_parcel"
         self.columns = self.get_table_columns()
-        self.land_type_repo = land_type_base_repo.LandParcelTypeRepository(database)
-        self.land_tax_repo = LandParcelTaxesRepository(database)
-        self.land_parcel_rates_repo = land_type_base_repo.LandParcelRatesRepository(database)
-        self.normative_monetary_value_repo = NormativeMonetaryValuesRepository(database)
+        self.land_type_repo = database.get_repository(land_type_base_repo.LandParcelTypeRepository)
+        self.land_tax_repo = database.get_repository(LandParcelTaxesRepository)
+        self.land_parcel_rates_repo = database.get_repository(land_type_base_repo.LandParcelRatesRepository)
+        self.normative_monetary_value_repo = database.get_repository(NormativeMonetaryValuesRepository)
         
     def get_all_ids(self):
         query = f"SELECT {self.columns[0]} FROM {self.table_name}"
@@ -23,8 +26,9 @@ class LandParcelRepository(BaseRepository):
         """
         return self.db.execute_query(query, (type_id,))
     
-    def get_all_record_by_year(self, year):
-        query = """
+    def get_records_by_year_query(self, condition=""):
+        """Запит рядків таблиці за рік. condition - додаткова умова WHERE для вибору окремих рядків."""
+        return f"""
         SELECT 
             land_parcel.id, 
             users.id AS user_id,
@@ -60,8 +64,21 @@ class LandParcelRepository(BaseRepository):
         LEFT JOIN land_parcel_type_rates 
             ON land_parcel_type_rates.land_parcel_type_id = land_parcel.land_parcel_type_id
             AND land_parcel_type_rates.tax_year = ?
+        {condition}
         """
-        return self.db.execute_query(query, (year,year,year))
+    
+    def get_all_record_by_year(self, year):
+        return self.db.execute_query(self.get_records_by_year_query(), (year,year,year))
+    
+    def get_records_by_ids_and_year(self, record_ids, year):
+        """Рядки таблиці за рік лише для вказаних id - для оновлення окремих рядків без перезавантаження таблиці."""
+        query = self.get_records_by_year_query(f"WHERE land_parcel.id IN ({', '.join(['?' for _ in record_ids])})")
+        return self.db.execute_query(query, (year, year, year, *record_ids))
+    
+    def get_records_by_user_and_year(self, user_id, year):
+        """Рядки таблиці за рік для всіх записів власника."""
+        query = self.get_records_by_year_query("WHERE users.id = ?")
+        return self.db.execute_query(query, (year, year, year, user_id))
     
     def get_all_land_by_user_id(self, user_id):
         """повертає список id які належать user_id"""
@@ -90,15 +107,42 @@ class LandParcelRepository(BaseRepository):
         return result[0] if result else None
     
     def calculate_tax(self, year, area:float, type_id, normative_monetary_value:float):
-        type_rate = self.land_parcel_rates_repo.get_by_year_and_typeid(year, type_id)
+        type_rate = self.land_parcel_rates_repo.get_cached_by_year_and_typeid(year, type_id)
         if type_rate is None:
-            raise Exception("Неможливо розрахувати податок - немає інформації про ставку податку!")
-        tax_percent = float(type_rate[3]) # %
-        
-        tax_rate = tax_percent / 100
+            raise Exception(self.NO_RATE_ERROR)
+        return self.compute_tax(area, normative_monetary_value, type_rate[3])
+    
+    @staticmethod
+    def compute_tax(area:float, normative_monetary_value:float, tax_percent:float):
+        """Податок = нормативно грошова оцінка * ставка(%) * площа"""
+        tax_rate = float(tax_percent) / 100
         tax = round(normative_monetary_value * tax_rate * area, 2)
         return tax
     
+    def get_tax_inputs_by_year(self, year, type_id=None):
+        """Повертає (id, площа, пільговик, НГО, ставка) для всіх ділянок (або лише одного типу) одним запитом."""
+        # умова за типом додається лише для одного типу, щоб запит знаходив ділянки за індексом idx_land_parcel_type_id
+        condition, params = "", (year, year)
+        if type_id is not None:
+            condition, params = f"WHERE {self.table_name}.land_parcel_type_id = ?", (year, year, type_id)
+        query = f"""
+        SELECT 
+            {self.table_name}.id,
+            {self.table_name}.area,
+            {self.table_name}.privileged,
+            normative_monetary_values.value,
+            land_parcel_type_rates.tax_rate
+        FROM {self.table_name}
+        LEFT JOIN normative_monetary_values 
+            ON normative_monetary_values.land_id = {self.table_name}.id
+            AND normative_monetary_values.year = ?
+        LEFT JOIN land_parcel_type_rates 
+            ON land_parcel_type_rates.land_parcel_type_id = {self.table_name}.land_parcel_type_id
+            AND land_parcel_type_rates.tax_year = ?
+        {condition}
+        """
+        return self.db.execute_query(query, params)
+    
     def add_record(self, year, address, area, privileged, 
             normative_monetary_value, paid, sum_paid, owner_id, land_type_name, notes):
         area = float(area)
@@ -108,13 +152,15 @@ class LandParcelRepository(BaseRepository):
             raise Exception("Помилка. Не знайдено такий тип нерухомості!")
         type_id = type_record[0]
         privileged = 1 if privileged == "Так" else 0
-        new_land_id = super().add_record((owner_id, type_id, address, area, privileged, notes))
+        with self.db.transaction():
+            new_land_id = super().add_record((owner_id, type_id, address, area, privileged, notes))
         
-        self.normative_monetary_value_repo.add_record((new_land_id, year, normative_monetary_value))
+            self.normative_monetary_value_repo.add_record((new_land_id, year, normative_monetary_value))
         
-        tax = self.calculate_tax(year, area, type_id, normative_monetary_value) if privileged == 0 else 0
-        paid = 1 if paid == "Так" or tax == 0 else 0
-        self.land_tax_repo.add_record((new_land_id, year, tax, paid, sum_paid))
+            tax = self.calculate_tax(year, area, type_id, normative_monetary_value) if privileged == 0 else 0
+            paid = 1 if paid == "Так" or tax == 0 else 0
+            self.land_tax_repo.add_record((new_land_id, year, tax, paid, sum_paid))
+        return new_land_id
         
     def update_record(self, land_id, year, address, area, privileged, 
             normative_monetary_value, paid, sum_paid, owner_id, land_type_name, notes):
@@ -125,42 +171,53 @@ class LandParcelRepository(BaseRepository):
             raise Exception("Помилка. Не знайдено такий тип нерухомості!")
         type_id = type_record[0]
         privileged = 1 if privileged == "Так" else 0
-        super().update_record(land_id, (owner_id, type_id, address, area, privileged, notes))
+        with self.db.transaction():
+            super().update_record(land_id, (owner_id, type_id, address, area, privileged, notes))
         
-        # update\add NMV
-        if self.normative_monetary_value_repo.get_by_id_and_year(land_id, year):
-            self.normative_monetary_value_repo.update_record(land_id, year, normative_monetary_value)
-        else:
-            self.normative_monetary_value_repo.add_record((land_id, year, normative_monetary_value))
+            # update\add NMV
+            if self.normative_monetary_value_repo.get_by_id_and_year(land_id, year):
+                self.normative_monetary_value_repo.update_record(land_id, year, normative_monetary_value)
+            else:
+                self.normative_monetary_value_repo.add_record((land_id, year, normative_monetary_value))
         
-        # update\add tax
-        tax = self.calculate_tax(year, area, type_id, normative_monetary_value) if privileged == 0 else 0
-        paid = 1 if paid == "Так" or tax == 0 else 0
-        if self.land_tax_repo.get_by_id_and_year(land_id, year):
-            self.land_tax_repo.update_record(land_id, year, (tax, paid, sum_paid))
-        else:
-            self.land_tax_repo.add_record((land_id, year, tax, paid, sum_paid))
+            # update\add tax
+            tax = self.calculate_tax(year, area, type_id, normative_monetary_value) if privileged == 0 else 0
+            paid = 1 if paid == "Так" or tax == 0 else 0
+            if self.land_tax_repo.get_by_id_and_year(land_id, year):
+                self.land_tax_repo.update_record(land_id, year, (tax, paid, sum_paid))
+            else:
+                self.land_tax_repo.add_record((land_id, year, tax, paid, sum_paid))
+        return land_id
     
-    def update_all_tax(self, year, type_id=None):
-        if type_id is None:
-            land_results = self.get_all_ids()
-        else:
-            land_results = self.get_all_ids_by_type_id(type_id)
+    def update_all_tax(self, year, type_id=None, progress=None, is_cancelled=None):
+        """
+        Перераховує податки всіх ділянок (або лише одного типу) за рік.
+        Ділянки, НГО і ставки читаються одним запитом, запис - пакетними upsert частинами в одній транзакції.
+        Ділянки без НГО або без ставки пропускаються і повертаються в тексті помилки.
 
-        if not land_results:
-            raise SilentCloseExeption("Не знайдено записи для оновлення!")
+        :param progress: Функція progress(percent), яка викликається після кожної записаної частини
+        :param is_cancelled: Функція, яка повертає True, якщо перерахунок потрібно скасувати (зміни відкочуються)
+        """
+        with self.db.transaction():
+            land_results = self.get_tax_inputs_by_year(year, type_id)
+            if not land_results:
+                raise SilentCloseExeption("Не знайдено записи для оновлення!")
         
-        unique_exeptions = set()
-        i=0
-        for land in land_results:
-            try:
-                self.update_tax(land[0], year)
-            except Exception as e:
-                unique_exeptions.add(str(e))
-                i+=1
+            row_errors = {}
+            taxes = []
+            for land_id, area, privileged, normative_monetary_value, tax_percent in land_results:
+                if normative_monetary_value is None:
+                    row_errors.setdefault(self.NO_NMV_ERROR, []).append(land_id)
+                elif privileged:
+                    taxes.append((land_id, year, 0))
+                elif tax_percent is None:
+                    row_errors.setdefault(self.NO_RATE_ERROR, []).append(land_id)
+                else:
+                    taxes.append((land_id, year, self.compute_tax(area, int(normative_monetary_value), tax_percent)))
         
-        if unique_exeptions:
-            raise Exception(f"для ({i}) рядків. Перелік унікальних помилок:\n" + "\n".join(unique_exeptions))
+            run_in_chunks(taxes, self.land_tax_repo.upsert_taxes, progress, is_cancelled)
+        
+        raise_row_errors(row_errors)
     
     def update_tax(self, land_id, year):
         land_record = self.get_area_typeid_privileged_by_id(land_id)
@@ -170,7 +227,7 @@ class LandParcelRepository(BaseRepository):
         
         normative_monetary_value = self.normative_monetary_value_repo.get_by_id_and_year(land_id, year)
         if not normative_monetary_value:
-            raise Exception("Неможливо розрахувати податок - немає інформації нормативно грошову оцінку!")
+            raise Exception(self.NO_NMV_ERROR)
         normative_monetary_value = int(normative_monetary_value[2])
         
         new_tax = self.calculate_tax(year, area, type_id, normative_monetary_value) if privileged == 0 else 0
@@ -182,7 +239,7 @@ class LandParcelRepository(BaseRepository):
             self.land_tax_repo.add_record((land_id, year, new_tax, paid, sum_paid))
 
 
-class NormativeMonetaryValuesRepository(BaseRepository):
+class NormativeMonetaryValuesRepository(YearRecordRepository):
     def __init__(self, database):
         super().__init__(database)
         self.db = database
@@ -200,29 +257,55 @@ class NormativeMonetaryValuesRepository(BaseRepository):
         result = self.db.execute_query(query, (year, id))
         return result[0][0] if result else None
     
-    def get_by_id_and_year(self, record_id, year):
-        query = f"""
-        SELECT * FROM {self.table_name}
-        WHERE {self.columns[0]} = ? AND {self.columns[1]} = ?
+    def copy_values_from_last_year(self, year, progress=None, is_cancelled=None):
         """
-        result = self.db.execute_query(query, (record_id, year))
-        return result[0] if result else None
-    
-    def add_record(self, values):
-        """Додавання нового запису в таблицю."""
-        query = f"""
-        INSERT INTO {self.table_name} ({', '.join(self.columns)})
-        VALUES ({', '.join(['?' for _ in values])})
+        Для всіх ділянок без нормативно грошової оцінки за рік копіює значення
+        за останній попередній рік, для якого воно є - одним INSERT ... SELECT в одній транзакції.
+
+        :param progress: Функція progress(percent) - після підрахунку і після копіювання
+        :param is_cancelled: Функція, яка повертає True, якщо копіювання потрібно скасувати (до запису значень)
+
+        :return: (скопійовано, пропущено заповнених, пропущено не знайдених)
         """
-        return self.db.execute_non_query(query, values)
+        # для ділянки без значення за рік - останній попередній рік, за який значення є
+        last_year_subquery = f"""
+            SELECT MAX(previous.year) FROM {self.table_name} AS previous
+            WHERE previous.land_id = land_parcel.id AND previous.year < ?
+        """
+        has_value_subquery = f"""
+            EXISTS (SELECT 1 FROM {self.table_name} AS current
+                WHERE current.land_id = land_parcel.id AND current.year = ?)
+        """
+        with self.db.transaction():
+            counts_query = f"""
+            SELECT
+                COUNT(*),
+                COALESCE(SUM({has_value_subquery}), 0),
+                COALESCE(SUM(NOT {has_value_subquery} AND ({last_year_subquery}) IS NOT NULL), 0)
+            FROM land_parcel
+            """
+            total, skipped, completed = self.db.execute_query(counts_query, (year, year, year))[0]
+            if progress:
+                progress(50)
+            if is_cancelled and is_cancelled():
+                raise OperationCancelled()
+            
+            insert_query = f"""
+            INSERT INTO {self.table_name} (land_id, year, value)
+            SELECT land_parcel.id, ?, last_value.value
+            FROM land_parcel
+            INNER JOIN {self.table_name} AS last_value
+                ON last_value.land_id = land_parcel.id
+                AND last_value.year = ({last_year_subquery})
+            WHERE NOT {has_value_subquery}
+            """
+            self.db.execute_non_query(insert_query, (year, year, year))
+        if progress:
+            progress(100)
+        return completed, skipped, total - skipped - completed
     
     def update_record(self, record_id, year, value):
-        query = f"""
-        UPDATE {self.table_name} 
-        SET {self.columns[-1]} = ?
-        WHERE {self.columns[0]} = ? AND {self.columns[1]} = ?
-        """
-        self.db.execute_non_query(query, (value, record_id, year))
+        super().update_record(record_id, year, (value,))
     
     def replace_values(self, year, old_value, new_value):
         query = f"""
@@ -232,41 +315,8 @@ class NormativeMonetaryValuesRepository(BaseRepository):
         """
         self.db.execute_non_query(query, (new_value, year, old_value))
 
-class LandParcelTaxesRepository(BaseRepository):
+class LandParcelTaxesRepository(TaxesRepository):
     def __init__(self, database):
         super().__init__(database)
         self.table_name = "land_parcel_taxes"
         self.columns = self.get_table_columns()
-        
-    def get_by_id_and_year(self, record_id, year):
-        query = f"""
-        SELECT * FROM {self.table_name}
-        WHERE {self.columns[0]} = ? AND {self.columns[1]} = ?
-        """
-        result = self.db.execute_query(query, (record_id, year))
-        return result[0] if result else None
-    
-    def add_record(self, values):
-        """Додавання нового запису в таблицю."""
-        query = f"""
-        INSERT INTO {self.table_name} ({', '.join(self.columns)})
-        VALUES ({', '.join(['?' for _ in values])})
-        """
-        return self.db.execute_non_query(query, values)
-    
-    def update_record(self, record_id, year, values):
-        query = f"""
-        UPDATE {self.table_name} 
-        SET {', '.join([f"{column} = ?" for column in self.columns[2:]])}
-        WHERE {self.columns[0]} = ? AND {self.columns[1]} = ?
-        """
-        self.db.execute_non_query(query, tuple(values) + (record_id, year))
-    
-    def update_tax(self, record_id, year, tax):
-        query = f"""
-        UPDATE {self.table_name} 
-        SET {self.columns[2]} = ?
-        WHERE {self.columns[0]} = ? AND {self.columns[1]} = ?
-        """
-        self.db.execute_non_query(query, (tax, record_id, year))
-    
\ No newline at end of file
@@ -8,13 +8,13 @@ class LandParcelTypeBaseRepository(BaseRepository):
     def __init__(self, database):
         super().__init__(database)
         self.db = database
-        self.rates_repo = LandParcelRatesRepository(database)
+        self.rates_repo = database.get_repository(LandParcelRatesRepository)
         self.table_name_rates = self.rates_repo.table_name
         
-        self.type_repo = LandParcelTypeRepository(database)
+        self.type_repo = database.get_repository(LandParcelTypeRepository)
         self.table_name_type = self.type_repo.table_name
         
-        self.land_repo = land_parcel_repo.LandParcelRepository(self.db)
+        self.land_repo = self.db.get_repository(land_parcel_repo.LandParcelRepository)
         
     def get_type_rates(self, year:int):
         query = f"""
@@ -30,16 +30,17 @@ class LandParcelTypeBaseRepository(BaseRepository):
 
     def add_record(self, tax_year, type_name, tax_rate):
         # Додати інформацію і тип нерухомості, якщо його не існує
-        type_record = self.type_repo.get_by_name(type_name) # id, name
-        if not type_record:
-            self.type_repo.add_record((type_name,))
+        with self.db.transaction():
+            type_record = self.type_repo.get_by_name(type_name) # id, name
+            if not type_record:
+                self.type_repo.add_record((type_name,))
         
-        type_record = self.type_repo.get_by_name(type_name) # id, name        
-        rate_record = self.rates_repo.get_by_year_and_typeid(tax_year, type_record[0])
-        if not rate_record:
-            self.rates_repo.add_record((tax_year, type_record[0], tax_rate))
-        else:
-            raise Exception("Такий запис вже існує!")
+            type_record = self.type_repo.get_by_name(type_name) # id, name        
+            rate_record = self.rates_repo.get_by_year_and_typeid(tax_year, type_record[0])
+            if not rate_record:
+                self.rates_repo.add_record((tax_year, type_record[0], tax_rate))
+            else:
+                raise Exception("Такий запис вже існує!")
 
     def update_record(self, id, tax_year, type_name, tax_rate):
         # Оновити інформацію для типу нерухомості
@@ -95,6 +96,13 @@ class LandParcelTypeRepository(BaseRepository):
         result = self.db.execute_query(query, (name,))
         return result[0] if result else None
 
+    def get_ids_by_name(self):
+        """Словник назва -> id для всіх типів одним запитом (для однакових назв - найменший id, як у get_by_name)."""
+        ids = {}
+        for type_id, name in self.db.execute_query(f"SELECT id, name FROM {self.table_name} ORDER BY id"):
+            ids.setdefault(name, type_id)
+        return ids
+
 
 class LandParcelRatesRepository(BaseRepository):
     def __init__(self, database):
@@ -107,6 +115,18 @@ class LandParcelRatesRepository(BaseRepository):
         result = self.db.execute_query(query, (year, type_id))
         return result[0] if result else None
     
+    def get_rates_by_year(self, year):
+        """Словник id типу -> ставка за рік одним запитом."""
+        query = f"SELECT land_parcel_type_id, tax_rate FROM {self.table_name} WHERE tax_year = ?"
+        return dict(self.db.execute_query(query, (year,)))
+    
+    def get_cached_by_year_and_typeid(self, year, type_id):
+        """Те саме, що get_by_year_and_typeid, але кешується до зміни таблиці ставок."""
+        return self.db.get_cached(self.table_name, (year, type_id), lambda: self.get_by_year_and_typeid(year, type_id))
+    
+    def on_table_changed(self):
+        self.db.invalidate_cache(self.table_name)
+    
     def get_typeid_by_id(self, id):
         query = f"SELECT land_parcel_type_id FROM {self.table_name} WHERE id = ?"
         result = self.db.execute_query(query, (id,))
@@ -0,0 +1,57 @@
+# Міграції схеми бази даних.
+# db/db.sql описує початкову схему (версія 0), кожен елемент списку - наступну версію.
+# Номер застосованої версії зберігається в PRAGMA user_version.
+# Вже випущені міграції не змінюються - нові зміни схеми додаються в кінець списку.
+MIGRATIONS = [
+    # 1: індекси для запитів за власником, типом, назвою типу та значенням НГО
+    [
+        "CREATE INDEX IF NOT EXISTS idx_real_estate_user_id ON real_estate(user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_real_estate_type_id ON real_estate(real_estate_type_id)",
+        "CREATE INDEX IF NOT EXISTS idx_land_parcel_user_id ON land_parcel(user_id)",
+        "CREATE INDEX IF NOT EXISTS idx_land_parcel_type_id ON land_parcel(land_parcel_type_id)",
+        "CREATE INDEX IF NOT EXISTS idx_real_estate_type_name ON real_estate_type(name)",
+        "CREATE INDEX IF NOT EXISTS idx_land_parcel_type_name ON land_parcel_type(name)",
+        "CREATE INDEX IF NOT EXISTS idx_nmv_year_value ON normative_monetary_values(year, value)",
+    ],
+    # 2: індекс для пошуку власників за початком прізвища
+    [
+        "CREATE INDEX IF NOT EXISTS idx_users_last_name ON users(last_name)",
+    ],
+    # 3: повнотекстовий індекс ПІБ і РНОКПП для пошуку власників без урахування регістру
+    # (токенізатор unicode61 зводить до одного регістру і кирилицю; тригери оновлюють індекс разом з users)
+    [
+        """
+        CREATE VIRTUAL TABLE IF NOT EXISTS users_search USING fts5(
+            last_name, name, middle_name, rnokpp,
+            content='users', content_rowid='id',
+            tokenize='unicode61 remove_diacritics 0', prefix='1 2 3'
+        )
+        """,
+        "INSERT INTO users_search(users_search) VALUES('rebuild')",
+        """
+        CREATE TRIGGER IF NOT EXISTS users_search_insert AFTER INSERT ON users BEGIN
+            INSERT INTO users_search(rowid, last_name, name, middle_name, rnokpp)
+            VALUES (new.id, new.last_name, new.name, new.middle_name, new.rnokpp);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS users_search_delete AFTER DELETE ON users BEGIN
+            INSERT INTO users_search(users_search, rowid, last_name, name, middle_name, rnokpp)
+            VALUES ('delete', old.id, old.last_name, old.name, old.middle_name, old.rnokpp);
+        END
+        """,
+        """
+        CREATE TRIGGER IF NOT EXISTS users_search_update AFTER UPDATE OF id, last_name, name, middle_name, rnokpp ON users
+        BEGIN
+            INSERT INTO users_search(users_search, rowid, last_name, name, middle_name, rnokpp)
+            VALUES ('delete', old.id, old.last_name, old.name, old.middle_name, old.rnokpp);
+            INSERT INTO users_search(rowid, last_name, name, middle_name, rnokpp)
+            VALUES (new.id, new.last_name, new.name, new.middle_name, new.rnokpp);
+        END
+        """,
+    ],
+    # 4: індекс idx_users_last_name (міграція 2) не потрібен - пошук власників іде через users_search
+    [
+        "DROP INDEX IF EXISTS idx_users_last_name",
+    ],
+]
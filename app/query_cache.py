@@ -0,0 +1,70 @@
+import threading
+
+
+class QueryCache:
+    def __init__(self):
+        """
+        Кеш результатів запитів у пам'яті процесу, спільний для всіх потоків.
+        Значення групуються за простором імен (назва таблиці, з якої вони прочитані)
+        і скидаються через Database.invalidate_cache після зміни цієї таблиці.
+        Лічильники hits/misses показують, наскільки кеш зменшує кількість запитів.
+        """
+        self.lock = threading.Lock()
+        self.values = {}  # простір імен -> {ключ: значення}
+        self.generation = 0  # змінюється при кожному скиданні
+        self.data_version = None
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, namespace: str, key, load, version=None):
+        """
+        Значення з кешу або результат load(), який зберігається в кеші.
+        Якщо кеш скинули, поки виконувався load(), результат не зберігається - він міг застаріти.
+
+        :param version: Версія даних, з якої прочитане значення (наприклад, Database.get_change_marker()).
+            Значення, збережене з іншою версією, читається знову і замінюється.
+        """
+        with self.lock:
+            cached = self.values.get(namespace, {}).get(key)
+            if cached is not None and cached[0] == version:
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+            generation = self.generation
+
+        value = load()
+        with self.lock:
+            if generation == self.generation:
+                self.values.setdefault(namespace, {})[key] = (version, value)
+        return value
+
+    def invalidate(self, namespace: str = None):
+        """Скидає значення простору імен (None - весь кеш)."""
+        with self.lock:
+            self.generation += 1
+            if namespace is None:
+                self.values = {}
+            else:
+                self.values.pop(namespace, None)
+
+    def check_data_version(self, data_version: int):
+        """Скидає весь кеш, якщо дані змінило інше з'єднання (PRAGMA data_version з'єднання для запису)."""
+        with self.lock:
+            if self.data_version is not None and data_version != self.data_version:
+                self.generation += 1
+                self.values = {}
+            self.data_version = data_version
+
+    def reset(self):
+        """Скидає весь кеш і data_version - після нового підключення до бази даних."""
+        self.invalidate()
+        with self.lock:
+            self.data_version = None
+
+    def get_stats(self) -> dict:
+        with self.lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": sum(len(values) for values in self.values.values()),
+            }
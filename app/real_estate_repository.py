@@ -1,23 +1,27 @@
-from app.base_repository import BaseRepository, SilentCloseExeption
+from app.base_repository import BaseRepository, TaxesRepository, SilentCloseExeption, raise_row_errors, run_in_chunks
 from app.salary_repository import SalaryRepository
 import app.real_estate_type_repository as estate_type_base_repo
 
 class RealEstateRepository(BaseRepository):
+    NO_SALARY_ERROR = "Неможливо розрахувати податок - немає інформації про зарпалату!"
+    NO_RATE_ERROR = "Неможливо розрахувати податок - немає інформації про ставку податку!"
+    
     def __init__(self, database):
         super().__init__(database)
         self.db = database
         self.table_name = "real_estate"
         self.columns = self.get_table_columns()
-        self.type_repo = estate_type_base_repo.RealEstateTypeRepository(database)
-        self.estate_tax_repo = RealEstateTaxesRepository(database)
-        self.real_estate_rates_repo = estate_type_base_repo.RealEstateRatesRepository(database)
+        self.type_repo = database.get_repository(estate_type_base_repo.RealEstateTypeRepository)
+        self.estate_tax_repo = database.get_repository(RealEstateTaxesRepository)
+        self.real_estate_rates_repo = database.get_repository(estate_type_base_repo.RealEstateRatesRepository)
     
     def get_all_ids(self):
         query = f"SELECT {self.columns[0]} FROM {self.table_name}"
         return self.db.execute_query(query)
     
-    def get_all_record_by_year(self, year):
-        query = """
+    def get_records_by_year_query(self, condition=""):
+        """Запит рядків таблиці за рік. condition - додаткова умова WHERE для вибору окремих рядків."""
+        return f"""
         SELECT 
             real_estate.id, 
             users.id AS user_id,
@@ -49,8 +53,21 @@ class RealEstateRepository(BaseRepository):
         LEFT JOIN real_estate_type_rates 
             ON real_estate_type_rates.real_estate_type_id = real_estate.real_estate_type_id
             AND real_estate_type_rates.tax_year = ?
+        {condition}
         """
-        return self.db.execute_query(query, (year,year))
+    
+    def get_all_record_by_year(self, year):
+        return self.db.execute_query(self.get_records_by_year_query(), (year,year))
+    
+    def get_records_by_ids_and_year(self, record_ids, year):
+        """Рядки таблиці за рік лише для вказаних id - для оновлення окремих рядків без перезавантаження таблиці."""
+        query = self.get_records_by_year_query(f"WHERE real_estate.id IN ({', '.join(['?' for _ in record_ids])})")
+        return self.db.execute_query(query, (year, year, *record_ids))
+    
+    def get_records_by_user_and_year(self, user_id, year):
+        """Рядки таблиці за рік для всіх записів власника."""
+        query = self.get_records_by_year_query("WHERE users.id = ?")
+        return self.db.execute_query(query, (year, year, user_id))
     
     def get_all_ids_by_type_id(self, type_id):
         query = f"""
@@ -86,24 +103,45 @@ class RealEstateRepository(BaseRepository):
         return result[0] if result else None
     
     def calculate_tax(self, year, area:float, type_id):
-        salary = SalaryRepository(self.db).get_record_by_id(year)
-        if not salary:
-            raise Exception("Неможливо розрахувати податок - немає інформації про зарпалату!")
-        salary = int(salary[1])
+        salary = self.db.get_repository(SalaryRepository).get_salary(year)
+        if salary is None:
+            raise Exception(self.NO_SALARY_ERROR)
         
-        type_rate = self.real_estate_rates_repo.get_by_year_and_typeid(year, type_id)
+        type_rate = self.real_estate_rates_repo.get_cached_by_year_and_typeid(year, type_id)
         if type_rate is None:
-            raise Exception("Неможливо розрахувати податок - немає інформації про ставку податку!")
-        area_limit = float(type_rate[3])
-        tax_percent = float(type_rate[4]) # %
-        
-        area_taxable = float(area) - area_limit
+            raise Exception(self.NO_RATE_ERROR)
+        return self.compute_tax(salary, area, type_rate[3], type_rate[4])
+    
+    @staticmethod
+    def compute_tax(salary:int, area:float, area_limit:float, tax_percent:float):
+        """Податок = мін. зарплата * ставка(%) * площа понад ліміт"""
+        area_taxable = float(area) - float(area_limit)
         area_taxable = area_taxable if area_taxable > 0 else 0.0
         
-        tax_rate = tax_percent / 100
+        tax_rate = float(tax_percent) / 100
         tax = round(salary * tax_rate * area_taxable, 2)
         return tax
     
+    def get_tax_inputs_by_year(self, year, type_id=None):
+        """Повертає (id, площа, ліміт площі, ставка) для всіх записів (або лише одного типу) одним запитом."""
+        # умова за типом додається лише для одного типу, щоб запит знаходив записи за індексом idx_real_estate_type_id
+        condition, params = "", (year,)
+        if type_id is not None:
+            condition, params = f"WHERE {self.table_name}.real_estate_type_id = ?", (year, type_id)
+        query = f"""
+        SELECT 
+            {self.table_name}.id,
+            {self.table_name}.area,
+            real_estate_type_rates.tax_area_limit,
+            real_estate_type_rates.tax_rate
+        FROM {self.table_name}
+        LEFT JOIN real_estate_type_rates 
+            ON real_estate_type_rates.real_estate_type_id = {self.table_name}.real_estate_type_id
+            AND real_estate_type_rates.tax_year = ?
+        {condition}
+        """
+        return self.db.execute_query(query, params)
+    
     def add_record(self, year, estate_name, address, 
         area, paid, sum_paid, owner_id, estate_type_name, notes):
         area = float(area)
@@ -111,11 +149,13 @@ class RealEstateRepository(BaseRepository):
         if type_record is None:
             raise Exception("Помилка. Не знайдено такий тип нерухомості!")
         type_id = type_record[0]
-        new_estate_id = super().add_record((estate_name, address, area, notes, owner_id, type_id))
+        with self.db.transaction():
+            new_estate_id = super().add_record((estate_name, address, area, notes, owner_id, type_id))
         
-        tax = self.calculate_tax(year, area, type_id)
-        paid = 1 if paid == "Так" or tax == 0 else 0
-        self.estate_tax_repo.add_record((new_estate_id, year, tax, paid, sum_paid))
+            tax = self.calculate_tax(year, area, type_id)
+            paid = 1 if paid == "Так" or tax == 0 else 0
+            self.estate_tax_repo.add_record((new_estate_id, year, tax, paid, sum_paid))
+        return new_estate_id
         
     def update_record(self, estate_id, year, estate_name, address, 
         area, paid, sum_paid, owner_id, estate_type_name, notes):
@@ -124,35 +164,45 @@ class RealEstateRepository(BaseRepository):
         if type_record is None:
             raise Exception("Помилка. Не знайдено такий тип нерухомості!")
         type_id = type_record[0]
-        super().update_record(estate_id, (estate_name, address, area, notes, owner_id, type_id))
+        with self.db.transaction():
+            super().update_record(estate_id, (estate_name, address, area, notes, owner_id, type_id))
         
-        tax = self.calculate_tax(year, area, type_id)
-        paid = 1 if paid == "Так" or tax == 0 else 0
-        if self.estate_tax_repo.get_by_id_and_year(estate_id, year):
-            self.estate_tax_repo.update_record(estate_id, year, (tax, paid, sum_paid))
-        else:
-            self.estate_tax_repo.add_record((estate_id, year, tax, paid, sum_paid))
+            tax = self.calculate_tax(year, area, type_id)
+            paid = 1 if paid == "Так" or tax == 0 else 0
+            if self.estate_tax_repo.get_by_id_and_year(estate_id, year):
+                self.estate_tax_repo.update_record(estate_id, year, (tax, paid, sum_paid))
+            else:
+                self.estate_tax_repo.add_record((estate_id, year, tax, paid, sum_paid))
+        return estate_id
 
-    def update_all_tax(self, year, type_id=None):
-        if type_id is None:
-            estate_results = self.get_all_ids()
-        else:
-            estate_results = self.get_all_ids_by_type_id(type_id)
-            
-        if not estate_results:
-            raise SilentCloseExeption("Не знайдено записи для оновлення!")
+    def update_all_tax(self, year, type_id=None, progress=None, is_cancelled=None):
+        """
+        Перераховує податки всіх записів (або лише одного типу) за рік.
+        Ставки і зарплата читаються одним запитом, запис - пакетними upsert частинами в одній транзакції.
+
+        :param progress: Функція progress(percent), яка викликається після кожної записаної частини
+        :param is_cancelled: Функція, яка повертає True, якщо перерахунок потрібно скасувати (зміни відкочуються)
+        """
+        with self.db.transaction():
+            estate_results = self.get_tax_inputs_by_year(year, type_id)
+            if not estate_results:
+                raise SilentCloseExeption("Не знайдено записи для оновлення!")
+        
+            salary = self.db.get_repository(SalaryRepository).get_salary(year)
+        
+            row_errors = {}
+            taxes = []
+            for estate_id, area, area_limit, tax_percent in estate_results:
+                if salary is None:
+                    row_errors.setdefault(self.NO_SALARY_ERROR, []).append(estate_id)
+                elif tax_percent is None:
+                    row_errors.setdefault(self.NO_RATE_ERROR, []).append(estate_id)
+                else:
+                    taxes.append((estate_id, year, self.compute_tax(salary, area, area_limit, tax_percent)))
         
-        unique_exeptions = set()
-        i=0
-        for estate in estate_results:
-            try:
-                self.update_tax(estate[0], year)
-            except Exception as e:
-                unique_exeptions.add(str(e))
-                i+=1
+            run_in_chunks(taxes, self.estate_tax_repo.upsert_taxes, progress, is_cancelled)
         
-        if unique_exeptions:
-            raise Exception(f"для ({i}) рядків. Перелік унікальних помилок:\n" + "\n".join(unique_exeptions))
+        raise_row_errors(row_errors)
     
     def update_tax(self, estate_id, year):
         estate_record = self.get_area_and_typeid_by_id(estate_id)
@@ -168,41 +218,8 @@ class RealEstateRepository(BaseRepository):
             paid, sum_paid = 0, 0
             self.estate_tax_repo.add_record((estate_id, year, new_tax, paid, sum_paid))
 
-class RealEstateTaxesRepository(BaseRepository):
+class RealEstateTaxesRepository(TaxesRepository):
     def __init__(self, database):
         super().__init__(database)
         self.table_name = "real_estate_taxes"
         self.columns = self.get_table_columns()
-        
-    def get_by_id_and_year(self, record_id, year):
-        query = f"""
-        SELECT * FROM {self.table_name}
-        WHERE {self.columns[0]} = ? AND {self.columns[1]} = ?
-        """
-        result = self.db.execute_query(query, (record_id, year))
-        return result[0] if result else None
-    
-    def add_record(self, values):
-        """Додавання нового запису в таблицю."""
-        query = f"""
-        INSERT INTO {self.table_name} ({', '.join(self.columns)})
-        VALUES ({', '.join(['?' for _ in values])})
-        """
-        return self.db.execute_non_query(query, values)
-    
-    def update_record(self, record_id, year, values):
-        query = f"""
-        UPDATE {self.table_name} 
-        SET {', '.join([f"{column} = ?" for column in self.columns[2:]])}
-        WHERE {self.columns[0]} = ? AND {self.columns[1]} = ?
-        """
-        self.db.execute_non_query(query, tuple(values) + (record_id, year))
-    
-    def update_tax(self, record_id, year, tax):
-        query = f"""
-        UPDATE {self.table_name} 
-        SET {self.columns[2]} = ?
-        WHERE {self.columns[0]} = ? AND {self.columns[1]} = ?
-        """
-        self.db.execute_non_query(query, (tax, record_id, year))
-    
\ No newline at end of file
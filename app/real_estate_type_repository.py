@@ -8,10 +8,10 @@ class RealEstateTypeBaseRepository(BaseRepository):
     def __init__(self, database):
         super().__init__(database)
         self.db = database
-        self.rates_repo = RealEstateRatesRepository(database)
+        self.rates_repo = database.get_repository(RealEstateRatesRepository)
         self.table_name_rates = self.rates_repo.table_name
         
-        self.type_repo = RealEstateTypeRepository(database)
+        self.type_repo = database.get_repository(RealEstateTypeRepository)
         self.table_name_type = self.type_repo.table_name
         
     def get_type_rates(self, year:int):
@@ -29,16 +29,17 @@ class RealEstateTypeBaseRepository(BaseRepository):
 
     def add_record(self, tax_year, type_name, tax_rate, tax_area_limit):
         # Додати інформацію і тип нерухомості, якщо його не існує
-        type_record = self.type_repo.get_by_name(type_name) # id, name
-        if not type_record:
-            self.type_repo.add_record((type_name,))
+        with self.db.transaction():
+            type_record = self.type_repo.get_by_name(type_name) # id, name
+            if not type_record:
+                self.type_repo.add_record((type_name,))
         
-        type_record = self.type_repo.get_by_name(type_name) # id, name        
-        rate_record = self.rates_repo.get_by_year_and_typeid(tax_year, type_record[0])
-        if not rate_record:
-            self.rates_repo.add_record((tax_year, type_record[0], tax_area_limit, tax_rate))
-        else:
-            raise Exception("Такий запис вже існує!")
+            type_record = self.type_repo.get_by_name(type_name) # id, name        
+            rate_record = self.rates_repo.get_by_year_and_typeid(tax_year, type_record[0])
+            if not rate_record:
+                self.rates_repo.add_record((tax_year, type_record[0], tax_area_limit, tax_rate))
+            else:
+                raise Exception("Такий запис вже існує!")
 
     def update_record(self, id, tax_year, type_name, tax_rate, tax_area_limit):
         # Оновити інформацію для типу нерухомості
@@ -71,7 +72,7 @@ class RealEstateTypeBaseRepository(BaseRepository):
         if records: # якщо існують записи з інших років для цьго типу (ставки, ліміти площі) - видаляти  не можна
             raise DeleteExeption("Неможливо видалити тип нерухомості, оскільки для нього існує ставки та ліміти площі за інші роки! Для повного видалення типу - спершу видаліть всю інформацію зв'язану з цим типом.")
         
-        records = estate_repo.RealEstateRepository(self.db).get_first_record_by_type_id(type_id)
+        records = self.db.get_repository(estate_repo.RealEstateRepository).get_first_record_by_type_id(type_id)
         if records: # якщо нерухомість прив'язана до цьго типу - видаляти  не можна
             raise DeleteExeption("Неможливо видалити тип нерухомості, оскільки існують записи про нерухоме майно які вкористовують цей тип! Для повного видалення типу - спершу видаліть або оновіть всю інформацію зв'язану з цим типом.")
         
@@ -93,6 +94,13 @@ class RealEstateTypeRepository(BaseRepository):
         result = self.db.execute_query(query, (name,))
         return result[0] if result else None
 
+    def get_ids_by_name(self):
+        """Словник назва -> id для всіх типів одним запитом (для однакових назв - найменший id, як у get_by_name)."""
+        ids = {}
+        for type_id, name in self.db.execute_query(f"SELECT id, name FROM {self.table_name} ORDER BY id"):
+            ids.setdefault(name, type_id)
+        return ids
+
 
 class RealEstateRatesRepository(BaseRepository):
     def __init__(self, database):
@@ -105,6 +113,18 @@ class RealEstateRatesRepository(BaseRepository):
         result = self.db.execute_query(query, (year, type_id))
         return result[0] if result else None
     
+    def get_rates_by_year(self, year):
+        """Словник id типу -> (ліміт площі, ставка) за рік одним запитом."""
+        query = f"SELECT real_estate_type_id, tax_area_limit, tax_rate FROM {self.table_name} WHERE tax_year = ?"
+        return {type_id: (area_limit, tax_rate) for type_id, area_limit, tax_rate in self.db.execute_query(query, (year,))}
+    
+    def get_cached_by_year_and_typeid(self, year, type_id):
+        """Те саме, що get_by_year_and_typeid, але кешується до зміни таблиці ставок."""
+        return self.db.get_cached(self.table_name, (year, type_id), lambda: self.get_by_year_and_typeid(year, type_id))
+    
+    def on_table_changed(self):
+        self.db.invalidate_cache(self.table_name)
+    
     def get_typeid_by_id(self, id):
         query = f"SELECT real_estate_type_id FROM {self.table_name} WHERE id = ?"
         result = self.db.execute_query(query, (id,))
@@ -7,17 +7,29 @@ class SalaryRepository(BaseRepository):
         self.table_name = "general_info"
         self.columns = self.get_table_columns()
     
-    def add_record(self, values):
-        """Додавання нового запису в таблицю."""
-        query = f"""
+    def get_salary(self, year):
+        """Мінімальна зарплата за рік (int) або None. Кешується до зміни таблиці."""
+        def load():
+            record = self.get_record_by_id(year)
+            return int(record[1]) if record else None
+        return self.db.get_cached(self.table_name, year, load)
+    
+    def build_statements(self):
+        statements = super().build_statements()
+        # рік - це ключ, який задається під час додавання
+        statements["insert"] = f"""
         INSERT INTO {self.table_name} ({', '.join(self.columns)})
-        VALUES (?, ?)
+        VALUES ({', '.join(['?' for _ in self.columns])})
         """
-        self.db.execute_non_query(query, values)
+        return statements
+    
+    def on_table_changed(self):
+        self.db.invalidate_cache(self.table_name)
     
     def add_update_record(self, record_id, value):
         """Додавання або оновлення існуючого запису в таблиці."""
-        if self.get_record_by_id(record_id):
-            self.update_record(record_id, (value,))
-        else:
-            self.add_record((record_id, value))
\ No newline at end of file
+        with self.db.transaction():
+            if self.get_record_by_id(record_id):
+                self.update_record(record_id, (value,))
+            else:
+                self.add_record((record_id, value))
@@ -0,0 +1,78 @@
+from app.database import Database
+from app.export import ExportSheet
+from app.importer import ImportSheet
+from app.user_repository import UserRepository
+from app.real_estate_repository import RealEstateRepository
+from app.land_parcel_repository import LandParcelRepository
+
+# Поля записів: назва колонки в таблиці (і в експорті) та підказка поля введення.
+# Спільні для інтерфейсу, експорту та імпорту, тому експорт з командного рядка не імпортує PyQt.
+USER_FIELDS = [
+    ("last_name", "Прізвище", "Введіть прізвище*"),
+    ("name", "Ім'я", "Введіть ім'я*"),
+    ("middle_name", "По батькові", "Введіть по батькові*"),
+    ("rnokpp", "РНОКПП", "Введіть РНОКПП*"),
+    ("address", "Адреса", "Введіть адресу*"),
+    ("email", "Email", "Введіть email"),
+    ("phone", "Телефон", "Введіть телефон")
+]
+USER_TABLE_COLUMNS = ["Id"] + [item[1] for item in USER_FIELDS]
+
+REAL_ESTATE_FIELDS = {
+    "name": ("Назва нерухомості", "Введіть назву*"),
+    "address": ("Адреса нерухомості", "Введіть адресу*"),
+    "area": ("Площа\nм^2", "Введіть площу*"),
+    "area_tax": ("Площа\nподатку", "Площа податку"),
+    "tax": ("Податок\n(грн)", "Податок"),
+    "paid": ("Сплачено", "Сплачено"),
+    "sum_paid": ("Сплата\nподатку", "Сплачена сума"),
+    "owner": ("Власник нерухомості", "Виберіть власника*"),
+    "type": ("Тип\nнерухомості", "Виберіть тип*"),
+    "notes": ("Нотатки", "Ваші нотатки"),
+}
+REAL_ESTATE_TABLE_COLUMNS = ["id", "person_id"] + [value[0] for value in REAL_ESTATE_FIELDS.values()]
+
+LAND_PARCEL_FIELDS = {
+    # ("name", "Назва земельної ділянки", "Введіть назву*"),
+    "address": ("Урочище, Адреса\nземельної ділянки", "Введіть адресу*"),
+    "area": ("Площа (га)", "Введіть площу*"),
+    "privileged": ("Пільговик", ""),
+    "normative_monetary_value": ("Нормативно\nгрошова оцінка", "Введіть грошову оцінку*"),
+    "tax": ("Податок\n(грн)", ""),
+    "paid": ("Сплачено", ""),
+    "sum_paid": ("Сплата\nподатку", "Сплачена сума"),
+    "owner": ("Власник ділянки", "Виберіть власника*"),
+    "type": ("Тип ділянки", "Виберіть тип*"),
+    "notes": ("Нотатки", "Ваші нотатки"),
+}
+LAND_PARCEL_TABLE_COLUMNS = ["id", "person_id"] + [value[0] for value in LAND_PARCEL_FIELDS.values()]
+
+
+def get_export_sheets(db: Database, year: int):
+    """
+    Таблиці експорту: люди, нерухомість і земельні ділянки за рік (без службових id).
+    Назви колонок ті самі, що в таблицях інтерфейсу, тому експорт з вікна і з командного рядка однаковий.
+    """
+    user_repo = db.get_repository(UserRepository)
+    estate_repo = db.get_repository(RealEstateRepository)
+    land_repo = db.get_repository(LandParcelRepository)
+    return [
+        ExportSheet("Люди", "users", USER_TABLE_COLUMNS,
+                    f"SELECT * FROM {user_repo.table_name}", skip_columns=1),
+        ExportSheet("Нерухомість", "real_estate", REAL_ESTATE_TABLE_COLUMNS,
+                    estate_repo.get_records_by_year_query(), (year, year), skip_columns=2),
+        ExportSheet("Земельні ділянки", "land_parcel", LAND_PARCEL_TABLE_COLUMNS,
+                    land_repo.get_records_by_year_query(), (year, year, year), skip_columns=2),
+    ]
+
+
+def get_import_sheets():
+    """
+    Таблиці імпорту у форматі експорту: ті самі аркуші, файли і порядок колонок.
+    Люди імпортуються першими, щоб нерухомість і ділянки могли посилатись на них як на власників.
+    """
+    return [
+        ImportSheet("Люди", "users", [item[0] for item in USER_FIELDS]),
+        ImportSheet("Нерухомість", "real_estate", list(REAL_ESTATE_FIELDS)),
+        ImportSheet("Земельні ділянки", "land_parcel", list(LAND_PARCEL_FIELDS)),
+    ]
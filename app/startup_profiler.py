@@ -0,0 +1,74 @@
+import builtins, os, sys, time
+from datetime import datetime
+
+PROFILE_ENV_VAR = "IS_PODATKY_PROFILE_STARTUP"
+PROFILE_FILE_NAME = "startup_profile.txt"
+
+
+class StartupProfiler:
+    def __init__(self):
+        """
+        Профіль запуску програми: час імпорту кожного модуля і тривалість етапів ініціалізації.
+        Імпорти вимірюються через заміну builtins.__import__ до виклику finish().
+        Час імпорту модуля включає вкладені імпорти (як "cumulative" у python -X importtime).
+        """
+        self.start_time = time.perf_counter()
+        self.stage_start = self.start_time
+        self.stages = []  # (назва, тривалість, час від запуску)
+        self.imports = []  # (глибина вкладеності, модуль, тривалість) у порядку завершення імпорту
+        self.depth = 0
+        self.original_import = None
+
+    def install(self):
+        """Починає вимірювати імпорти нових модулів."""
+        self.original_import = builtins.__import__
+        original_import = self.original_import
+
+        def timed_import(name, globals=None, locals=None, fromlist=(), level=0):
+            if level or name in sys.modules:
+                return original_import(name, globals, locals, fromlist, level)
+            depth = self.depth
+            self.depth += 1
+            start = time.perf_counter()
+            try:
+                return original_import(name, globals, locals, fromlist, level)
+            finally:
+                self.depth = depth
+                self.imports.append((depth, name, time.perf_counter() - start))
+
+        builtins.__import__ = timed_import
+
+    def mark(self, stage: str):
+        """Завершує етап запуску: тривалість рахується від попереднього mark()."""
+        now = time.perf_counter()
+        self.stages.append((stage, now - self.stage_start, now - self.start_time))
+        self.stage_start = now
+
+    def finish(self, data_folder: str):
+        """Припиняє вимірювання і записує профіль у файл в папці даних. Повертає шлях до файлу."""
+        if self.original_import is not None:
+            builtins.__import__ = self.original_import
+            self.original_import = None
+
+        lines = [f"Профіль запуску {datetime.now():%Y-%m-%d %H:%M:%S}", "", "Етапи (мс, від запуску мс):"]
+        for stage, duration, elapsed in self.stages:
+            lines.append(f"{duration * 1000:10.1f} {elapsed * 1000:10.1f}  {stage}")
+
+        lines += ["", "Імпорти верхнього рівня за тривалістю (мс):"]
+        top_level = sorted((item for item in self.imports if item[0] == 0), key=lambda item: -item[2])
+        for _, name, duration in top_level:
+            lines.append(f"{duration * 1000:10.1f}  {name}")
+
+        lines += ["", "Всі імпорти в порядку завершення (мс, вкладеність відступом):"]
+        for depth, name, duration in self.imports:
+            lines.append(f"{duration * 1000:10.1f}  {'  ' * depth}{name}")
+
+        path = os.path.join(data_folder, PROFILE_FILE_NAME)
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write("\n".join(lines) + "\n")
+        return path
+
+
+def is_profiling_enabled(argv) -> bool:
+    """Режим профілю запуску: аргумент --profile-startup або змінна середовища IS_PODATKY_PROFILE_STARTUP=1."""
+    return "--profile-startup" in argv or os.environ.get(PROFILE_ENV_VAR) == "1"
@@ -0,0 +1,242 @@
+import os, re, html, itertools, multiprocessing
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from app.base_repository import OperationCancelled
+
+STATEMENT_FORMATS = ["html", "txt"]
+STATEMENT_BATCH_SIZE = 200  # власників в одній задачі процесу
+
+
+class StatementsCancelled(OperationCancelled):
+    """Формування повідомлень скасовано користувачем."""
+    pass
+
+
+def get_statement_file_name(owner, year, file_format):
+    """Файл повідомлення: <РНОКПП>_<рік>.<формат> (символи, недопустимі в назві файлу, замінюються на _)."""
+    code = re.sub(r"[^\w-]", "_", str(owner["rnokpp"]))
+    return f"{code}_{year}.{file_format}"
+
+
+def format_money(value):
+    return f"{value:,.2f}".replace(",", " ")
+
+
+def format_tax(tax):
+    return "не нараховано" if tax is None else format_money(tax)
+
+
+def get_debt(item):
+    if item["tax"] is None or item["paid"] == 1:
+        return 0
+    return max(item["tax"] - item["sum_paid"], 0)
+
+
+def render_text(owner, year):
+    lines = [
+        f"Податкове повідомлення за {year} рік",
+        "",
+        f"Платник: {owner['full_name']}",
+        f"РНОКПП: {owner['rnokpp']}",
+        f"Адреса: {owner['address']}",
+    ]
+    for kind, title in (("estate", "Нерухомість"), ("land", "Земельні ділянки")):
+        items = [item for item in owner["items"] if item["kind"] == kind]
+        if not items:
+            continue
+        lines += ["", f"{title}:"]
+        for item in items:
+            lines.append(f"  - {item['description']}")
+            lines.append(f"    Податок: {format_tax(item['tax'])}; сплачено: {format_money(item['sum_paid'])}; "
+                         f"борг: {format_money(get_debt(item))}")
+    lines += [
+        "",
+        f"Разом нараховано: {format_money(owner['tax'])}",
+        f"Разом сплачено: {format_money(owner['sum_paid'])}",
+        f"До сплати: {format_money(owner['debt'])}",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def render_html(owner, year):
+    escape = html.escape
+    rows = []
+    for item in owner["items"]:
+        kind = "Нерухомість" if item["kind"] == "estate" else "Земельна ділянка"
+        rows.append(
+            f"<tr><td>{kind}</td><td>{escape(item['description'])}</td>"
+            f"<td class=\"num\">{format_tax(item['tax'])}</td><td class=\"num\">{format_money(item['sum_paid'])}</td>"
+            f"<td class=\"num\">{format_money(get_debt(item))}</td></tr>"
+        )
+    return f"""<!DOCTYPE html>
+<html lang="uk">
+<head>
+<meta charset="utf-8">
+<title>Податкове повідомлення {escape(str(owner['rnokpp']))} за {year} рік</title>
+<style>
+body {{ font-family: Arial, sans-serif; margin: 2em; }}
+table {{ border-collapse: collapse; width: 100%; }}
+th, td {{ border: 1px solid #999; padding: 4px 8px; text-align: left; }}
+.num {{ text-align: right; white-space: nowrap; }}
+</style>
+</head>
+<body>
+<h1>Податкове повідомлення за {year} рік</h1>
+<p>Платник: {escape(owner['full_name'])}<br>
+РНОКПП: {escape(str(owner['rnokpp']))}<br>
+Адреса: {escape(owner['address'])}</p>
+<table>
+<tr><th>Об'єкт</th><th>Опис</th><th>Податок</th><th>Сплачено</th><th>Борг</th></tr>
+{chr(10).join(rows)}
+<tr><th colspan="2">Разом</th><th class="num">{format_money(owner['tax'])}</th>
+<th class="num">{format_money(owner['sum_paid'])}</th><th class="num">{format_money(owner['debt'])}</th></tr>
+</table>
+</body>
+</html>
+"""
+
+
+RENDERERS = {"html": render_html, "txt": render_text}
+
+
+def write_statements(owners, year, file_format, output_folder):
+    """
+    Записує повідомлення частини власників. Виконується в процесі пулу, тому отримує
+    лише прості дані (словники), а не з'єднання з базою даних. Повертає кількість файлів.
+    """
+    render = RENDERERS[file_format]
+    for owner in owners:
+        path = os.path.join(output_folder, get_statement_file_name(owner, year, file_format))
+        with open(path, 'w', encoding='utf-8') as file:
+            file.write(render(owner, year))
+    return len(owners)
+
+
+class StatementGenerator:
+    def __init__(self, db, year: int, output_folder: str, file_format: str = "html",
+                 workers: int = None, batch_size: int = STATEMENT_BATCH_SIZE):
+        """
+        Податкові повідомлення для всіх власників нерухомості і земельних ділянок за рік - файл на власника.
+        Власники з об'єктами і податками читаються одним запитом, впорядкованим за власником,
+        і частинами передаються в пул процесів, який формує і записує файли.
+
+        :param db: База даних (Database)
+        :param year: Рік податків
+        :param output_folder: Папка для файлів (створюється, якщо її немає)
+        :param file_format: "html" або "txt"
+        :param workers: Кількість процесів (None - за кількістю ядер)
+        :param batch_size: Кількість власників в одній задачі процесу
+        """
+        if file_format not in STATEMENT_FORMATS:
+            raise Exception(f"Невідомий формат повідомлень: {file_format}")
+        self.db = db
+        self.year = year
+        self.output_folder = output_folder
+        self.file_format = file_format
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+
+    def get_items_query(self):
+        """
+        Об'єкти всіх власників з податком за рік, впорядковані за власником:
+        (id власника, ПІБ, РНОКПП, адреса, вид, id об'єкта, опис, податок, сплачено, сплачено повністю).
+        """
+        owner_columns = """
+            users.id,
+            users.last_name || ' ' || users.name || ' ' || users.middle_name,
+            users.rnokpp,
+            users.address"""
+        return f"""
+        SELECT {owner_columns},
+            'estate',
+            real_estate.id,
+            real_estate.name || ', ' || real_estate_type.name || ', ' || real_estate.address
+                || ', ' || real_estate.area || ' м²',
+            taxes.tax,
+            COALESCE(taxes.sum_paid, 0),
+            COALESCE(taxes.paid, 0)
+        FROM users
+        INNER JOIN real_estate ON real_estate.user_id = users.id
+        INNER JOIN real_estate_type ON real_estate_type.id = real_estate.real_estate_type_id
+        LEFT JOIN real_estate_taxes AS taxes
+            ON taxes.real_estate_id = real_estate.id AND taxes.tax_year = ?
+        UNION ALL
+        SELECT {owner_columns},
+            'land',
+            land_parcel.id,
+            land_parcel_type.name || ', ' || land_parcel.address || ', ' || land_parcel.area || ' га'
+                || COALESCE(', НГО ' || nmv.value, ''),
+            taxes.tax,
+            COALESCE(taxes.sum_paid, 0),
+            COALESCE(taxes.paid, 0)
+        FROM users
+        INNER JOIN land_parcel ON land_parcel.user_id = users.id
+        INNER JOIN land_parcel_type ON land_parcel_type.id = land_parcel.land_parcel_type_id
+        LEFT JOIN normative_monetary_values AS nmv
+            ON nmv.land_id = land_parcel.id AND nmv.year = ?
+        LEFT JOIN land_parcel_taxes AS taxes
+            ON taxes.land_parcel_id = land_parcel.id AND taxes.tax_year = ?
+        ORDER BY 1, 5, 6
+        """
+
+    @staticmethod
+    def group_owners(rows):
+        """Групує впорядковані рядки запиту в словники власників з об'єктами і сумами."""
+        for owner_id, owner_rows in itertools.groupby(rows, key=lambda row: row[0]):
+            owner = None
+            for row in owner_rows:
+                if owner is None:
+                    owner = {"id": owner_id, "full_name": row[1], "rnokpp": row[2], "address": row[3],
+                             "items": [], "tax": 0, "sum_paid": 0, "debt": 0}
+                item = {"kind": row[4], "id": row[5], "description": row[6],
+                        "tax": row[7], "sum_paid": row[8], "paid": row[9]}
+                owner["items"].append(item)
+                owner["tax"] += item["tax"] or 0
+                owner["sum_paid"] += item["sum_paid"]
+                owner["debt"] += get_debt(item)
+            yield owner
+
+    def generate(self, progress=None, is_cancelled=None):
+        """
+        Формує повідомлення. Поки процеси записують файли, наступні власники вже читаються з бази;
+        в обробці одночасно не більше двох частин на процес, тому пам'ять не росте з кількістю власників.
+
+        :param progress: Функція progress(percent), яка викликається після кожної записаної частини
+        :param is_cancelled: Функція, яка повертає True, якщо потрібно перервати роботу (StatementsCancelled)
+        :return: Кількість записаних повідомлень
+        """
+        os.makedirs(self.output_folder, exist_ok=True)
+        written = 0
+        # spawn: процес пулу не успадковує потоки і стан Qt батьківського процесу
+        with self.db.reader() as connection, ProcessPoolExecutor(
+                max_workers=self.workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+            connection.execute("BEGIN")  # власники і їхні об'єкти читаються з одного знімка бази даних
+            try:
+                total = connection.execute(
+                    "SELECT COUNT(DISTINCT user_id) FROM "
+                    "(SELECT user_id FROM real_estate UNION ALL SELECT user_id FROM land_parcel)"
+                ).fetchone()[0]
+                rows = connection.execute(self.get_items_query(), (self.year, self.year, self.year))
+                owners = self.group_owners(rows)
+                pending = set()
+                while True:
+                    batch = list(itertools.islice(owners, self.batch_size))
+                    if batch:
+                        pending.add(pool.submit(write_statements, batch, self.year, self.file_format,
+                                                self.output_folder))
+                    if pending and (not batch or len(pending) >= self.workers * 2):
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in done:
+                            written += future.result()
+                        if progress and total:
+                            progress(int(written * 100 / total))
+                    if is_cancelled and is_cancelled():
+                        pool.shutdown(cancel_futures=True)
+                        raise StatementsCancelled()
+                    if not batch and not pending:
+                        break
+            finally:
+                connection.rollback()
+
+        if progress:
+            progress(100)
+        return written
@@ -0,0 +1,110 @@
+from app.database import Database
+
+
+class YearSummaryRepository:
+    DEBTORS_LIMIT = 20
+    CACHE_NAMESPACE = "year_summary"
+
+    def __init__(self, database: Database):
+        """
+        Підсумки податків за рік: по типах нерухомості і земельних ділянок та найбільші боржники.
+        Рахуються агрегатними запитами в базі даних (один GROUP BY на таблицю) і зберігаються в кеші запитів
+        бази даних для року, доки не зміниться позначка стану даних (Database.get_change_marker) - тобто до першого запису.
+        """
+        self.db = database
+
+    @staticmethod
+    def get_totals_query(objects_table, type_table, type_column, taxes_table, taxes_column):
+        """
+        Підсумки за типами: (id типу, тип, об'єктів, з нарахованим податком, нараховано,
+        сплачено, кількість сплачених, борг). Борг - несплачена частина податку записів, не позначених сплаченими.
+        Податки групуються за типом при проході індексом типу - без сортування всіх рядків року.
+        """
+        return f"""
+        SELECT
+            {type_table}.id,
+            {type_table}.name,
+            COALESCE(objects.count, 0),
+            COALESCE(taxes.count, 0),
+            COALESCE(taxes.tax, 0),
+            COALESCE(taxes.sum_paid, 0),
+            COALESCE(taxes.paid, 0),
+            COALESCE(taxes.debt, 0)
+        FROM {type_table}
+        LEFT JOIN (
+            SELECT {type_column} AS type_id, COUNT(*) AS count
+            FROM {objects_table}
+            GROUP BY {type_column}
+        ) AS objects ON objects.type_id = {type_table}.id
+        LEFT JOIN (
+            SELECT
+                {objects_table}.{type_column} AS type_id,
+                COUNT(*) AS count,
+                SUM({taxes_table}.tax) AS tax,
+                SUM({taxes_table}.sum_paid) AS sum_paid,
+                SUM({taxes_table}.paid) AS paid,
+                SUM(CASE WHEN {taxes_table}.paid = 1 THEN 0
+                    ELSE MAX({taxes_table}.tax - {taxes_table}.sum_paid, 0) END) AS debt
+            FROM {objects_table}
+            INNER JOIN {taxes_table}
+                ON {taxes_table}.{taxes_column} = {objects_table}.id
+                AND {taxes_table}.tax_year = ?
+            GROUP BY {objects_table}.{type_column}
+        ) AS taxes ON taxes.type_id = {type_table}.id
+        WHERE objects.count IS NOT NULL
+        ORDER BY {type_table}.name
+        """
+
+    def get_debtors_query(self):
+        """Власники з найбільшим боргом за нерухомість і земельні ділянки разом: (id, ПІБ і код, борг)."""
+        debt = "CASE WHEN taxes.paid = 1 THEN 0 ELSE MAX(taxes.tax - taxes.sum_paid, 0) END"
+        return f"""
+        SELECT
+            users.id,
+            users.last_name || ' ' || users.name || ' ' || users.middle_name || ' ' || users.rnokpp,
+            SUM(debts.debt) AS total_debt
+        FROM (
+            SELECT real_estate.user_id, {debt} AS debt
+            FROM real_estate_taxes AS taxes
+            INNER JOIN real_estate ON real_estate.id = taxes.real_estate_id
+            WHERE taxes.tax_year = ?
+            UNION ALL
+            SELECT land_parcel.user_id, {debt} AS debt
+            FROM land_parcel_taxes AS taxes
+            INNER JOIN land_parcel ON land_parcel.id = taxes.land_parcel_id
+            WHERE taxes.tax_year = ?
+        ) AS debts
+        INNER JOIN users ON users.id = debts.user_id
+        GROUP BY users.id
+        HAVING total_debt > 0
+        ORDER BY total_debt DESC
+        LIMIT {self.DEBTORS_LIMIT}
+        """
+
+    def load_summary(self, year) -> dict:
+        estate_query = self.get_totals_query("real_estate", "real_estate_type", "real_estate_type_id",
+                                             "real_estate_taxes", "real_estate_id")
+        land_query = self.get_totals_query("land_parcel", "land_parcel_type", "land_parcel_type_id",
+                                           "land_parcel_taxes", "land_parcel_id")
+        # всі запити - з одного знімка бази даних
+        with self.db.reader() as connection:
+            connection.execute("BEGIN")
+            try:
+                return {
+                    "real_estate": connection.execute(estate_query, (year,)).fetchall(),
+                    "land_parcel": connection.execute(land_query, (year,)).fetchall(),
+                    "debtors": connection.execute(self.get_debtors_query(), (year, year)).fetchall(),
+                }
+            finally:
+                connection.rollback()
+
+    def get_summary(self, year) -> dict:
+        """
+        Підсумки за рік: {"real_estate": [...], "land_parcel": [...], "debtors": [...]}
+        (рядки описані в get_totals_query і get_debtors_query).
+        """
+        # позначка береться до читання: якщо дані зміняться під час читання, наступний виклик перерахує підсумки
+        marker = self.db.get_change_marker(blocking=False)
+        if marker is None:  # зараз іде запис - підсумки читаються без кешу, не чекаючи на його завершення
+            return self.load_summary(year)
+        return self.db.get_cached(self.CACHE_NAMESPACE, year, lambda: self.load_summary(year), marker)
@@ -1,6 +1,10 @@
 from app.database import Database
 from app.base_repository import BaseRepository
 
+OWNER_SEARCH_LIMIT = 50
+OWNER_SEARCH_CANDIDATES = 1000  # скільки збігів індексу сортується за алфавітом (для коротких запитів)
+FULL_NAME_SQL = "users.last_name || ' ' || users.name || ' ' || users.middle_name || ' ' || users.rnokpp"
+
 class UserRepository(BaseRepository):
     def __init__(self, database: Database):
         super().__init__(database)
@@ -8,14 +12,53 @@ class UserRepository(BaseRepository):
         self.columns = self.get_table_columns()
         
     def get_id_and_full_name(self):
-        query = """
+        query = f"""
         SELECT
             users.id,
-            users.last_name || ' ' || users.name || ' ' || users.middle_name || ' ' || users.rnokpp AS fullname
+            {FULL_NAME_SQL} AS fullname
         FROM users
         """
         return self.db.execute_query(query)
+
+    def get_full_name(self, user_id):
+        query = f"SELECT {FULL_NAME_SQL} FROM users WHERE users.id = ?"
+        result = self.db.execute_query(query, (user_id,))
+        return result[0][0] if result else None
+
+    def search_id_and_full_name(self, text: str, limit: int = OWNER_SEARCH_LIMIT):
+        """
+        Пошук власників за початком слів ПІБ або РНОКПП: [(id, ПІБ і код)], не більше limit, за алфавітом.
+        Кожне введене слово має бути початком прізвища, імені, по батькові або коду (у будь-якому порядку).
+        Регістр не враховується: повнотекстовий індекс users_search (міграція 3) і текст запиту
+        зводяться до одного регістру токенізатором unicode61, тому "коваль" і "КОВАЛЬ" знаходять "Коваль".
+        За алфавітом сортуються не всі збіги, а перші OWNER_SEARCH_CANDIDATES з індексу, щоб короткий запит
+        (одна літера - десятки тисяч збігів) не сортував усю таблицю. Точні збіги слів ("Коваль" серед
+        тисяч "Ковальчук...") беруться окремо, тому вони не губляться серед збігів за префіксом.
+        """
+        words = ['"' + word.replace('"', '""') + '"' for word in text.split()]
+        if not words:
+            return []
+        # кожне слово - окрема фраза; лапки всередині слова подвоюються
+        exact_match = " AND ".join(words)
+        prefix_match = " AND ".join(word + "*" for word in words)
+        query = f"""
+        SELECT users.id, {FULL_NAME_SQL} AS fullname
+        FROM (
+            SELECT rowid FROM (SELECT rowid FROM users_search WHERE users_search MATCH ?1 LIMIT ?3)
+            UNION
+            SELECT rowid FROM (SELECT rowid FROM users_search WHERE users_search MATCH ?2 LIMIT ?3)
+        ) AS matches
+        INNER JOIN users ON users.id = matches.rowid
+        ORDER BY fullname
+        LIMIT ?4
+        """
+        return self.db.execute_query(query, (exact_match, prefix_match, OWNER_SEARCH_CANDIDATES, limit))
     
+    def get_ids_by_code(self):
+        """Словник РНОКПП -> id для всіх людей одним запитом (для перевірки власників під час імпорту)."""
+        query = f"SELECT rnokpp, {self.columns[0]} FROM {self.table_name}"
+        return dict(self.db.execute_query(query))
+
     def get_record_by_code(self, code):
         query = f"""
         SELECT * FROM {self.table_name}
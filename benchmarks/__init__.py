@@ -0,0 +1,2 @@
+# Вимірювання продуктивності на синтетичних даних.
+# Запуск з кореня репозиторію: python -m benchmarks.<назва> [параметри]
@@ -0,0 +1,96 @@
+"""
+Експорт людей, нерухомості і земельних ділянок за рік: час і пікова пам'ять (RSS) для кожного формату.
+Кожен формат вимірюється в окремому процесі на одній і тій самій базі даних.
+З --fetchall для порівняння вимірюється xlsx з усіма рядками в пам'яті (fetchall і звичайна книга openpyxl),
+як експорт працював до потокового Exporter.
+
+    python -m benchmarks.export --rows 100000 --formats xlsx csv columnar
+"""
+import argparse, os, shutil, tempfile, time
+from app.export import Exporter, get_export_writer
+from benchmarks.synthetic import (
+    SQL_FILE, YEAR, create_database, fill_database, get_rss_mb, get_peak_rss_mb, print_table, print_result,
+    run_measurement
+)
+
+FETCHALL = "xlsx (fetchall)"
+
+
+def export_with_fetchall(db, sheets, output_path):
+    from openpyxl import Workbook
+    workbook = Workbook()
+    workbook.remove(workbook.active)
+    count = 0
+    with db.reader() as connection:
+        for sheet in sheets:
+            rows = connection.execute(sheet.query, sheet.params).fetchall()
+            worksheet = workbook.create_sheet(sheet.name)
+            worksheet.append(sheet.get_headers())
+            for row in rows:
+                worksheet.append(row[sheet.skip_columns:])
+            count += len(rows)
+    workbook.save(output_path)
+    return count
+
+
+def measure(folder: str, file_format: str) -> dict:
+    """Експорт існуючої бази даних з папки folder у поточному процесі."""
+    from app.database import Database
+    from app.sheets import get_export_sheets
+
+    db = Database(folder, SQL_FILE)
+    sheets = get_export_sheets(db, YEAR)
+    output_folder = tempfile.mkdtemp(prefix="is_podatky_export_")
+    output_path = os.path.join(output_folder, "export.xlsx" if file_format.startswith("xlsx") else "export")
+    rss_before = get_rss_mb()
+    start = time.perf_counter()
+    if file_format == FETCHALL:
+        count = export_with_fetchall(db, sheets, output_path)
+    else:
+        count = Exporter(db, sheets).export(get_export_writer(file_format, output_path))
+    export_time = time.perf_counter() - start
+    peak = get_peak_rss_mb()
+    size = sum(os.path.getsize(os.path.join(root, name))
+               for root, _, names in os.walk(output_folder) for name in names)
+    db.close()
+    shutil.rmtree(output_folder, ignore_errors=True)
+    return {
+        "rows": count,
+        "time": export_time,
+        "peak_delta": None if rss_before is None or peak is None else peak - rss_before,
+        "size": size / 1024 / 1024,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="кількість записів нерухомості і земельних ділянок")
+    parser.add_argument("--formats", nargs="+", default=["xlsx", "csv", "columnar"], help="формати експорту")
+    parser.add_argument("--fetchall", action="store_true", help="також виміряти xlsx з fetchall")
+    parser.add_argument("--single", help=argparse.SUPPRESS)  # папка бази даних для вимірювання в дочірньому процесі
+    parser.add_argument("--format", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print_result(measure(args.single, args.format))
+        return
+
+    db = fill_database(create_database(), users=max(args.rows // 10, 1), real_estate=args.rows,
+                       land_parcels=args.rows, taxes=True)
+    folder = os.path.dirname(db.db_path)
+    db.close()
+    formats = args.formats + ([FETCHALL] if args.fetchall else [])
+    rows = []
+    try:
+        for file_format in formats:
+            result = run_measurement("benchmarks.export", "--single", folder, "--format", file_format)
+            rows.append([file_format, result["rows"], result["time"], result["peak_delta"], result["size"]])
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    print(f"Експорт за {YEAR} рік: {args.rows} записів нерухомості і земельних ділянок")
+    print_table(["формат", "рядків", "час, с", "+пік RSS, МБ", "розмір, МБ"], rows)
+
+
+if __name__ == "__main__":
+    main()
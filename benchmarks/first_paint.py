@@ -0,0 +1,106 @@
+"""
+Час до першого показу головного вікна (перша подія Paint) і час до готовності (дані таблиці завантажені)
+на заповненій базі даних. Кожен вимір - в окремому процесі.
+Режим "обидві сторінки одразу" для порівняння створює обидві сторінки таблиць у конструкторі вікна
+і завантажує дані синхронно - як до лінивого створення сторінок і фонового завантаження.
+
+    python -m benchmarks.first_paint --rows 100000
+"""
+import argparse, os, shutil, sys, time
+from benchmarks.synthetic import SQL_FILE, create_database, fill_database, print_table, print_result, run_measurement
+
+MODES = ["ліниві сторінки", "обидві сторінки одразу"]
+TIMEOUT = 600  # с, найдовше очікування готовності вікна
+
+
+def measure(folder: str, mode: str) -> dict:
+    """Запуск головного вікна на існуючій базі даних з папки folder у поточному процесі."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtCore import QObject, QEvent
+    from PyQt6.QtWidgets import QApplication
+    from app.database import Database
+    from ui.filterable_table_view import FilterableTableWidget
+    from ui.main_window_ui import MainWindow
+
+    class EagerMainWindow(MainWindow):
+        """Обидві сторінки створюються в конструкторі вікна."""
+        def init_ui(self):
+            super().init_ui()
+            self.get_page(1)
+
+    def load_rows_sync(table, runner, name, function):
+        table.set_rows(function(runner.db))
+
+    if mode == MODES[1]:
+        FilterableTableWidget.load_rows = load_rows_sync
+        window_class = EagerMainWindow
+    else:
+        window_class = MainWindow
+
+    class PaintWatcher(QObject):
+        """Запам'ятовує час першої події Paint будь-якого віджета."""
+        first_paint = None
+
+        def eventFilter(self, watched, event):
+            if self.first_paint is None and event.type() == QEvent.Type.Paint:
+                self.first_paint = time.perf_counter()
+            return False
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    watcher = PaintWatcher()
+    app.installEventFilter(watcher)
+    db = Database(folder, SQL_FILE)
+
+    start = time.perf_counter()
+    window = window_class(db)
+    window.show()
+    deadline = start + TIMEOUT
+    while watcher.first_paint is None and time.perf_counter() < deadline:
+        app.processEvents()
+    first_paint = watcher.first_paint
+    page = window.stacked_layout.currentWidget()
+    while (window.task_runner.jobs or page.table.is_loading()) and time.perf_counter() < deadline:
+        app.processEvents()
+        time.sleep(0.001)
+    interactive = time.perf_counter()
+    rows = page.table.model.rowCount()
+
+    app.removeEventFilter(watcher)
+    window.close()
+    db.close()
+    return {
+        "first_paint": None if first_paint is None else first_paint - start,
+        "interactive": interactive - start,
+        "rows": rows,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="кількість записів нерухомості і земельних ділянок")
+    parser.add_argument("--single", help=argparse.SUPPRESS)  # папка бази даних для вимірювання в дочірньому процесі
+    parser.add_argument("--mode", choices=MODES, default=MODES[0], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print_result(measure(args.single, args.mode))
+        return
+
+    db = fill_database(create_database(), users=max(args.rows // 10, 1), real_estate=args.rows,
+                       land_parcels=args.rows, taxes=True)
+    folder = os.path.dirname(db.db_path)
+    db.close()
+    rows = []
+    try:
+        for mode in MODES:
+            result = run_measurement("benchmarks.first_paint", "--single", folder, "--mode", mode)
+            rows.append([mode, result["first_paint"], result["interactive"], result["rows"]])
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    print(f"Показ головного вікна: {args.rows} записів нерухомості і земельних ділянок")
+    print_table(["сторінки", "перший показ, с", "готовність, с", "рядків у таблиці"], rows)
+
+
+if __name__ == "__main__":
+    main()
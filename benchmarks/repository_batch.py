@@ -0,0 +1,66 @@
+"""
+Додавання і оновлення записів нерухомості через репозиторій: по одному запису (add_record/update_record)
+і пакетно (add_records/update_records через executemany). Усі варіанти виконуються в одній transaction(),
+тому різниця - лише у викликах запитів. "SQL щоразу" для порівняння будує текст запитів при кожному виклику,
+як до появи BaseRepository.statements.
+
+    python -m benchmarks.repository_batch --rows 100000
+"""
+import argparse
+from app.base_repository import BaseRepository
+from app.real_estate_repository import RealEstateRepository
+from benchmarks.synthetic import create_database, remove_database, fill_database, timer, print_table
+
+
+def add_per_row(repository, records, rebuild_sql=False):
+    for values in records:
+        if rebuild_sql:
+            repository._statements = None
+        BaseRepository.add_record(repository, values)
+
+
+def update_per_row(repository, records, rebuild_sql=False):
+    for record_id, values in records:
+        if rebuild_sql:
+            repository._statements = None
+        BaseRepository.update_record(repository, record_id, values)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000, help="кількість записів")
+    args = parser.parse_args()
+
+    db = fill_database(create_database(), users=1000)
+    repository = db.get_repository(RealEstateRepository)
+    new_records = [(f"Об'єкт {index}", "вул. Садова", 50.0 + index % 200, None, 1 + index % 1000, 1 + index % 3)
+                   for index in range(args.rows)]
+
+    variants = [
+        ("по одному, SQL щоразу", lambda records: add_per_row(repository, records, rebuild_sql=True),
+         lambda records: update_per_row(repository, records, rebuild_sql=True)),
+        ("по одному", lambda records: add_per_row(repository, records),
+         lambda records: update_per_row(repository, records)),
+        ("пакетно (executemany)", repository.add_records, repository.update_records),
+    ]
+    rows = []
+    for name, add, update in variants:
+        with db.transaction():
+            db.connection.execute("DELETE FROM real_estate")
+        times = {}
+        with timer(times, "insert"), db.transaction():
+            add(new_records)
+        record_ids = [record_id for (record_id,) in repository.get_all_ids()]
+        changed = [(record_id, values[:2] + (values[2] + 1,) + values[3:])
+                   for record_id, values in zip(record_ids, new_records)]
+        with timer(times, "update"), db.transaction():
+            update(changed)
+        rows.append([name, args.rows, times["insert"], times["update"]])
+    remove_database(db)
+
+    print(f"Запис нерухомості через репозиторій, {args.rows} записів")
+    print_table(["спосіб", "записів", "додавання, с", "оновлення, с"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Запуск програми на заповненій базі даних: підключення, створення головного вікна, повторні відкриття
+списку осіб і кількість запитів схеми таблиць (SELECT * FROM t WHERE 1=0). Кожен вимір - в окремому процесі.
+Режим "без реєстру" для порівняння створює новий репозиторій і заново читає схему при кожному
+get_repository - як до появи спільних репозиторіїв бази даних.
+
+    python -m benchmarks.startup --rows 10000
+"""
+import argparse, os, shutil, sys, time
+from benchmarks.synthetic import SQL_FILE, create_database, fill_database, print_table, print_result, run_measurement
+
+MODES = ["реєстр", "без реєстру"]
+DIALOG_OPENS = 5  # скільки разів відкривається список осіб після запуску
+
+
+def wait_for_jobs(app, window):
+    """Обробляє події, поки не завершаться фонові задачі вікна (завантаження таблиці)."""
+    while window.task_runner.jobs:
+        app.processEvents()
+        time.sleep(0.001)
+
+
+def measure(folder: str, mode: str) -> dict:
+    """Запуск головного вікна на існуючій базі даних з папки folder у поточному процесі."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    start = time.perf_counter()
+    from PyQt6.QtWidgets import QApplication
+    from app.database import Database
+    from ui.main_window_ui import MainWindow
+    import_time = time.perf_counter() - start
+
+    probes = []
+
+    class TracedDatabase(Database):
+        """Рахує запити схеми таблиць на всіх з'єднаннях."""
+        def trace(self, statement):
+            if "WHERE 1=0" in statement:
+                probes.append(statement)
+
+        def connect(self):
+            super().connect()
+            self.connection.set_trace_callback(self.trace)
+
+        def create_reader(self):
+            connection = super().create_reader()
+            connection.set_trace_callback(self.trace)
+            return connection
+
+        def get_repository(self, repository_class):
+            if mode == "без реєстру":
+                self._table_columns = {}
+                return repository_class(self)
+            return super().get_repository(repository_class)
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    start = time.perf_counter()
+    db = TracedDatabase(folder, SQL_FILE)
+    connect_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    window = MainWindow(db)
+    window.show()
+    window_time = time.perf_counter() - start
+
+    wait_for_jobs(app, window)
+    startup_probes = len(probes)
+
+    from ui.add_person_ui import AddPersonDialog  # імпорт не входить у час відкриття діалогу
+    start = time.perf_counter()
+    for _ in range(DIALOG_OPENS):
+        window.open_add_person_dialog()
+        window.person_dialog.close()
+    dialogs_time = time.perf_counter() - start
+
+    window.close()
+    db.close()
+    return {
+        "import_time": import_time,
+        "connect_time": connect_time,
+        "window_time": window_time,
+        "probes": startup_probes,
+        "dialogs_time": dialogs_time,
+        "dialog_probes": len(probes) - startup_probes,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="кількість записів нерухомості і земельних ділянок")
+    parser.add_argument("--single", help=argparse.SUPPRESS)  # папка бази даних для вимірювання в дочірньому процесі
+    parser.add_argument("--mode", choices=MODES, default=MODES[0], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print_result(measure(args.single, args.mode))
+        return
+
+    db = fill_database(create_database(), users=max(args.rows // 10, 1), real_estate=args.rows,
+                       land_parcels=args.rows, taxes=True)
+    folder = os.path.dirname(db.db_path)
+    db.close()
+    rows = []
+    try:
+        for mode in MODES:
+            result = run_measurement("benchmarks.startup", "--single", folder, "--mode", mode)
+            rows.append([mode, result["import_time"], result["connect_time"], result["window_time"], result["probes"],
+                         result["dialogs_time"], result["dialog_probes"]])
+    finally:
+        shutil.rmtree(folder, ignore_errors=True)
+
+    print(f"Запуск програми: {args.rows} записів нерухомості і земельних ділянок")
+    print_table(["репозиторії", "імпорт, с", "база даних, с", "головне вікно, с", "запитів схеми",
+                 f"{DIALOG_OPENS} відкриттів діалогу, с", "запитів схеми"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,144 @@
+import os, sys, json, random, shutil, subprocess, tempfile, time
+from contextlib import contextmanager
+from app.database import Database
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SQL_FILE = os.path.join(ROOT_PATH, "db", "db.sql")
+YEAR = 2024
+MIN_SALARY = 7100
+TYPE_COUNT = 3
+RESULT_PREFIX = "RESULT "
+
+
+def create_database(folder: str = None) -> Database:
+    """Нова порожня база даних зі схемою db/db.sql і всіма міграціями (у тимчасовій папці, якщо не задано)."""
+    return Database(folder or tempfile.mkdtemp(prefix="is_podatky_bench_"), SQL_FILE)
+
+
+def remove_database(db: Database):
+    """Закриває з'єднання і видаляє папку бази даних, створеної create_database."""
+    db.close()
+    shutil.rmtree(os.path.dirname(db.db_path), ignore_errors=True)
+
+
+def fill_database(db: Database, users: int = 1000, real_estate: int = 0, land_parcels: int = 0,
+                  year: int = YEAR, taxes: bool = False, seed: int = 1):
+    """
+    Заповнює базу синтетичними даними: мінімальна зарплата і ставки за рік, типи, власники,
+    нерухомість і земельні ділянки (з НГО за рік і попередній рік), за потреби - податки.
+    Записи додаються напряму через з'єднання для запису пакетами executemany.
+    """
+    rng = random.Random(seed)
+    connection = db.connection
+    with db.transaction():
+        connection.execute("INSERT OR REPLACE INTO general_info VALUES (?, ?)", (year, MIN_SALARY))
+        for type_id in range(1, TYPE_COUNT + 1):
+            connection.execute("INSERT INTO real_estate_type(name) VALUES (?)", (f"Тип нерухомості {type_id}",))
+            connection.execute("INSERT INTO land_parcel_type(name) VALUES (?)", (f"Тип ділянки {type_id}",))
+            connection.execute(
+                "INSERT INTO real_estate_type_rates(tax_year, real_estate_type_id, tax_area_limit, tax_rate) "
+                "VALUES (?, ?, ?, ?)", (year, type_id, 60 * type_id, 0.5 * type_id))
+            connection.execute(
+                "INSERT INTO land_parcel_type_rates(tax_year, land_parcel_type_id, tax_rate) VALUES (?, ?, ?)",
+                (year, type_id, type_id))
+        connection.executemany(
+            "INSERT INTO users(last_name, name, middle_name, rnokpp, address, email, phone) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            ((f"Прізвище{user}", f"Ім'я{user % 97}", f"По-батькові{user % 89}", str(1000000000 + user),
+              f"вул. Центральна, {user}", None, None) for user in range(1, users + 1)))
+        connection.executemany(
+            "INSERT INTO real_estate(name, address, area, notes, user_id, real_estate_type_id) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            ((f"Об'єкт {index}", f"вул. Садова, {index}", round(rng.uniform(10, 300), 2), None,
+              rng.randint(1, users), rng.randint(1, TYPE_COUNT)) for index in range(real_estate)))
+        connection.executemany(
+            "INSERT INTO land_parcel(user_id, land_parcel_type_id, address, area, privileged, notes) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            ((rng.randint(1, users), rng.randint(1, TYPE_COUNT), f"ділянка {index}",
+              round(rng.uniform(0.01, 3), 4), rng.randint(0, 1), None) for index in range(land_parcels)))
+        connection.executemany(
+            "INSERT INTO normative_monetary_values VALUES (?, ?, ?)",
+            ((land_id, nmv_year, round(rng.uniform(1000, 90000), 2))
+             for land_id in range(1, land_parcels + 1) for nmv_year in (year - 1, year)))
+        if taxes:
+            connection.executemany(
+                "INSERT INTO real_estate_taxes VALUES (?, ?, ?, ?, ?)",
+                ((estate_id, year, round(rng.uniform(0, 5000), 2), 0, 0) for estate_id in range(1, real_estate + 1)))
+            connection.executemany(
+                "INSERT INTO land_parcel_taxes VALUES (?, ?, ?, ?, ?)",
+                ((land_id, year, round(rng.uniform(0, 5000), 2), 0, 0) for land_id in range(1, land_parcels + 1)))
+    return db
+
+
+@contextmanager
+def timer(results: dict, name: str):
+    """Записує в results[name] час виконання блоку в секундах."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        results[name] = time.perf_counter() - start
+
+
+@contextmanager
+def count_commits(db: Database, counter: dict):
+    """Рахує коміти і транзакції з'єднання для запису (через trace callback sqlite3) на час блоку."""
+    def trace(statement):
+        statement = statement.lstrip().upper()
+        if statement.startswith("COMMIT"):
+            counter["commits"] = counter.get("commits", 0) + 1
+        elif statement.startswith("BEGIN"):
+            counter["transactions"] = counter.get("transactions", 0) + 1
+    db.connection.set_trace_callback(trace)
+    try:
+        yield counter
+    finally:
+        db.connection.set_trace_callback(None)
+
+
+def get_rss_mb():
+    """Поточний обсяг резидентної пам'яті процесу (МБ) або None, якщо /proc недоступний (не Linux)."""
+    try:
+        with open("/proc/self/statm") as file:
+            resident_pages = int(file.read().split()[1])
+    except OSError:
+        return None
+    return resident_pages * os.sysconf("SC_PAGE_SIZE") / 1024 / 1024
+
+
+def get_peak_rss_mb():
+    """Найбільший обсяг резидентної пам'яті процесу (МБ) з моменту запуску або None (модуль resource є лише в Unix)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux повертає КБ, macOS - байти
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def print_table(header, rows):
+    """Друкує результати вирівняною таблицею."""
+    rows = [[f"{value:.3f}" if isinstance(value, float) else "н/д" if value is None else str(value)
+             for value in row] for row in rows]
+    widths = [max(len(str(cell)) for cell in column) for column in zip(header, *rows)]
+    for row in [header] + rows:
+        print("  ".join(str(cell).rjust(width) for cell, width in zip(row, widths)))
+
+
+def print_result(result: dict):
+    """Передає результат вимірювання з дочірнього процесу (див. run_measurement)."""
+    print(RESULT_PREFIX + json.dumps(result))
+
+
+def run_measurement(module: str, *args) -> dict:
+    """
+    Запускає вимірювання в окремому процесі (python -m module args), щоб пам'ять і кеші попередніх
+    вимірювань не впливали на результат. Процес має надрукувати результат через print_result.
+    """
+    output = subprocess.run(
+        [sys.executable, "-m", module, *map(str, args)],
+        cwd=ROOT_PATH, capture_output=True, text=True, check=True,
+    ).stdout
+    line = next(line for line in output.splitlines() if line.startswith(RESULT_PREFIX))
+    return json.loads(line[len(RESULT_PREFIX):])
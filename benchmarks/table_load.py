@@ -0,0 +1,85 @@
+"""
+Завантаження рядків земельних ділянок у таблицю FilterableTableWidget: час і пам'ять (RSS)
+для 10k/100k/500k рядків. Кожен розмір вимірюється в окремому процесі, щоб пам'ять попереднього не заважала.
+З --standard-items для порівняння вимірюється QStandardItemModel з елементом на кожну клітинку
+(як таблиця працювала до RecordTableModel).
+
+    python -m benchmarks.table_load --sizes 10000 100000 500000
+"""
+import argparse, os, sys, time
+from benchmarks.synthetic import (
+    YEAR, create_database, remove_database, fill_database, get_rss_mb, print_table, print_result, run_measurement
+)
+
+
+def load_with_standard_items(column_names, rows):
+    from PyQt6.QtGui import QStandardItemModel, QStandardItem
+    model = QStandardItemModel()
+    model.setHorizontalHeaderLabels(column_names)
+    for row in rows:
+        model.appendRow([QStandardItem(str(value)) for value in row])
+    return model
+
+
+def measure(rows_count: int, standard_items: bool) -> dict:
+    """Вимірювання для одного розміру в поточному процесі."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    from PyQt6.QtWidgets import QApplication
+    from app.land_parcel_repository import LandParcelRepository
+    from ui.filterable_table_view import FilterableTableWidget
+    from app.sheets import LAND_PARCEL_TABLE_COLUMNS
+
+    app = QApplication.instance() or QApplication(sys.argv)
+    db = fill_database(create_database(), users=max(rows_count // 10, 1), land_parcels=rows_count)
+    widget = FilterableTableWidget(LAND_PARCEL_TABLE_COLUMNS, [0, 1], lambda index: None, [3, 5, 6, 8])
+    widget.show()
+    app.processEvents()
+
+    start = time.perf_counter()
+    rows = db.get_repository(LandParcelRepository).get_all_record_by_year(YEAR)
+    query_time = time.perf_counter() - start
+    remove_database(db)
+    rss_before = get_rss_mb()
+
+    start = time.perf_counter()
+    if standard_items:
+        model = load_with_standard_items(LAND_PARCEL_TABLE_COLUMNS, rows)
+        widget.table.setModel(model)
+    else:
+        widget.set_rows(rows)
+    app.processEvents()  # перше відображення таблиці з новими даними
+    load_time = time.perf_counter() - start
+    rss_after = get_rss_mb()
+    return {
+        "query_time": query_time,
+        "load_time": load_time,
+        "rss_delta": None if rss_before is None else rss_after - rss_before,
+        "rss": rss_after,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 500000], help="кількість рядків")
+    parser.add_argument("--standard-items", action="store_true", help="також виміряти QStandardItemModel")
+    parser.add_argument("--single", type=int, help=argparse.SUPPRESS)  # вимірювання одного розміру в дочірньому процесі
+    parser.add_argument("--mode", choices=["model", "standard-items"], default="model", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.single:
+        print_result(measure(args.single, args.mode == "standard-items"))
+        return
+
+    modes = ["model", "standard-items"] if args.standard_items else ["model"]
+    rows = []
+    for size in args.sizes:
+        for mode in modes:
+            result = run_measurement("benchmarks.table_load", "--single", size, "--mode", mode)
+            rows.append([mode, size, result["query_time"], result["load_time"], result["rss_delta"], result["rss"]])
+
+    print("Завантаження таблиці земельних ділянок")
+    print_table(["модель", "рядків", "запит, с", "завантаження, с", "+RSS, МБ", "RSS, МБ"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+"""
+Перерахунок податків нерухомості за рік: пакетний update_all_tax проти перерахунку по одному запису
+(update_tax для кожного id - окремі запити і окремий коміт на запис).
+
+    python -m benchmarks.tax_recalculation --rows 10000
+"""
+import argparse
+from app.real_estate_repository import RealEstateRepository
+from benchmarks.synthetic import YEAR, create_database, remove_database, fill_database, timer, count_commits, print_table
+
+
+def recalculate_per_row(repository: RealEstateRepository, year: int):
+    for (estate_id,) in repository.get_all_ids():
+        repository.update_tax(estate_id, year)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="кількість записів нерухомості")
+    args = parser.parse_args()
+
+    db = fill_database(create_database(), users=max(args.rows // 10, 1), real_estate=args.rows)
+    repository = db.get_repository(RealEstateRepository)
+    times, rows = {}, []
+    for name, run in (("по одному", lambda: recalculate_per_row(repository, YEAR)),
+                      ("пакетно", lambda: repository.update_all_tax(YEAR))):
+        # перший прохід створює податки, другий - оновлює існуючі
+        for stage in ("створення", "оновлення"):
+            if stage == "створення":
+                with db.transaction():
+                    db.connection.execute("DELETE FROM real_estate_taxes")
+            with count_commits(db, {}) as counter, timer(times, name):
+                run()
+            rows.append([name, stage, args.rows, times[name], counter.get("commits", 0)])
+    remove_database(db)
+
+    print(f"Перерахунок податків нерухомості, {args.rows} записів")
+    print_table(["спосіб", "етап", "записів", "час, с", "комітів"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Кількість комітів і час масових операцій: в одній transaction() проти окремого коміту на кожен запис
+(як до появи Database.transaction(), коли кожен execute_* комітив сам).
+
+    python -m benchmarks.transactions --rows 10000
+"""
+import argparse
+from app.land_parcel_repository import LandParcelRepository, NormativeMonetaryValuesRepository
+from app.real_estate_repository import RealEstateRepository
+from app.salary_repository import SalaryRepository
+from benchmarks.synthetic import (
+    YEAR, create_database, remove_database, fill_database, timer, count_commits, print_table
+)
+
+
+def update_estate_taxes_per_row(repository: RealEstateRepository, year: int):
+    """Ті самі податки, що й update_all_tax, але кожен записується окремим комітом."""
+    salary = repository.db.get_repository(SalaryRepository).get_salary(year)
+    for estate_id, area, area_limit, tax_percent in repository.get_tax_inputs_by_year(year):
+        tax = repository.compute_tax(salary, area, area_limit, tax_percent)
+        repository.estate_tax_repo.upsert_taxes([(estate_id, year, tax)])
+
+
+def update_land_taxes_per_row(repository: LandParcelRepository, year: int):
+    for land_id, area, privileged, normative_monetary_value, tax_percent in repository.get_tax_inputs_by_year(year):
+        tax = 0 if privileged else repository.compute_tax(area, int(normative_monetary_value), tax_percent)
+        repository.land_tax_repo.upsert_taxes([(land_id, year, tax)])
+
+
+def copy_values_per_row(repository: NormativeMonetaryValuesRepository, land_ids, year: int):
+    """Копіювання НГО з попереднього року окремим запитом і комітом на кожну ділянку."""
+    for land_id in land_ids:
+        if repository.get_by_id_and_year(land_id, year):
+            continue
+        value = repository.get_latest_value_by_id_and_year(land_id, year)
+        if value is not None:
+            repository.add_record((land_id, year, value))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=10000, help="кількість записів нерухомості і земельних ділянок")
+    args = parser.parse_args()
+
+    db = fill_database(create_database(), users=max(args.rows // 10, 1), real_estate=args.rows, land_parcels=args.rows)
+    estate_repo = db.get_repository(RealEstateRepository)
+    land_repo = db.get_repository(LandParcelRepository)
+    nmv_repo = db.get_repository(NormativeMonetaryValuesRepository)
+    land_ids = [land_id for (land_id,) in land_repo.get_all_ids()]
+    next_year = YEAR + 1  # НГО є за YEAR - 1 і YEAR, тож за наступний рік значення копіюються для всіх ділянок
+
+    operations = [
+        ("update_all_tax (нерухомість)", "DELETE FROM real_estate_taxes",
+         lambda: update_estate_taxes_per_row(estate_repo, YEAR),
+         lambda: estate_repo.update_all_tax(YEAR)),
+        ("update_all_tax (ділянки)", "DELETE FROM land_parcel_taxes",
+         lambda: update_land_taxes_per_row(land_repo, YEAR),
+         lambda: land_repo.update_all_tax(YEAR)),
+        ("copy_values_from_last_year", f"DELETE FROM normative_monetary_values WHERE year = {next_year}",
+         lambda: copy_values_per_row(nmv_repo, land_ids, next_year),
+         lambda: nmv_repo.copy_values_from_last_year(next_year)),
+    ]
+    rows = []
+    for name, reset_query, per_row, batched in operations:
+        for mode, run in (("окремі коміти", per_row), ("transaction()", batched)):
+            with db.transaction():
+                db.connection.execute(reset_query)
+            times = {}
+            with count_commits(db, {}) as counter, timer(times, mode):
+                run()
+            rows.append([name, mode, args.rows, times[mode], counter.get("commits", 0)])
+    remove_database(db)
+
+    print(f"Масові операції, {args.rows} записів кожного виду")
+    print_table(["операція", "спосіб", "записів", "час, с", "комітів"], rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,7 @@
-import sys, os
+import sys, os, argparse, multiprocessing
 from pathlib import Path
-from app.database import Database
-from ui.main_window_ui import MainWindow
-from PyQt6.QtWidgets import QApplication
-from PyQt6.QtGui import QIcon
+from datetime import datetime
+from app.startup_profiler import StartupProfiler, is_profiling_enabled
 
 def resource_path(relative_path):
     try:
@@ -13,19 +11,119 @@ def resource_path(relative_path):
 
     return os.path.join(base_path, relative_path)
 
+def parse_args():
+    from app.export import EXPORT_FORMATS
+    from app.statements import STATEMENT_FORMATS
+
+    parser = argparse.ArgumentParser(description="База оподаткування")
+    parser.add_argument("--export", choices=EXPORT_FORMATS,
+                        help="Експорт даних без запуску інтерфейсу (columnar - parquet, якщо встановлено pyarrow, інакше npz)")
+    parser.add_argument("--year", type=int, default=datetime.now().year, help="Рік для експорту")
+    parser.add_argument("--output", help="Файл (xlsx) або папка (інші формати) для експорту")
+    parser.add_argument("--statements", metavar="FOLDER",
+                        help="Сформувати податкові повідомлення власників за рік у папку без запуску інтерфейсу")
+    parser.add_argument("--statement-format", choices=STATEMENT_FORMATS, default="html", help="Формат повідомлень")
+    parser.add_argument("--workers", type=int, help="Кількість процесів для формування повідомлень")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Записати час імпорту модулів і етапів запуску в startup_profile.txt у папці даних")
+    args, _ = parser.parse_known_args()  # решту аргументів обробляє Qt
+    return args
+
+def run_export(db, file_format, year, output):
+    """Експорт з командного рядка, без створення вікна програми."""
+    from app.export import Exporter, get_export_writer
+    from app.sheets import get_export_sheets
+
+    if not output:
+        output = f"exported_data_{year}.xlsx" if file_format == "xlsx" else f"exported_data_{year}"
+    try:
+        writer = get_export_writer(file_format, output)
+        count = Exporter(db, get_export_sheets(db, year)).export(writer)
+    except Exception as e:
+        print(f"Не вдалося експортувати дані: {e}")
+        return 1
+    print(f"Експортовано {count} рядків: {writer.output_path}")
+    return 0
+
+def run_statements(db, year, output_folder, file_format, workers):
+    """Податкові повідомлення з командного рядка, без створення вікна програми."""
+    from app.statements import StatementGenerator
+
+    try:
+        count = StatementGenerator(db, year, output_folder, file_format, workers).generate()
+    except Exception as e:
+        print(f"Не вдалося сформувати повідомлення: {e}")
+        return 1
+    print(f"Сформовано {count} повідомлень: {output_folder}")
+    return 0
+
+def finish_startup_profile(profiler: StartupProfiler, window, data_folder):
+    """Записує профіль запуску, коли вікно показане і початкові дані таблиці завантажені."""
+    from PyQt6.QtCore import QTimer
+    shown = False
+
+    def on_shown():
+        nonlocal shown
+        shown = True
+        profiler.mark("Перший показ вікна")
+        on_jobs_changed()
+
+    def on_jobs_changed():
+        if not shown or window.task_runner.jobs:
+            return
+        window.task_runner.jobs_changed.disconnect(on_jobs_changed)
+        profiler.mark("Завантаження даних таблиці")
+        print(f"Профіль запуску записано: {profiler.finish(data_folder)}")
+
+    window.task_runner.jobs_changed.connect(on_jobs_changed)
+    QTimer.singleShot(0, on_shown)
+
 if __name__ == "__main__":
+    multiprocessing.freeze_support()  # процеси пулу для повідомлень у зібраній програмі (PyInstaller)
+    # модулі імпортуються тут, щоб у режимі профілю їх імпорт теж був виміряний
+    profiler = None
+    if is_profiling_enabled(sys.argv):
+        profiler = StartupProfiler()
+        profiler.install()
+    from app.database import Database
+
     sql_file = resource_path("db/db.sql")
     data_folder_name = ".IS_podatky_data"
     app_data_path = os.path.join(Path.home(), data_folder_name)
     if not os.path.exists(app_data_path):
         os.makedirs(app_data_path)
 
+    args = parse_args()
+    if args.export:
+        db = Database(app_data_path, sql_file)
+        exit_code = run_export(db, args.export, args.year, args.output)
+        db.close()
+        sys.exit(exit_code)
+    if args.statements:
+        db = Database(app_data_path, sql_file)
+        exit_code = run_statements(db, args.year, args.statements, args.statement_format, args.workers)
+        db.close()
+        sys.exit(exit_code)
+
+    from ui.main_window_ui import MainWindow
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtGui import QIcon
+    if profiler:
+        profiler.mark("Імпорт модулів")
+
     app = QApplication(sys.argv)
     app.setWindowIcon(QIcon(resource_path('Icon.ico')))
+    if profiler:
+        profiler.mark("Створення QApplication")
     
     db = Database(app_data_path, sql_file)
+    if profiler:
+        profiler.mark("Підключення до бази даних")
     
     window = MainWindow(db)
     window.show()
+    if profiler:
+        profiler.mark("Створення головного вікна")
+        finish_startup_profile(profiler, window, app_data_path)
 
     sys.exit(app.exec())
@@ -0,0 +1,32 @@
+import os, sys
+import pytest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT_PATH not in sys.path:
+    sys.path.insert(0, ROOT_PATH)
+
+from benchmarks.synthetic import SQL_FILE, fill_database
+from app.database import Database
+
+
+@pytest.fixture
+def db(tmp_path):
+    """Нова база даних зі схемою db/db.sql і всіма міграціями."""
+    database = Database(str(tmp_path), SQL_FILE)
+    yield database
+    database.close()
+
+
+@pytest.fixture
+def filled_db(db):
+    """База даних із синтетичними власниками, нерухомістю, ділянками, НГО і податками."""
+    return fill_database(db, users=200, real_estate=500, land_parcels=500, taxes=True)
+
+
+@pytest.fixture(scope="session")
+def qapp():
+    """QApplication для тестів віджетів і моделей (Qt без екрана, offscreen)."""
+    from PyQt6.QtWidgets import QApplication
+    return QApplication.instance() or QApplication([])
@@ -0,0 +1,237 @@
+"""
+Одночасна робота кількох потоків з Database: читання через пул з'єднань reader() (query_only)
+паралельно із записом у transaction() через спільне з'єднання для запису (RLock, глибина транзакції потоку).
+"""
+import sqlite3, threading, time
+import pytest
+from app.real_estate_repository import RealEstateRepository, RealEstateTaxesRepository
+from benchmarks.synthetic import YEAR, fill_database
+
+READERS = 6
+WRITERS = 2
+WRITES_PER_WRITER = 150
+
+
+@pytest.fixture
+def stress_db(db):
+    return fill_database(db, users=10)
+
+
+def add_estate(db, name):
+    """Нерухомість і її податок в одній транзакції (як RealEstateRepository.add_record) з вкладеною частиною."""
+    estate_repo = db.get_repository(RealEstateRepository)
+    tax_repo = db.get_repository(RealEstateTaxesRepository)
+    with db.transaction():
+        estate_id = estate_repo.add_records_returning_ids([(name, "адреса", 100.0, None, 1, 1)])[0]
+        with db.transaction():  # SAVEPOINT
+            tax_repo.add_record((estate_id, YEAR, 10.0, 0, 0))
+    return estate_id
+
+
+def count_estates_and_taxes(connection):
+    estates = connection.execute("SELECT COUNT(*) FROM real_estate").fetchone()[0]
+    time.sleep(0)  # дати записувати іншим потокам між двома запитами
+    taxes = connection.execute("SELECT COUNT(*) FROM real_estate_taxes").fetchone()[0]
+    return estates, taxes
+
+
+def run_threads(targets):
+    errors = []
+
+    def guarded(target):
+        try:
+            target()
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=guarded, args=(target,)) for target in targets]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=60)
+    assert not any(thread.is_alive() for thread in threads), "потоки не завершились - можливе взаємне блокування"
+    return errors
+
+
+def test_readers_and_writers_run_concurrently(stress_db):
+    db = stress_db
+    writers_done = threading.Event()
+    snapshots = []
+    reader_connections = set()
+
+    def writer(index):
+        for number in range(WRITES_PER_WRITER):
+            add_estate(db, f"Об'єкт {index}-{number}")
+
+    def reader():
+        while not writers_done.is_set():
+            with db.reader() as connection:
+                reader_connections.add(id(connection))
+                connection.execute("BEGIN")  # обидва запити - з одного знімка бази даних
+                try:
+                    snapshots.append(count_estates_and_taxes(connection))
+                finally:
+                    connection.rollback()
+            # запит поза транзакцією потоку теж іде через з'єднання для читання
+            db.execute_query("SELECT COUNT(*) FROM real_estate")
+
+    def writers():
+        try:
+            errors = run_threads([lambda index=index: writer(index) for index in range(WRITERS)])
+            if errors:
+                raise errors[0]
+        finally:
+            writers_done.set()
+
+    errors = run_threads([writers] + [reader] * READERS)
+
+    assert not errors, errors
+    assert snapshots
+    # нерухомість і податок додаються в одній транзакції - жоден знімок не бачить лише половину
+    assert all(estates == taxes for estates, taxes in snapshots)
+    assert 1 < len(reader_connections) <= db.max_readers
+    total = WRITERS * WRITES_PER_WRITER
+    assert count_estates_and_taxes(db.connection) == (total, total)
+
+
+def test_readers_do_not_see_uncommitted_changes(stress_db):
+    db = stress_db
+    inside_transaction = threading.Event()
+    finish_transaction = threading.Event()
+    seen = []
+
+    def writer():
+        with db.transaction():
+            add_estate(db, "Незакомічений об'єкт")
+            inside_transaction.set()
+            # інші потоки читають через пул і не чекають на з'єднання для запису
+            assert finish_transaction.wait(timeout=30)
+
+    def reader():
+        assert inside_transaction.wait(timeout=30)
+        seen.append(db.execute_query("SELECT COUNT(*) FROM real_estate")[0][0])
+        with db.reader() as connection:
+            seen.append(count_estates_and_taxes(connection)[1])
+        finish_transaction.set()
+
+    errors = run_threads([writer, reader])
+
+    assert not errors, errors
+    assert seen == [0, 0]
+    assert db.execute_query("SELECT COUNT(*) FROM real_estate")[0][0] == 1
+
+
+def test_nested_reader_reuses_connection_and_is_read_only(stress_db):
+    db = stress_db
+    with db.reader() as connection:
+        with db.reader() as nested:
+            assert nested is connection
+        with pytest.raises(sqlite3.OperationalError):
+            connection.execute("DELETE FROM users")
+
+
+def test_failed_transaction_in_one_thread_does_not_affect_another(stress_db):
+    db = stress_db
+    started = threading.Event()
+
+    def failing_writer():
+        with pytest.raises(RuntimeError):
+            with db.transaction():
+                add_estate(db, "Відкочений об'єкт")
+                started.set()
+                raise RuntimeError()
+
+    def writer():
+        assert started.wait(timeout=30)
+        add_estate(db, "Збережений об'єкт")
+
+    errors = run_threads([failing_writer, writer])
+
+    assert not errors, errors
+    names = [row[0] for row in db.execute_query("SELECT name FROM real_estate")]
+    assert names == ["Збережений об'єкт"]
+
+
+def make_backup(db, path):
+    destination = sqlite3.connect(str(path))
+    db.connection.backup(destination)
+    destination.close()
+    return str(path)
+
+
+def test_reader_checked_out_before_close_is_not_reused(stress_db):
+    db = stress_db
+    checked_out = threading.Event()
+    finish_reading = threading.Event()
+    old_connections = []
+
+    def reader():
+        with db.reader() as connection:
+            old_connections.append(connection)
+            checked_out.set()
+            assert finish_reading.wait(timeout=30)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    assert checked_out.wait(timeout=30)
+    db.close()
+    db.connect()
+    finish_reading.set()
+    thread.join(timeout=30)
+
+    # повернене після close() з'єднання закрите і не потрапило в пул
+    with pytest.raises(sqlite3.ProgrammingError):
+        old_connections[0].execute("SELECT 1")
+    with db.reader() as connection:
+        assert connection is not old_connections[0]
+        assert connection.execute("SELECT COUNT(*) FROM users").fetchone()[0] == 10
+    assert db.readers_in_use() == 0
+
+
+def test_restore_is_refused_while_reader_in_use(stress_db, tmp_path):
+    db = stress_db
+    backup_path = make_backup(db, tmp_path / "copy.db")
+    add_estate(db, "Після копії")
+    checked_out = threading.Event()
+    finish_reading = threading.Event()
+
+    def reader():
+        with db.reader():
+            checked_out.set()
+            assert finish_reading.wait(timeout=30)
+
+    thread = threading.Thread(target=reader)
+    thread.start()
+    try:
+        assert checked_out.wait(timeout=30)
+        assert not db.load_DB_backup(backup_path)
+    finally:
+        finish_reading.set()
+        thread.join(timeout=30)
+    assert db.execute_query("SELECT COUNT(*) FROM real_estate")[0][0] == 1
+
+    assert db.load_DB_backup(backup_path)
+    assert db.execute_query("SELECT COUNT(*) FROM real_estate")[0][0] == 0
+
+
+def test_close_waits_for_running_transaction(stress_db):
+    db = stress_db
+    inside_transaction = threading.Event()
+    committed = []
+
+    def writer():
+        with db.transaction():
+            add_estate(db, "Об'єкт перед закриттям")
+            inside_transaction.set()
+            time.sleep(0.2)
+        committed.append(True)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    assert inside_transaction.wait(timeout=30)
+    db.close()
+    thread.join(timeout=30)
+
+    assert committed == [True]
+    db.connect()
+    assert db.execute_query("SELECT COUNT(*) FROM real_estate")[0][0] == 1
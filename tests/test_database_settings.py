@@ -0,0 +1,14 @@
+"""
+Налаштування з'єднання (профіль PRAGMA з db_config.json): ефективні значення перевіряються і виводяться
+при кожному підключенні до бази даних.
+"""
+
+
+def test_settings_are_checked_on_every_connect(db, capsys):
+    db.close()
+    capsys.readouterr()
+
+    db.connect()
+    output = capsys.readouterr().out
+    assert f"Профіль бази даних '{db.config['profile']}'" in output
+    assert "journal_mode=wal" in output
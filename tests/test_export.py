@@ -0,0 +1,50 @@
+"""
+Колонковий експорт (ColumnarWriter): таблиці пишуться частинами рядків, порожні значення стають відсутніми,
+типи колонок зберігаються.
+"""
+import pytest
+from app.export import ExportSheet, ColumnarWriter
+
+HEADERS = ["Назва", "Площа\nм^2", "Кількість", "Податок"]
+ROWS = [("Будинок", 120.5, 1, ""), ("Гараж", 18.0, 2, 35.5), ("Сарай", "", 3, 0.0)]
+
+
+def write(tmp_path, file_format, chunks):
+    writer = ColumnarWriter(str(tmp_path), file_format)
+    writer.write_sheet(ExportSheet("Нерухомість", "real_estate", HEADERS, ""), iter(chunks))
+    writer.finish()
+    return tmp_path / ("real_estate" + ColumnarWriter.EXTENSIONS[file_format])
+
+
+def test_npz_columns(tmp_path):
+    np = pytest.importorskip("numpy")
+    with np.load(write(tmp_path, "npz", [ROWS[:2], ROWS[2:]])) as arrays:
+        assert list(arrays["Назва"]) == ["Будинок", "Гараж", "Сарай"]
+        assert arrays["Площа м^2"].dtype == np.float64 and np.isnan(arrays["Площа м^2"][2])
+        assert arrays["Кількість"].dtype == np.int64 and list(arrays["Кількість"]) == [1, 2, 3]
+        assert np.isnan(arrays["Податок"][0]) and list(arrays["Податок"][1:]) == [35.5, 0.0]
+
+
+@pytest.mark.parametrize("file_format", ["parquet", "arrow"])
+def test_arrow_columns_are_written_by_chunks(tmp_path, monkeypatch, file_format):
+    pa = pytest.importorskip("pyarrow")
+    import pyarrow.ipc, pyarrow.parquet
+    monkeypatch.setattr(ColumnarWriter, "ROW_GROUP_SIZE", 2)
+    path = str(write(tmp_path, file_format, [ROWS[:2], ROWS[2:]]))
+
+    if file_format == "parquet":
+        table = pa.parquet.read_table(path)
+        assert pa.parquet.ParquetFile(path).num_row_groups == 2
+    else:
+        table = pa.ipc.open_file(path).read_all()
+    assert table.column_names == ["Назва", "Площа м^2", "Кількість", "Податок"]
+    assert table.column("Кількість").type == pa.int64()
+    assert table.to_pydict()["Площа м^2"] == [120.5, 18.0, None]
+    assert table.to_pydict()["Податок"] == [None, 35.5, 0.0]
+
+
+def test_empty_table(tmp_path):
+    np = pytest.importorskip("numpy")
+    with np.load(write(tmp_path, "npz", [])) as arrays:
+        assert sorted(arrays.files) == sorted(["Назва", "Площа м^2", "Кількість", "Податок"])
+        assert all(len(arrays[name]) == 0 for name in arrays.files)
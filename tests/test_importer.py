@@ -0,0 +1,172 @@
+"""
+Імпорт (app.importer.Importer): експорт і повторний імпорт у нову базу даних дають ті самі записи й податки,
+некоректні рядки відхиляються з причиною у звіті, а при скасуванні записані частини залишаються в базі даних.
+"""
+import csv, os
+import pytest
+from app.database import Database
+from app.export import Exporter, get_export_writer
+from app.importer import Importer, ImportCancelled
+from app.real_estate_repository import RealEstateRepository
+from app.land_parcel_repository import LandParcelRepository
+from app.sheets import get_export_sheets, get_import_sheets
+from benchmarks.synthetic import SQL_FILE, YEAR, fill_database
+
+ESTATE_QUERY = """
+SELECT users.rnokpp, real_estate.name, real_estate.address, real_estate.area,
+       real_estate_type.name, real_estate_taxes.tax
+FROM real_estate
+INNER JOIN users ON users.id = real_estate.user_id
+INNER JOIN real_estate_type ON real_estate_type.id = real_estate.real_estate_type_id
+LEFT JOIN real_estate_taxes ON real_estate_taxes.real_estate_id = real_estate.id AND real_estate_taxes.tax_year = ?
+"""
+LAND_QUERY = """
+SELECT users.rnokpp, land_parcel.address, land_parcel.area, land_parcel.privileged,
+       land_parcel_type.name, normative_monetary_values.value, land_parcel_taxes.tax
+FROM land_parcel
+INNER JOIN users ON users.id = land_parcel.user_id
+INNER JOIN land_parcel_type ON land_parcel_type.id = land_parcel.land_parcel_type_id
+LEFT JOIN normative_monetary_values ON normative_monetary_values.land_id = land_parcel.id
+    AND normative_monetary_values.year = ?
+LEFT JOIN land_parcel_taxes ON land_parcel_taxes.land_parcel_id = land_parcel.id AND land_parcel_taxes.tax_year = ?
+"""
+
+
+@pytest.fixture
+def target_db(tmp_path):
+    """Порожня база даних з тими самими типами, ставками і мінімальною зарплатою, що й filled_db."""
+    folder = tmp_path / "target"
+    folder.mkdir()
+    database = fill_database(Database(str(folder), SQL_FILE), users=0)
+    yield database
+    database.close()
+
+
+def get_sheet(file_name):
+    return next(sheet for sheet in get_import_sheets() if sheet.file_name == file_name)
+
+
+def write_csv(folder, file_name, rows):
+    """CSV файл імпорту: заголовок і рядки - словники поле -> значення (відсутні поля порожні)."""
+    fields = get_sheet(file_name).fields
+    with open(os.path.join(folder, file_name + ".csv"), 'w', newline='', encoding='utf-8') as file:
+        writer = csv.writer(file)
+        writer.writerow(fields)
+        writer.writerows([row.get(field, "") for field in fields] for row in rows)
+
+
+def read_report(path):
+    """Відхилені рядки звіту: [(аркуш, номер рядка, помилка)]."""
+    with open(path, newline='', encoding='utf-8') as file:
+        return [tuple(row[:3]) for row in list(csv.reader(file))[1:]]
+
+
+def user(rnokpp, last_name="Коваль"):
+    return {"last_name": last_name, "name": "Іван", "middle_name": "Петрович", "rnokpp": rnokpp,
+            "address": "вул. Садова, 1"}
+
+
+@pytest.mark.parametrize("file_format, file_name", [("csv", "export"), ("xlsx", "export.xlsx")])
+def test_export_import_round_trip(tmp_path, filled_db, target_db, file_format, file_name):
+    # цілі НГО - перерахунок податків округлює НГО до цілого, імпорт - ні
+    filled_db.execute_non_query("UPDATE normative_monetary_values SET value = ROUND(value)")
+    filled_db.get_repository(RealEstateRepository).update_all_tax(YEAR)
+    filled_db.get_repository(LandParcelRepository).update_all_tax(YEAR)
+    export_path = str(tmp_path / file_name)
+    Exporter(filled_db, get_export_sheets(filled_db, YEAR)).export(get_export_writer(file_format, export_path))
+
+    report_path = str(tmp_path / "rejected.csv")
+    result = Importer(target_db, get_import_sheets(), YEAR, chunk_size=128).import_file(export_path, report_path)
+
+    assert not result.has_rejected()
+    assert not os.path.exists(report_path)
+    for table in ("users", "real_estate", "land_parcel", "real_estate_taxes", "land_parcel_taxes"):
+        assert target_db.execute_query(f"SELECT COUNT(*) FROM {table}") == \
+            filled_db.execute_query(f"SELECT COUNT(*) FROM {table}")
+    assert sorted(target_db.execute_query(ESTATE_QUERY, (YEAR,))) == \
+        sorted(filled_db.execute_query(ESTATE_QUERY, (YEAR,)))
+    assert sorted(target_db.execute_query(LAND_QUERY, (YEAR, YEAR))) == \
+        sorted(filled_db.execute_query(LAND_QUERY, (YEAR, YEAR)))
+
+
+def test_rejected_rows_are_reported(tmp_path, target_db):
+    target_db.execute_non_query("INSERT INTO users(last_name, name, middle_name, rnokpp, address) "
+                                "VALUES ('Мельник', 'Олена', 'Іванівна', '2000000000', 'вул. Садова, 2')")
+    target_db.execute_non_query("INSERT INTO land_parcel_type(name) VALUES ('Без ставки')")
+    folder = tmp_path / "import"
+    folder.mkdir()
+    write_csv(folder, "users", [
+        user("1000000000"),
+        user("2000000000"),  # є в базі даних
+        user("1000000000", "Шевченко"),  # повтор коду у файлі
+        user(""),
+    ])
+    estate = {"name": "Будинок", "address": "вул. Садова, 1", "area": "120,5", "owner": "Коваль Іван 1000000000",
+              "type": "Тип нерухомості 1 (0.5%)"}
+    write_csv(folder, "real_estate", [
+        estate,
+        dict(estate, owner="3000000000"),
+        dict(estate, type="Невідомий"),
+        dict(estate, area="сто"),
+        dict(estate, area="0"),
+    ])
+    land = {"address": "ділянка 1", "area": "1.5", "normative_monetary_value": "10000", "owner": "1000000000",
+            "type": "Тип ділянки 1"}
+    write_csv(folder, "land_parcel", [
+        land,
+        dict(land, type="Без ставки"),
+        dict(land, type="Без ставки", privileged="Так"),  # пільговику ставка не потрібна
+        dict(land, area="1,5 га"),
+        dict(land, normative_monetary_value=""),
+    ])
+
+    report_path = str(tmp_path / "rejected.csv")
+    result = Importer(target_db, get_import_sheets(), YEAR).import_file(str(folder), report_path)
+
+    assert result.imported == {"Люди": 1, "Нерухомість": 1, "Земельні ділянки": 2}
+    assert result.rejected == {"Люди": 3, "Нерухомість": 4, "Земельні ділянки": 3}
+    assert read_report(report_path) == [
+        ("Люди", "3", "Людина з таким кодом вже існує"),
+        ("Люди", "4", "Людина з таким кодом вже існує"),
+        ("Люди", "5", "Не заповнені обов'язкові поля"),
+        ("Нерухомість", "3", "Не знайдено людину з РНОКПП '3000000000'"),
+        ("Нерухомість", "4", "Не знайдено такий тип нерухомості: 'Невідомий'"),
+        ("Нерухомість", "5", "Значення площі повинно бути числом більшим за 0!"),
+        ("Нерухомість", "6", "Значення площі повинно бути числом більшим за 0!"),
+        ("Земельні ділянки", "3", LandParcelRepository.NO_RATE_ERROR),
+        ("Земельні ділянки", "5", "Значення площі повинно бути числом більшим за 0!"),
+        ("Земельні ділянки", "6", "Не заповнені обов'язкові поля"),
+    ]
+    assert target_db.execute_query("SELECT last_name FROM users WHERE rnokpp = '1000000000'") == [("Коваль",)]
+    # податок: 0.5% мінімальної зарплати за кожен м^2 понад ліміт 60 м^2
+    assert target_db.execute_query("SELECT area, tax FROM real_estate INNER JOIN real_estate_taxes "
+                                   "ON real_estate_taxes.real_estate_id = real_estate.id") == \
+        [(120.5, RealEstateRepository.compute_tax(7100, 120.5, 60, 0.5))]
+
+
+def test_real_estate_without_salary_is_rejected(tmp_path, target_db):
+    folder = tmp_path / "import"
+    folder.mkdir()
+    write_csv(folder, "users", [user("1000000000")])
+    write_csv(folder, "real_estate", [{"name": "Будинок", "address": "вул. Садова, 1", "area": "100",
+                                       "owner": "1000000000", "type": "Тип нерухомості 1"}])
+
+    report_path = str(tmp_path / "rejected.csv")
+    result = Importer(target_db, get_import_sheets(), YEAR + 1).import_file(str(folder), report_path)
+
+    assert result.rejected == {"Люди": 0, "Нерухомість": 1}
+    assert read_report(report_path) == [("Нерухомість", "2", RealEstateRepository.NO_SALARY_ERROR)]
+
+
+def test_cancel_keeps_imported_chunks(tmp_path, target_db):
+    folder = tmp_path / "import"
+    folder.mkdir()
+    write_csv(folder, "users", [user(str(1000000000 + index)) for index in range(10)])
+    progress = []
+
+    with pytest.raises(ImportCancelled) as error:
+        Importer(target_db, get_import_sheets(), YEAR, chunk_size=3).import_file(
+            str(folder), str(tmp_path / "rejected.csv"), progress.append, lambda: len(progress) >= 2)
+
+    assert error.value.result.imported == {"Люди": 6}
+    assert target_db.execute_query("SELECT COUNT(*) FROM users") == [(6,)]
@@ -0,0 +1,85 @@
+"""
+Плани запитів репозиторіїв (EXPLAIN QUERY PLAN): часті запити мають знаходити рядки великих таблиць
+за індексом (SEARCH ... USING INDEX / COVERING INDEX / INTEGER PRIMARY KEY), а не читати всю таблицю (SCAN).
+"""
+import pytest
+from app.land_parcel_repository import (
+    LandParcelRepository, LandParcelTaxesRepository, NormativeMonetaryValuesRepository
+)
+from app.land_parcel_type_repository import LandParcelTypeRepository, LandParcelRatesRepository
+from app.real_estate_repository import RealEstateRepository, RealEstateTaxesRepository
+from app.real_estate_type_repository import RealEstateTypeRepository, RealEstateRatesRepository
+from app.user_repository import UserRepository
+from app.migrations import MIGRATIONS
+from benchmarks.synthetic import YEAR
+
+BIG_TABLES = {
+    "users", "real_estate", "land_parcel", "normative_monetary_values", "real_estate_taxes", "land_parcel_taxes",
+}
+
+# (назва, виклик репозиторію) - кожен запит, який виконує виклик, перевіряється окремо
+HOT_QUERIES = [
+    ("real_estate.get_all_estate_by_user_id", lambda db: db.get_repository(RealEstateRepository).get_all_estate_by_user_id(1)),
+    ("real_estate.get_all_ids_by_type_id", lambda db: db.get_repository(RealEstateRepository).get_all_ids_by_type_id(1)),
+    ("real_estate.get_first_record_by_type_id", lambda db: db.get_repository(RealEstateRepository).get_first_record_by_type_id(1)),
+    ("real_estate.get_area_and_typeid_by_id", lambda db: db.get_repository(RealEstateRepository).get_area_and_typeid_by_id(1)),
+    ("real_estate.get_tax_inputs_by_year (тип)", lambda db: db.get_repository(RealEstateRepository).get_tax_inputs_by_year(YEAR, 1)),
+    ("real_estate.get_records_by_user_and_year", lambda db: db.get_repository(RealEstateRepository).get_records_by_user_and_year(1, YEAR)),
+    ("real_estate.get_records_by_ids_and_year", lambda db: db.get_repository(RealEstateRepository).get_records_by_ids_and_year([1, 2, 3], YEAR)),
+    ("real_estate_taxes.get_by_id_and_year", lambda db: db.get_repository(RealEstateTaxesRepository).get_by_id_and_year(1, YEAR)),
+    ("real_estate_type.get_by_name", lambda db: db.get_repository(RealEstateTypeRepository).get_by_name("Тип нерухомості 1")),
+    ("real_estate_type_rates.get_by_year_and_typeid", lambda db: db.get_repository(RealEstateRatesRepository).get_by_year_and_typeid(YEAR, 1)),
+    ("land_parcel.get_all_land_by_user_id", lambda db: db.get_repository(LandParcelRepository).get_all_land_by_user_id(1)),
+    ("land_parcel.get_all_ids_by_type_id", lambda db: db.get_repository(LandParcelRepository).get_all_ids_by_type_id(1)),
+    ("land_parcel.get_first_record_by_type_id", lambda db: db.get_repository(LandParcelRepository).get_first_record_by_type_id(1)),
+    ("land_parcel.get_area_typeid_privileged_by_id", lambda db: db.get_repository(LandParcelRepository).get_area_typeid_privileged_by_id(1)),
+    ("land_parcel.get_tax_inputs_by_year (тип)", lambda db: db.get_repository(LandParcelRepository).get_tax_inputs_by_year(YEAR, 1)),
+    ("land_parcel.get_records_by_user_and_year", lambda db: db.get_repository(LandParcelRepository).get_records_by_user_and_year(1, YEAR)),
+    ("land_parcel.get_records_by_ids_and_year", lambda db: db.get_repository(LandParcelRepository).get_records_by_ids_and_year([1, 2, 3], YEAR)),
+    ("land_parcel_taxes.get_by_id_and_year", lambda db: db.get_repository(LandParcelTaxesRepository).get_by_id_and_year(1, YEAR)),
+    ("land_parcel_type.get_by_name", lambda db: db.get_repository(LandParcelTypeRepository).get_by_name("Тип ділянки 1")),
+    ("land_parcel_type_rates.get_by_year_and_typeid", lambda db: db.get_repository(LandParcelRatesRepository).get_by_year_and_typeid(YEAR, 1)),
+    ("normative_monetary_values.get_by_id_and_year", lambda db: db.get_repository(NormativeMonetaryValuesRepository).get_by_id_and_year(1, YEAR)),
+    ("normative_monetary_values.get_latest_value_by_id_and_year", lambda db: db.get_repository(NormativeMonetaryValuesRepository).get_latest_value_by_id_and_year(1, YEAR)),
+    ("normative_monetary_values.replace_values", lambda db: db.get_repository(NormativeMonetaryValuesRepository).replace_values(YEAR, 1000.5, 2000.5)),
+    ("users.get_full_name", lambda db: db.get_repository(UserRepository).get_full_name(1)),
+    ("users.get_record_by_code", lambda db: db.get_repository(UserRepository).get_record_by_code("1000000001")),
+    ("users.search_id_and_full_name (ПІБ)", lambda db: db.get_repository(UserRepository).search_id_and_full_name("Прізвище1")),
+    ("users.search_id_and_full_name (малі літери)", lambda db: db.get_repository(UserRepository).search_id_and_full_name("прізвище1 ім")),
+    ("users.search_id_and_full_name (РНОКПП)", lambda db: db.get_repository(UserRepository).search_id_and_full_name("100000001")),
+]
+
+
+def record_queries(db, monkeypatch):
+    """Підміняє execute_query і execute_non_query бази так, щоб вони запам'ятовували (запит, параметри)."""
+    queries = []
+    for name in ("execute_query", "execute_non_query"):
+        def recording(query, params=None, execute=getattr(db, name)):
+            queries.append((query, params or ()))
+            return execute(query, params)
+        monkeypatch.setattr(db, name, recording)
+    return queries
+
+
+def get_query_plan(db, query, params):
+    with db.reader() as connection:
+        return [row[3] for row in connection.execute(f"EXPLAIN QUERY PLAN {query}", params)]
+
+
+def test_migrations_applied(db):
+    assert db.connection.execute("PRAGMA user_version;").fetchone()[0] == len(MIGRATIONS)
+
+
+@pytest.mark.parametrize("name, call", HOT_QUERIES, ids=[name for name, _ in HOT_QUERIES])
+def test_hot_query_uses_index(filled_db, monkeypatch, name, call):
+    queries = record_queries(filled_db, monkeypatch)
+    call(filled_db)
+    assert queries, f"{name}: не виконано жодного запиту"
+
+    for query, params in queries:
+        plan = get_query_plan(filled_db, query, params)
+        scans = [detail for detail in plan
+                 if detail.startswith("SCAN ") and detail.split()[1] in BIG_TABLES]
+        assert not scans, f"{name}: повне читання таблиці {scans}\n{query}"
+        assert any(detail.startswith("SEARCH ") and "USING" in detail for detail in plan), \
+            f"{name}: запит не використовує індекс {plan}\n{query}"
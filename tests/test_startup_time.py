@@ -0,0 +1,70 @@
+"""
+Бюджет часу запуску програми: main.py --profile-startup у окремому процесі (Qt без екрана, offscreen)
+на заповненій базі даних у тимчасовій домашній папці. Профіль запуску з папки даних перевіряється
+на загальний час до завантаження даних таблиці і на відсутність важких модулів, що імпортуються лише за потреби.
+"""
+import os, queue, subprocess, sys, threading
+from app.database import Database
+from app.startup_profiler import PROFILE_FILE_NAME
+from benchmarks.synthetic import SQL_FILE, fill_database
+
+STARTUP_BUDGET = 3.0  # с, від запуску main.py до завантаження даних таблиці
+STARTUP_TIMEOUT = 60  # с, найдовше очікування профілю запуску
+DEFERRED_MODULES = {"pandas", "openpyxl", "numpy", "pyarrow"}
+ROOT_PATH = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def read_startup_profile(home: str) -> str:
+    """Запускає main.py --profile-startup і чекає, поки профіль запуску буде записано. Повертає текст профілю."""
+    env = dict(os.environ, HOME=str(home), USERPROFILE=str(home), QT_QPA_PLATFORM="offscreen", PYTHONUNBUFFERED="1")
+    process = subprocess.Popen([sys.executable, "main.py", "--profile-startup"], cwd=ROOT_PATH, env=env,
+                               stdout=subprocess.PIPE, stderr=subprocess.STDOUT, text=True, encoding="utf-8")
+    lines = queue.Queue()
+    threading.Thread(target=lambda: [lines.put(line) for line in process.stdout], daemon=True).start()
+    output = []
+    try:
+        while True:
+            line = lines.get(timeout=STARTUP_TIMEOUT)
+            output.append(line)
+            if line.startswith("Профіль запуску записано: "):
+                path = line.split(": ", 1)[1].strip()
+                break
+    except queue.Empty:
+        raise AssertionError("Профіль запуску не записано:\n" + "".join(output))
+    finally:
+        process.kill()
+        process.wait()
+    with open(path, encoding="utf-8") as file:
+        return file.read()
+
+
+def get_section(profile: str, title: str) -> list:
+    """Рядки розділу профілю запуску після заголовка title до порожнього рядка."""
+    lines = profile.splitlines()
+    section = []
+    for line in lines[lines.index(title) + 1:]:
+        if not line.strip():
+            break
+        section.append(line)
+    return section
+
+
+def test_startup_within_budget(tmp_path):
+    data_folder = tmp_path / ".IS_podatky_data"
+    data_folder.mkdir()
+    db = Database(str(data_folder), SQL_FILE)
+    fill_database(db, users=1000, real_estate=10000, land_parcels=10000, taxes=True)
+    db.close()
+
+    profile = read_startup_profile(tmp_path)
+
+    assert (data_folder / PROFILE_FILE_NAME).exists()
+    stages = {}
+    for line in get_section(profile, "Етапи (мс, від запуску мс):"):
+        _, elapsed, name = line.split(maxsplit=2)
+        stages[name] = float(elapsed) / 1000
+    total = stages["Завантаження даних таблиці"]
+    assert total < STARTUP_BUDGET, f"запуск {total:.2f} с довший за {STARTUP_BUDGET} с:\n{profile}"
+    imported = {line.split()[-1].split(".")[0]
+                for line in get_section(profile, "Всі імпорти в порядку завершення (мс, вкладеність відступом):")}
+    assert not imported & DEFERRED_MODULES, profile
@@ -0,0 +1,113 @@
+"""
+Фільтрація таблиці (FilterableTableWidget): індекс будується у фоновому FilterTask зі знімка рядків,
+результат застосовується моделлю одним оновленням, зміни даних при активному фільтрі
+не перебудовують індекс у потоці інтерфейсу.
+"""
+import time
+import pytest
+from PyQt6.QtCore import Qt, QThreadPool
+from ui.filterable_table_view import FilterableTableWidget
+
+COLUMNS = ["id", "Назва", "Адреса", "Площа"]
+ROWS = 2000
+
+
+def make_row(record_id, name=None):
+    return (record_id, name or f"Об'єкт {record_id}", f"вул. Садова {record_id % 50}", 10.0 + record_id)
+
+
+@pytest.fixture
+def table(qapp):
+    widget = FilterableTableWidget(COLUMNS, [0], lambda index: None, [3], filter_debounce_ms=0)
+    widget.set_rows([make_row(record_id) for record_id in range(1, ROWS + 1)])
+    yield widget
+    wait_for_filter(qapp, widget)
+    widget.deleteLater()
+
+
+def wait_for_filter(qapp, widget):
+    """Чекає на таймер паузи введення, фонові FilterTask і доставку їхніх результатів."""
+    deadline = time.perf_counter() + 10
+    while widget.filter_timer.isActive() and time.perf_counter() < deadline:
+        qapp.processEvents()
+    while time.perf_counter() < deadline:
+        qapp.processEvents()
+        if QThreadPool.globalInstance().waitForDone(10):
+            qapp.processEvents()
+            if QThreadPool.globalInstance().activeThreadCount() == 0:
+                return
+    raise AssertionError("фільтр не завершився")
+
+
+def visible_names(widget):
+    model = widget.table.model()
+    return [model.index(row, 1).data() for row in range(model.rowCount())]
+
+
+def set_filter(qapp, widget, column, text):
+    widget.filter_inputs[column - 1].setText(text)  # колонка 0 прихована і не має поля
+    wait_for_filter(qapp, widget)
+
+
+def test_filter_is_applied_from_background_task(qapp, table):
+    set_filter(qapp, table, 1, "кт 12")
+    names = visible_names(table)
+    assert names and all("кт 12" in name for name in names)
+    assert len(names) == len([1 for record_id in range(1, ROWS + 1) if "кт 12" in f"Об'єкт {record_id}"])
+
+    set_filter(qapp, table, 1, "")
+    assert len(visible_names(table)) == ROWS
+
+
+def test_data_change_keeps_previous_result_until_refiltered(qapp, table):
+    set_filter(qapp, table, 1, "1999")
+    assert visible_names(table) == ["Об'єкт 1999"]
+
+    # нові дані: індекс не будується в потоці інтерфейсу, старий результат переноситься за id записів
+    table.set_rows([make_row(record_id) for record_id in range(1, ROWS + 1)] + [make_row(5000, "Новий 1999")])
+    assert table.filter_index.rows != tuple(table.model.rows)
+    assert sorted(visible_names(table)) == ["Новий 1999", "Об'єкт 1999"]
+    wait_for_filter(qapp, table)
+    assert sorted(visible_names(table)) == ["Новий 1999", "Об'єкт 1999"]
+
+    # доданий рядок видно до результату фільтра, потім він приховується
+    table.add_row(make_row(6000, "Інший"))
+    assert "Інший" in visible_names(table)
+    wait_for_filter(qapp, table)
+    assert sorted(visible_names(table)) == ["Новий 1999", "Об'єкт 1999"]
+
+    # змінений рядок оновлюється в індексі без його перебудови
+    columns = table.filter_index.columns
+    table.upsert_rows([make_row(1998, "Об'єкт 1998 / 1999")])
+    wait_for_filter(qapp, table)
+    assert table.filter_index.columns is columns
+    assert sorted(visible_names(table)) == ["Новий 1999", "Об'єкт 1998 / 1999", "Об'єкт 1999"]
+
+
+def test_stale_result_is_ignored(qapp, table):
+    table.filters[1] = "кт 5"
+    task = table.FilterTask(table.filter_index, table.model.get_snapshot(), dict(table.filters),
+                            table.filter_generation, lambda: False)
+    table.upsert_rows([make_row(5, "Змінений")])
+    task.signals.finished.connect(table.apply_filter_result)
+    task.run()
+    qapp.processEvents()
+    assert len(visible_names(table)) == ROWS
+    wait_for_filter(qapp, table)
+    assert "Змінений" not in visible_names(table)
+    assert all("кт 5" in name for name in visible_names(table))
+
+
+def test_row_values_follow_sort_filter_and_changes(qapp, table):
+    table.table.sortByColumn(3, Qt.SortOrder.DescendingOrder)
+    set_filter(qapp, table, 1, "кт 19")
+    table.remove_rows_by_id([1999, 1990])
+    table.upsert_rows([make_row(1998, "Об'єкт 19 / змінений"), make_row(1990, "Об'єкт 19 / повернений")])
+    wait_for_filter(qapp, table)
+
+    values = [table.get_row_values_by_index(row) for row in range(table.table.model().rowCount())]
+    rows = {record_id: make_row(record_id) for record_id in range(1, ROWS + 1) if record_id != 1999}
+    rows[1998] = make_row(1998, "Об'єкт 19 / змінений")
+    rows[1990] = make_row(1990, "Об'єкт 19 / повернений")
+    expected = sorted((row for row in rows.values() if "кт 19" in row[1]), key=lambda row: row[3], reverse=True)
+    assert values == [[str(value) for value in row] for row in expected]
@@ -0,0 +1,89 @@
+"""
+Модель таблиці (FilterableTableWidget.RecordTableModel): додавання, заміна і видалення рядків без скидання моделі
+при активних сортуванні й фільтрі - видимі рядки, їхній порядок і збережені індекси відповідають записам.
+"""
+import pytest
+from PyQt6.QtCore import Qt, QPersistentModelIndex
+from ui.filterable_table_view import FilterableTableWidget
+
+COLUMNS = ["id", "Назва", "Площа"]
+
+
+def make_row(record_id, name, area=10.0):
+    return (record_id, name, area)
+
+
+def visible_ids(model):
+    return [model.index(position, 0).data() for position in range(model.rowCount())]
+
+
+def accept_names(model, text):
+    """Результат фільтра за назвою, як його застосовує віджет після FilterTask."""
+    model.set_accepted_rows({index for index, row in enumerate(model.rows) if text in row[1]})
+
+
+@pytest.fixture
+def model(qapp):
+    model = FilterableTableWidget.RecordTableModel(COLUMNS, [2])
+    model.set_rows([make_row(1, "Гараж"), make_row(2, "Будинок а"), make_row(3, "Сарай а"),
+                    make_row(4, "Квартира а"), make_row(5, "Дача")])
+    model.sort(1, Qt.SortOrder.AscendingOrder)
+    accept_names(model, " а")
+    return model
+
+
+def test_filter_and_sort_are_applied(model):
+    assert visible_ids(model) == ["2", "4", "3"]
+
+
+def test_upsert_replaces_and_inserts_under_sort_and_filter(model):
+    model.upsert_rows([make_row(3, "Альтанка а"), make_row(6, "Вілла")])
+
+    # заміна пересортовується, новий рядок видно до наступного результату фільтра
+    assert visible_ids(model) == ["3", "2", "6", "4"]
+    assert model.index(0, 1).data() == "Альтанка а"
+    accept_names(model, " а")
+    assert visible_ids(model) == ["3", "2", "4"]
+
+    # прихований фільтром рядок теж замінюється - він з'являється з новими значеннями після фільтра
+    model.upsert_rows([make_row(5, "Дача а")])
+    assert visible_ids(model) == ["3", "2", "4"]
+    accept_names(model, " а")
+    assert visible_ids(model) == ["3", "2", "5", "4"]
+
+
+def test_remove_under_sort_and_filter(model):
+    model.remove_rows_by_id([4, 1, 404])  # видимий, прихований фільтром і неіснуючий
+    assert visible_ids(model) == ["2", "3"]
+
+    model.set_accepted_rows(None)
+    assert visible_ids(model) == ["2", "5", "3"]
+    model.sort(1, Qt.SortOrder.DescendingOrder)
+    assert visible_ids(model) == ["3", "5", "2"]
+    model.sort(-1)
+    assert visible_ids(model) == ["2", "3", "5"]
+
+
+def test_removed_id_can_be_added_again(model):
+    model.remove_rows_by_id([3])
+    model.upsert_rows([make_row(3, "Сарай новий а")])
+    assert visible_ids(model) == ["2", "4", "3"]
+    assert model.rows[model.row_by_id[3]][1] == "Сарай новий а"
+
+    # повторне оновлення замінює новий рядок, а не додає ще один
+    model.upsert_rows([make_row(3, "Альтанка а")])
+    model.set_accepted_rows(None)
+    assert visible_ids(model) == ["3", "2", "1", "5", "4"]
+    assert [model.index(position, 1).data() for position in range(model.rowCount())].count("Альтанка а") == 1
+
+
+def test_persistent_index_follows_its_record(model):
+    current = QPersistentModelIndex(model.index(visible_ids(model).index("4"), 1))
+    model.upsert_rows([make_row(2, "Яхта а")])
+    assert visible_ids(model) == ["4", "3", "2"]
+    assert current.row() == 0 and current.data() == "Квартира а"
+
+    model.remove_rows_by_id([3])
+    assert current.data() == "Квартира а"
+    accept_names(model, "Яхта")
+    assert not current.isValid()
@@ -0,0 +1,88 @@
+"""
+Перерахунок податків за рік (update_all_tax): пакетний розрахунок дає ті самі податки, що й розрахунок
+окремого запису (update_tax), а записи без зарплати, ставки або НГО пропускаються і перелічуються в помилці.
+"""
+import pytest
+from app.real_estate_repository import RealEstateRepository
+from app.land_parcel_repository import LandParcelRepository
+from benchmarks.synthetic import YEAR
+
+
+def get_taxes(db, table, id_column, year=YEAR):
+    return dict(db.execute_query(f"SELECT {id_column}, tax FROM {table} WHERE tax_year = ?", (year,)))
+
+
+def recalculate_each(repository, year=YEAR):
+    """Податки, розраховані окремо для кожного запису (update_tax)."""
+    for (record_id,) in repository.get_all_ids():
+        repository.update_tax(record_id, year)
+
+
+def test_real_estate_bulk_taxes_match_single_record(filled_db):
+    repository = filled_db.get_repository(RealEstateRepository)
+    repository.update_all_tax(YEAR)
+    bulk = get_taxes(filled_db, "real_estate_taxes", "real_estate_id")
+
+    filled_db.execute_non_query("UPDATE real_estate_taxes SET tax = -1")
+    recalculate_each(repository)
+
+    assert bulk == get_taxes(filled_db, "real_estate_taxes", "real_estate_id")
+    assert len(bulk) == len(repository.get_all_ids())
+    assert any(bulk.values())
+
+
+def test_real_estate_bulk_by_type_changes_only_that_type(filled_db):
+    filled_db.execute_non_query("UPDATE real_estate_taxes SET tax = -1")
+    filled_db.get_repository(RealEstateRepository).update_all_tax(YEAR, type_id=1)
+
+    type_ids = dict(filled_db.execute_query("SELECT id, real_estate_type_id FROM real_estate"))
+    for estate_id, tax in get_taxes(filled_db, "real_estate_taxes", "real_estate_id").items():
+        assert (tax >= 0) == (type_ids[estate_id] == 1)
+
+
+def test_real_estate_rows_without_rate_or_salary_are_listed(filled_db):
+    repository = filled_db.get_repository(RealEstateRepository)
+    filled_db.execute_non_query("DELETE FROM real_estate_type_rates WHERE real_estate_type_id = 2")
+    filled_db.execute_non_query("UPDATE real_estate_taxes SET tax = -1")
+    without_rate = len(repository.get_all_ids_by_type_id(2))
+
+    with pytest.raises(Exception, match=rf"^для \({without_rate}\) рядків") as error:
+        repository.update_all_tax(YEAR)
+    assert RealEstateRepository.NO_RATE_ERROR in str(error.value)
+    # решта записів перераховується
+    taxes = get_taxes(filled_db, "real_estate_taxes", "real_estate_id")
+    assert sum(tax < 0 for tax in taxes.values()) == without_rate
+
+    with pytest.raises(Exception, match=rf"^для \({len(repository.get_all_ids())}\) рядків") as error:
+        repository.update_all_tax(YEAR + 1)
+    assert RealEstateRepository.NO_SALARY_ERROR in str(error.value)
+
+
+def test_land_parcel_bulk_taxes_match_single_record(filled_db):
+    repository = filled_db.get_repository(LandParcelRepository)
+    repository.update_all_tax(YEAR)
+    bulk = get_taxes(filled_db, "land_parcel_taxes", "land_parcel_id")
+
+    filled_db.execute_non_query("UPDATE land_parcel_taxes SET tax = -1")
+    recalculate_each(repository)
+
+    assert bulk == get_taxes(filled_db, "land_parcel_taxes", "land_parcel_id")
+    privileged = {land_id for (land_id,) in filled_db.execute_query("SELECT id FROM land_parcel WHERE privileged = 1")}
+    assert privileged and all(bulk[land_id] == 0 for land_id in privileged)
+    assert any(bulk.values())
+
+
+def test_land_parcel_rows_without_nmv_or_rate_are_listed(filled_db):
+    repository = filled_db.get_repository(LandParcelRepository)
+    filled_db.execute_non_query("DELETE FROM normative_monetary_values WHERE land_id <= 10 AND year = ?", (YEAR,))
+    filled_db.execute_non_query("DELETE FROM land_parcel_type_rates WHERE land_parcel_type_id = 3")
+    filled_db.execute_non_query("UPDATE land_parcel_taxes SET tax = -1")
+    without_rate = filled_db.execute_query(
+        "SELECT COUNT(*) FROM land_parcel WHERE id > 10 AND privileged = 0 AND land_parcel_type_id = 3")[0][0]
+
+    with pytest.raises(Exception, match=rf"^для \({10 + without_rate}\) рядків") as error:
+        repository.update_all_tax(YEAR)
+    assert LandParcelRepository.NO_NMV_ERROR in str(error.value)
+    assert LandParcelRepository.NO_RATE_ERROR in str(error.value)
+    taxes = get_taxes(filled_db, "land_parcel_taxes", "land_parcel_id")
+    assert sum(tax < 0 for tax in taxes.values()) == 10 + without_rate
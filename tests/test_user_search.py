@@ -0,0 +1,79 @@
+"""
+Пошук власників (UserRepository.search_id_and_full_name) за повнотекстовим індексом users_search:
+без урахування регістру, за початком будь-якого слова ПІБ або РНОКПП, з оновленням індексу разом з users.
+"""
+import pytest
+from app.database import Database
+from app import user_repository
+from app.user_repository import UserRepository
+from benchmarks.synthetic import SQL_FILE
+
+USERS = [
+    ("Коваль", "Іван", "Петрович", "1234567890", "вул. Садова, 1", None, None),
+    ("Мельник", "Олена", "Іванівна", "2234567890", "вул. Садова, 2", None, None),
+    ("Ковальчук", "Дем'ян", "Олегович", "3234567890", "вул. Садова, 3", None, None),
+]
+
+
+@pytest.fixture
+def user_repo(db):
+    repository = db.get_repository(UserRepository)
+    repository.add_records(USERS)
+    return repository
+
+
+def search_last_names(user_repo, text):
+    return [full_name.split()[0] for _, full_name in user_repo.search_id_and_full_name(text)]
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("коваль", ["Коваль", "Ковальчук"]),
+    ("КОВАЛЬ", ["Коваль", "Ковальчук"]),
+    ("МЕЛЬНИК", ["Мельник"]),
+    ("мельник ол", ["Мельник"]),
+    ("олена мельник", ["Мельник"]),
+    ("іван", ["Коваль", "Мельник"]),
+    ("дем'ян", ["Ковальчук"]),
+    ("22345", ["Мельник"]),
+    ("коваль 3234", ["Ковальчук"]),
+    ("шевченко", []),
+    ('"', []),
+    ("   ", []),
+])
+def test_search_ignores_case_and_word_order(user_repo, text, expected):
+    assert search_last_names(user_repo, text) == expected
+
+
+def test_exact_word_is_found_beyond_candidate_limit(monkeypatch, user_repo):
+    # збігів за префіксом більше, ніж кандидатів, а точний збіг "Коваль" додано останнім
+    monkeypatch.setattr(user_repository, "OWNER_SEARCH_CANDIDATES", 2)
+    user_repo.add_records([("Коваленко", "Петро", "Петрович", f"4{i:09}", "вул. Садова, 4", None, None) for i in range(5)])
+    user_repo.add_records([("Коваль", "Марія", "Іванівна", "5234567890", "вул. Садова, 5", None, None)])
+
+    found = search_last_names(user_repo, "коваль")
+    assert found.count("Коваль") == 2
+    assert len(found) == 3  # 2 точні збіги + перші 2 кандидати за префіксом (Коваль, Ковальчук)
+
+
+def test_search_index_follows_changes(user_repo):
+    (user_id, _), = user_repo.search_id_and_full_name("мельник")
+    user_repo.update_record(user_id, ("Шевченко", "Олена", "Іванівна", "2234567890", "вул. Садова, 2", None, None))
+    assert search_last_names(user_repo, "мельник") == []
+    assert search_last_names(user_repo, "шевч") == ["Шевченко"]
+
+    user_repo.delete_record(user_id)
+    assert search_last_names(user_repo, "шевч") == []
+
+
+def test_migration_indexes_existing_users(tmp_path, db, user_repo):
+    # база даних версії 2 - до появи індексу пошуку
+    for statement in ("DROP TRIGGER users_search_insert", "DROP TRIGGER users_search_delete",
+                      "DROP TRIGGER users_search_update", "DROP TABLE users_search", "PRAGMA user_version = 2"):
+        db.connection.execute(statement)
+    db.close()
+
+    migrated = Database(str(tmp_path), SQL_FILE)
+    try:
+        assert search_last_names(migrated.get_repository(UserRepository), "коваль") == ["Коваль", "Ковальчук"]
+    finally:
+        migrated.close()
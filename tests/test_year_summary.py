@@ -0,0 +1,53 @@
+"""
+Підсумки за рік (YearSummaryRepository): кеш запитів бази даних за позначкою стану даних
+і читання без очікування на з'єднання для запису, поки інший потік пише в базу даних.
+"""
+import threading
+from app.summary_repository import YearSummaryRepository
+from benchmarks.synthetic import YEAR
+
+
+def get_total_tax(summary):
+    return sum(row[4] for row in summary["real_estate"])
+
+
+def test_summary_is_cached_until_data_changes(filled_db):
+    db = filled_db
+    summary = YearSummaryRepository(db).get_summary(YEAR)
+    hits = db.cache.get_stats()["hits"]
+
+    assert YearSummaryRepository(db).get_summary(YEAR) is summary
+    assert db.cache.get_stats()["hits"] == hits + 1
+
+    db.execute_non_query("UPDATE real_estate_taxes SET tax = tax + 1 WHERE tax_year = ?", (YEAR,))
+    changed = YearSummaryRepository(db).get_summary(YEAR)
+    assert changed is not summary
+    assert round(get_total_tax(changed) - get_total_tax(summary)) == len(db.execute_query(
+        "SELECT 1 FROM real_estate_taxes WHERE tax_year = ?", (YEAR,)))
+
+
+def test_summary_does_not_wait_for_writer(filled_db):
+    db = filled_db
+    inside_transaction = threading.Event()
+    finish_transaction = threading.Event()
+
+    def writer():
+        with db.transaction():
+            db.execute_non_query("UPDATE real_estate_taxes SET tax = 0 WHERE tax_year = ?", (YEAR,))
+            inside_transaction.set()
+            finish_transaction.wait(timeout=30)
+
+    thread = threading.Thread(target=writer)
+    thread.start()
+    try:
+        assert inside_transaction.wait(timeout=30)
+        assert db.get_change_marker(blocking=False) is None
+        # читається закомічений стан, не чекаючи на коміт
+        before_commit = YearSummaryRepository(db).get_summary(YEAR)
+        assert get_total_tax(before_commit) > 0
+    finally:
+        finish_transaction.set()
+        thread.join(timeout=30)
+
+    # підсумки, прочитані під час запису, не кешуються - після коміту вони перераховуються
+    assert get_total_tax(YearSummaryRepository(db).get_summary(YEAR)) == 0
@@ -9,28 +9,23 @@ from ui.filterable_table_view import FilterableTableWidget
 
 from app.database import Database, UniqueFieldException
 from app.user_repository import UserRepository
+from app.sheets import USER_FIELDS, USER_TABLE_COLUMNS
 import app.real_estate_repository as estate_repo
 import app.land_parcel_repository as land_repo
 
 class AddPersonDialog(QWidget):
-    edited_signal = pyqtSignal()
+    edited_signal = pyqtSignal(int)  # id зміненої особи
+    # поля і колонки таблиці спільні з експортом та імпортом (app/sheets.py)
+    fields_config = USER_FIELDS
+    table_column = USER_TABLE_COLUMNS
+    
     def __init__(self, db: Database):
         super().__init__()
-        self.user_repository = UserRepository(db)
-        self.estate_repo = estate_repo.RealEstateRepository(db)
-        self.land_repo = land_repo.LandParcelRepository(db)
+        self.user_repository = db.get_repository(UserRepository)
+        self.estate_repo = db.get_repository(estate_repo.RealEstateRepository)
+        self.land_repo = db.get_repository(land_repo.LandParcelRepository)
         
         self.input_fields = {}
-        self.fields_config = [
-            ("last_name", "Прізвище", "Введіть прізвище*"),
-            ("name", "Ім'я", "Введіть ім'я*"),
-            ("middle_name", "По батькові", "Введіть по батькові*"),
-            ("rnokpp", "РНОКПП", "Введіть РНОКПП*"),
-            ("address", "Адреса", "Введіть адресу*"),
-            ("email", "Email", "Введіть email"),
-            ("phone", "Телефон", "Введіть телефон")
-        ]
-        self.table_column = ["Id"]+[item[1] for item in self.fields_config]
         
         self.init_ui()
         self.load_users()
@@ -90,9 +85,16 @@ class AddPersonDialog(QWidget):
     def load_users(self):
         """Завантаження користувачів у таблицю."""
         self.table.clearSelection()
-        self.table.clear_rows()
         users = self.user_repository.get_all_record()
-        [self.table.add_row(user) for user in users]
+        self.table.set_rows(users)
+
+    def refresh_user(self, record_id):
+        """Оновлення в таблиці лише одного користувача."""
+        record = self.user_repository.get_record_by_id(record_id)
+        if record:
+            self.table.upsert_rows([record])
+        else:
+            self.table.remove_rows_by_id([record_id])
 
     def add_person(self):
         """Додавання нового користувача в базу даних."""
@@ -106,13 +108,13 @@ class AddPersonDialog(QWidget):
                     QMessageBox.warning(self, "Попередження", f"Не вдалося додати запис: людина з таким кодом вже існує ({record[1]} {record[2]} {record[3]})")
                     return
                 
-                self.user_repository.add_record(data)
-                self.edited_signal.emit()
+                record_id = self.user_repository.add_record(data)
+                self.refresh_user(record_id)
+                self.edited_signal.emit(record_id)
                 # QMessageBox.information(self, "Успіх", "Користувача успішно додано!")
             except Exception as e:
                 QMessageBox.critical(self, "Помилка", f"Не вдалося додати людину: {e}")
             self.clear_inputs()
-            self.load_users()
         else:
             QMessageBox.warning(self, "Помилка", "Заповніть усі поля!")
 
@@ -123,14 +125,15 @@ class AddPersonDialog(QWidget):
             QMessageBox.warning(self, "Помилка", "Виберіть запис для оновлення!")
             return
         
-        record_id = self.table.get_row_values_by_index(selected_row)[0]
+        record_id = int(self.table.get_row_values_by_index(selected_row)[0])
         data = [field.text() for field in self.input_fields.values()]
 
         if all(data[:-2]):
             try:
                 data[3] = str(data[3]).strip()
                 self.user_repository.update_record(record_id, data)
-                self.edited_signal.emit()
+                self.refresh_user(record_id)
+                self.edited_signal.emit(record_id)
                 # QMessageBox.information(self, "Успіх", "Дані користувача оновлено!")
             except UniqueFieldException as e:
                 record = self.user_repository.get_record_by_code(data[3])
@@ -139,7 +142,6 @@ class AddPersonDialog(QWidget):
             except Exception as e:
                 QMessageBox.critical(self, "Помилка", f"Не вдалося оновити користувача: {e}")
             self.clear_inputs()
-            self.load_users()
         else:
             QMessageBox.warning(self, "Помилка", "Заповніть усі поля!")
 
@@ -150,7 +152,7 @@ class AddPersonDialog(QWidget):
             QMessageBox.warning(self, "Помилка", "Виберіть запис для видалення!")
             return
             
-        record_id = self.table.get_row_values_by_index(selected_row)[0]
+        record_id = int(self.table.get_row_values_by_index(selected_row)[0])
         
         # перевірка чи є власність у людини
         estate_records = self.estate_repo.get_all_estate_by_user_id(record_id)
@@ -163,12 +165,12 @@ class AddPersonDialog(QWidget):
         if confirm_delete() == QMessageBox.StandardButton.Yes:
             try:
                 self.user_repository.delete_record(record_id)
-                self.edited_signal.emit()
+                self.refresh_user(record_id)
+                self.edited_signal.emit(record_id)
                 QMessageBox.information(self, "Успіх", "Особу видалено!")
             except Exception as e:
                 QMessageBox.critical(self, "Помилка", f"Не вдалося видалити користувача: {e}")
             self.clear_inputs()
-            self.load_users()
         
 
     def on_cell_click(self, model_index):
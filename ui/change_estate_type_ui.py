@@ -18,7 +18,7 @@ class EstateTypeDialog(QDialog):
 
     def __init__(self, database:Database, year:int):
         super().__init__()
-        self.estate_type_repo = RealEstateTypeBaseRepository(database)
+        self.estate_type_repo = database.get_repository(RealEstateTypeBaseRepository)
         self.year = year
         self.input_fields = {}
         self.fields_config = [
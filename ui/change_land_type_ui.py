@@ -17,7 +17,7 @@ class LandTypeDialog(QDialog):
     update_table_signal = pyqtSignal()
     def __init__(self, database:Database, year:int):
         super().__init__()
-        self.land_type_repo = LandParcelTypeBaseRepository(database)
+        self.land_type_repo = database.get_repository(LandParcelTypeBaseRepository)
         self.year = year
         self.input_fields = {}
         self.fields_config = [
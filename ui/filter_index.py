@@ -0,0 +1,188 @@
+from bisect import bisect_left, insort
+from collections import defaultdict
+from threading import RLock
+
+PREFIX_END = "\U0010ffff"  # більше за будь-який символ - верхня межа діапазону для пошуку "від початку"
+
+
+def normalize(value) -> str:
+    """Текст клітинки у тому вигляді, в якому він порівнюється з фільтром."""
+    return str(value).casefold()
+
+
+class FilterCancelled(Exception):
+    """Пошук скасовано, бо з'явився новіший текст фільтра."""
+    pass
+
+
+def trigrams(text: str):
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+class ColumnIndex:
+    def __init__(self, values, from_start: bool):
+        """
+        Індекс однієї колонки для швидкої фільтрації.
+
+        :param values: Значення колонки для кожного рядка моделі
+        :param from_start: True - пошук "від початку" (відсортований масив + bisect),
+            False - пошук входження (індекс триграм)
+        """
+        self.from_start = from_start
+        self.values = [normalize(value) for value in values]
+        if from_start:
+            self.sorted_keys = sorted((value, row) for row, value in enumerate(self.values))
+        else:
+            self.trigram_rows = defaultdict(set)
+            for row, value in enumerate(self.values):
+                for trigram in trigrams(value):
+                    self.trigram_rows[trigram].add(row)
+
+    def search(self, text: str, candidates=None) -> set:
+        """
+        Повертає множину рядків, значення яких відповідає тексту фільтра.
+
+        :param candidates: Якщо задано - перевіряються лише ці рядки (звуження попереднього результату)
+        """
+        values = self.values
+        if self.from_start:
+            if candidates is not None:
+                return {row for row in candidates if values[row].startswith(text)}
+            start = bisect_left(self.sorted_keys, (text,))
+            end = bisect_left(self.sorted_keys, (text + PREFIX_END,), start)
+            return {row for _, row in self.sorted_keys[start:end]}
+
+        if candidates is None and len(text) >= 3:
+            row_sets = sorted((self.trigram_rows.get(trigram, set()) for trigram in trigrams(text)), key=len)
+            candidates = set.intersection(*row_sets)
+        if candidates is None:
+            return {row for row, value in enumerate(values) if text in value}
+        return {row for row in candidates if text in values[row]}
+
+    def append(self, value):
+        self.set_value(len(self.values), value)
+
+    def set_value(self, row: int, value):
+        """Оновлює (або додає в кінець) значення рядка без перебудови всього індексу."""
+        value = normalize(value)
+        if row < len(self.values):
+            old_value = self.values[row]
+            if old_value == value:
+                return
+            self.values[row] = value
+            if self.from_start:
+                del self.sorted_keys[bisect_left(self.sorted_keys, (old_value, row))]
+            else:
+                for trigram in trigrams(old_value):
+                    self.trigram_rows[trigram].discard(row)
+        else:
+            self.values.append(value)
+
+        if self.from_start:
+            insort(self.sorted_keys, (value, row))
+        else:
+            for trigram in trigrams(value):
+                self.trigram_rows[trigram].add(row)
+
+
+class FilterIndex:
+    def __init__(self, filter_columns_from_start):
+        """
+        Індекс рядків таблиці для фільтрації за колонками. Використовується лише у фонових FilterTask:
+        індекс будується зі знімка рядків моделі (кортеж), а не зі спільного списку,
+        тому потік інтерфейсу не чекає на побудову індексу.
+        Індекс колонки будується при першому фільтрі по ній і далі оновлюється лише для змінених рядків знімка.
+        lock не дає двом задачам одночасно змінювати індекс.
+
+        :param filter_columns_from_start: Індекси колонок з фільтрацією "від початку"
+        """
+        self.lock = RLock()
+        self.filter_columns_from_start = set(filter_columns_from_start)
+        self.rows = ()
+        self.data_generation = None  # покоління даних моделі (змінюється при set_rows)
+        self.columns = {}
+        self.last_results = {}  # колонка -> (текст, рядки) для звуження при доповненні запиту
+        self.accepted_rows = None
+        self.accepted_filters = None
+
+    def update(self, rows: tuple, data_generation: int):
+        """
+        Переводить індекс на новий знімок рядків моделі.
+        Для нових даних (інше покоління) індекси колонок будуються заново при потребі,
+        інакше оновлюються лише замінені (інший об'єкт рядка) і додані в кінець рядки.
+        """
+        with self.lock:
+            old_rows = self.rows
+            if rows is old_rows:
+                return
+            self.rows = rows
+            if data_generation != self.data_generation or len(rows) < len(old_rows):
+                self.data_generation = data_generation
+                self.columns = {}
+                self.changed()
+                return
+            if self.columns:
+                changed = [row for row, row_data in enumerate(old_rows) if rows[row] is not row_data]
+                for column, index in self.columns.items():
+                    for row in changed:
+                        index.set_value(row, rows[row][column])
+                    for row_data in rows[len(old_rows):]:
+                        index.append(row_data[column])
+            self.changed()
+
+    def changed(self):
+        self.last_results = {}
+        self.accepted_rows = None
+        self.accepted_filters = None
+
+    def get_column(self, column: int) -> ColumnIndex:
+        if column not in self.columns:
+            self.columns[column] = ColumnIndex(
+                (row[column] for row in self.rows), column in self.filter_columns_from_start
+            )
+        return self.columns[column]
+
+    def match(self, filters: dict, is_cancelled=None):
+        """
+        Повертає множину рядків, які відповідають усім фільтрам, або None, якщо фільтрів немає.
+        Результат кешується до зміни фільтрів або даних.
+
+        :param is_cancelled: Функція, яка повертає True, якщо результат вже не потрібен -
+            тоді пошук переривається винятком FilterCancelled
+        """
+        with self.lock:
+            return self._match(filters, is_cancelled)
+
+    def _match(self, filters: dict, is_cancelled=None):
+        active = {column: normalize(text) for column, text in filters.items() if text}
+        if active == self.accepted_filters:
+            return self.accepted_rows
+
+        last_results = {}
+        for column, text in active.items():
+            if is_cancelled and is_cancelled():
+                raise FilterCancelled()
+            index = self.get_column(column)
+            previous = self.last_results.get(column)
+            if previous and previous[0] == text:
+                column_rows = previous[1]
+            elif previous and self.extends(previous[0], text, index.from_start):
+                column_rows = index.search(text, previous[1])
+            else:
+                column_rows = index.search(text)
+            last_results[column] = (text, column_rows)
+
+        result = None
+        if last_results:
+            row_sets = sorted((column_rows for _, column_rows in last_results.values()), key=len)
+            result = set.intersection(*row_sets)
+
+        self.last_results = last_results
+        self.accepted_filters = active
+        self.accepted_rows = result
+        return result
+
+    @staticmethod
+    def extends(old_text: str, new_text: str, from_start: bool) -> bool:
+        """Чи новий текст лише уточнює старий (тоді результат можна звузити з попереднього)."""
+        return new_text.startswith(old_text) if from_start else old_text in new_text
@@ -1,64 +1,343 @@
-from PyQt6.QtCore import Qt, QSortFilterProxyModel
-from PyQt6.QtGui import QStandardItem, QStandardItemModel
+from PyQt6.QtCore import (
+    Qt, QSortFilterProxyModel, QAbstractTableModel, QModelIndex,
+    QObject, QRunnable, QThreadPool, QTimer, pyqtSignal
+)
 from PyQt6.QtWidgets import (
     QTableView,
     QLineEdit,
     QVBoxLayout,
     QHBoxLayout,
-    QWidget
+    QWidget,
+    QLabel,
+    QMessageBox
 )
 from ui.styles import apply_styles
 from ui.utils import get_label
+from ui.filter_index import FilterIndex, FilterCancelled
 
 class FilterableTableWidget(QWidget):
-    class CustomSortFilterProxyModel(QSortFilterProxyModel):
-        def __init__(self, filters, filter_columns_from_start, *args, **kwargs):
+    class RecordTableModel(QAbstractTableModel):
+        """
+        Модель таблиці, яка зберігає сирі рядки з бази даних (кортежі) без створення
+        окремого об'єкта на кожну клітинку. Текст для відображення формується лише
+        для видимих клітинок у data().
+
+        Рядки зберігаються в порядку завантаження (на номери рядків посилається індекс фільтрації),
+        sorted_rows - всі рядки таблиці в порядку сортування, а order - лише ті з них,
+        що проходять фільтр (accepted_rows, None - фільтра немає). Сортування і фільтр змінюють лише ці списки.
+        Видалені рядки лише прибираються з sorted_rows і order і залишаються в rows до наступного set_rows,
+        тому номери рядків в індексі фільтрації не зсуваються.
+        """
+        SORT_ROLE = Qt.ItemDataRole.UserRole
+        POSITION_LOOKUP_LIMIT = 32  # більше рядків у збережених індексах - позиції всіх рядків рахуються одним проходом
+
+        def __init__(self, column_names, numeric_columns=(), *args, **kwargs):
             super().__init__(*args, **kwargs)
-            self.filters = filters
-            self.filter_columns_from_start = filter_columns_from_start
-
-        def filterAcceptsRow(self, source_row, source_parent):
-            """
-            Перевизначає метод для перевірки, чи повинен рядок залишатися у таблиці після фільтрації.
-            """
-            for column_index, text in self.filters.items():
-                if text:  # Якщо фільтр для колонки встановлений
-                    # Отримуємо дані з відповідної комірки
-                    index = self.sourceModel().index(source_row, column_index, source_parent)
-                    data = index.data(Qt.ItemDataRole.DisplayRole)
-                    if not data:  # Пропускаємо, якщо дані порожні
-                        return False
-                    if column_index in self.filter_columns_from_start:
-                        # Перевірка "від початку рядка"
-                        if not str(data).lower().startswith(text.lower()):
-                            return False
-                    else:
-                        # Перевірка наявності тексту у значенні
-                        if text.lower() not in str(data).lower():
-                            return False
-            return True
+            self.headers = list(column_names)
+            self.rows = []
+            self.sorted_rows = []  # номери всіх рядків таблиці в порядку сортування
+            self.order = []  # позиція у таблиці -> номер рядка в self.rows
+            self.accepted_rows = None  # номери рядків, що проходять фільтр (None - усі)
+            self.row_by_id = {}  # id запису (перша колонка) -> номер рядка в self.rows
+            self.numeric_columns = set(numeric_columns)
+            self.sort_keys = {}  # колонка -> ключі сортування для кожного рядка
+            self.sort_orders = {}  # (колонка, напрямок) -> відсортований sorted_rows
+            self.sort_column = -1
+            self.sort_order = Qt.SortOrder.AscendingOrder
+            self.data_generation = 0  # змінюється при set_rows - ті самі номери рядків означають інші записи
+            self.version = 0  # змінюється при кожній зміні рядків
+            self.sort_version = 0  # змінюється при кожній зміні sorted_rows
+            self.snapshot = ()
+
+        def rowCount(self, parent=QModelIndex()):
+            return 0 if parent.isValid() else len(self.order)
+
+        def columnCount(self, parent=QModelIndex()):
+            return 0 if parent.isValid() else len(self.headers)
+
+        def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+            if not index.isValid():
+                return None
+            if role == Qt.ItemDataRole.DisplayRole:
+                return str(self.rows[self.order[index.row()]][index.column()])
+            if role == self.SORT_ROLE:
+                return self.get_sort_keys(index.column())[self.order[index.row()]]
+            return None
+
+        def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+            if orientation == Qt.Orientation.Horizontal and role == Qt.ItemDataRole.DisplayRole:
+                return self.headers[section]
+            return super().headerData(section, orientation, role)
+
+        def setHeaderData(self, section, orientation, value, role=Qt.ItemDataRole.EditRole):
+            if orientation == Qt.Orientation.Horizontal and role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+                self.headers[section] = value
+                self.headerDataChanged.emit(orientation, section, section)
+                return True
+            return False
+
+        def changed(self):
+            self.version += 1
+            self.snapshot = None
+
+        def set_sorted_rows(self, sorted_rows):
+            self.sorted_rows = sorted_rows
+            self.sort_version += 1
+
+        def get_snapshot(self):
+            """
+            Незмінний знімок для фонового FilterTask: (рядки, покоління даних, версія,
+            номери рядків у порядку сортування, версія порядку).
+            """
+            if self.snapshot is None:
+                self.snapshot = tuple(self.rows)
+            return self.snapshot, self.data_generation, self.version, tuple(self.sorted_rows), self.sort_version
+
+        def set_rows(self, rows):
+            """
+            Замінює всі рядки моделі одним скиданням моделі. Поточне сортування застосовується одразу.
+            Поки не готовий результат фільтра для нових рядків, приховуються лише записи,
+            які не проходили попередній фільтр (нові записи показуються).
+            """
+            old_rows = self.rows
+            self.beginResetModel()
+            self.rows = list(rows)
+            self.row_by_id = {row[0]: index for index, row in enumerate(self.rows)}
+            self.data_generation += 1
+            self.changed()
+            if self.accepted_rows is not None:
+                hidden_ids = {row[0] for index, row in enumerate(old_rows) if index not in self.accepted_rows}
+                self.accepted_rows = {index for index, row in enumerate(self.rows) if row[0] not in hidden_ids}
+            self.clear_sort_cache()
+            self.sorted_rows = list(range(len(self.rows)))
+            self.set_sorted_rows(self.get_sort_order(self.sort_column, self.sort_order))
+            self.order = self.filter_order(self.sorted_rows)
+            self.endResetModel()
+
+        def append_row(self, row):
+            self.insert_row(tuple(row))
+            self.resort()
+
+        def insert_row(self, row):
+            """Додає рядок у кінець таблиці. Новий рядок видно до наступного результату фільтра."""
+            self.rows.append(row)
+            self.changed()
+            index = len(self.rows) - 1
+            self.row_by_id[row[0]] = index
+            self.set_sorted_rows(self.sorted_rows + [index])
+            self.update_sort_keys(index)
+            if self.accepted_rows is not None:
+                self.accepted_rows.add(index)
+            position = len(self.order)
+            self.beginInsertRows(QModelIndex(), position, position)
+            self.order.append(index)
+            self.endInsertRows()
+
+        def upsert_rows(self, rows):
+            """
+            Додає нові або замінює існуючі рядки (за id у першій колонці) без скидання моделі.
+            Сортування, фільтр і виділення зберігаються.
+            """
+            changed = []
+            for row in rows:
+                row = tuple(row)
+                index = self.row_by_id.get(row[0])
+                if index is None:
+                    self.insert_row(row)
+                    continue
+                self.rows[index] = row
+                self.changed()
+                self.update_sort_keys(index)
+                changed.append(index)
+
+            # сповіщення після оновлення всіх рядків, лише для видимих
+            if len(changed) == 1:
+                positions = [self.order.index(changed[0])] if changed[0] in self.order else []
+            else:
+                position_by_index = {index: position for position, index in enumerate(self.order)}
+                positions = [position_by_index[index] for index in changed if index in position_by_index]
+            for position in positions:
+                self.dataChanged.emit(self.index(position, 0), self.index(position, len(self.headers) - 1))
+            self.resort()
+
+        def remove_rows_by_id(self, record_ids):
+            """Прибирає з таблиці рядки з вказаними id."""
+            removed = set()
+            for record_id in record_ids:
+                index = self.row_by_id.pop(record_id, None)
+                if index is None:
+                    continue
+                removed.add(index)
+                if self.accepted_rows is not None and index not in self.accepted_rows:
+                    continue
+                position = self.order.index(index)
+                self.beginRemoveRows(QModelIndex(), position, position)
+                del self.order[position]
+                self.endRemoveRows()
+            if removed:
+                self.set_sorted_rows([index for index in self.sorted_rows if index not in removed])
+            self.sort_orders = {}
+
+        def filter_order(self, rows):
+            """Рядки з rows (у тому ж порядку), що проходять фільтр."""
+            if self.accepted_rows is None:
+                return list(rows)
+            accepted_rows = self.accepted_rows
+            return [index for index in rows if index in accepted_rows]
+
+        def set_accepted_rows(self, accepted_rows, order=None):
+            """
+            Застосовує результат фільтра однією зміною макета.
+
+            :param accepted_rows: Множина номерів рядків, що проходять фільтр (None - без фільтра); модель змінює її
+            :param order: Вже відфільтрований sorted_rows, якщо його розраховано у фоновому потоці
+            """
+            self.accepted_rows = accepted_rows
+            self.apply_order(order if order is not None else self.filter_order(self.sorted_rows))
+
+        def resort(self):
+            """Після зміни рядків застосовує поточне сортування заново."""
+            self.sort_orders = {}
+            if self.sort_column >= 0:
+                self.sort(self.sort_column, self.sort_order)
+
+        def clear_sort_cache(self):
+            self.sort_keys = {}
+            self.sort_orders = {}
+
+        def update_sort_keys(self, index):
+            """Оновлює вже розраховані ключі сортування для одного рядка."""
+            row = self.rows[index]
+            for column, keys in self.sort_keys.items():
+                key = self.sort_key(row[column], column)
+                if index < len(keys):
+                    keys[index] = key
+                else:
+                    keys.append(key)
+
+        def sort_key(self, value, column):
+            """
+            Ключ сортування із сирого значення з бази даних.
+            У числових колонках числа порівнюються як числа і йдуть після нечислових значень.
+            """
+            if column not in self.numeric_columns:
+                return str(value)
+            if isinstance(value, (int, float)):
+                return (1, value, "")
+            try:
+                return (1, float(str(value).replace(',', '.')), "")
+            except (ValueError, TypeError):
+                return (0, 0, str(value))
+
+        def get_sort_keys(self, column):
+            """Ключі сортування колонки, розраховані один раз для всіх рядків."""
+            if column not in self.sort_keys:
+                self.sort_keys[column] = [self.sort_key(row[column], column) for row in self.rows]
+            return self.sort_keys[column]
+
+        def get_sort_order(self, column, order):
+            """Порядок усіх рядків таблиці для колонки і напрямку. Кешується до зміни даних."""
+            key = (column, order)
+            if key not in self.sort_orders:
+                loaded_order = sorted(self.sorted_rows)
+                if column < 0:
+                    self.sort_orders[key] = loaded_order
+                else:
+                    keys = self.get_sort_keys(column)
+                    self.sort_orders[key] = sorted(loaded_order, key=keys.__getitem__,
+                                                   reverse=order == Qt.SortOrder.DescendingOrder)
+            return list(self.sort_orders[key])
+
+        def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+            """
+            Змінює порядок відображення рядків. column = -1 повертає порядок завантаження.
+            Рядки та індекс фільтрації не змінюються.
+            """
+            self.sort_column = column
+            self.sort_order = order
+            self.set_sorted_rows(self.get_sort_order(column, order))
+            self.apply_order(self.filter_order(self.sorted_rows))
+
+        def apply_order(self, new_order):
+            """
+            Замінює видимі рядки і їхній порядок однією зміною макета.
+            Збережені індекси (виділення, поточна клітинка) переходять за своїми рядками,
+            а індекси рядків, які більше не видно, стають недійсними.
+            """
+            if new_order == self.order:
+                return
+            self.layoutAboutToBeChanged.emit()
+            old_order = self.order
+            self.order = new_order
+
+            # нові позиції шукаються лише для рядків збережених індексів (їх небагато: виділення, поточна клітинка)
+            old_indexes = self.persistentIndexList()
+            rows = {old_order[index.row()] for index in old_indexes if index.row() < len(old_order)}
+            if len(rows) > self.POSITION_LOOKUP_LIMIT:
+                positions = {row: position for position, row in enumerate(new_order)}
+            else:
+                positions = {}
+                for row in rows:
+                    try:
+                        positions[row] = new_order.index(row)
+                    except ValueError:
+                        pass
+            new_indexes = []
+            for index in old_indexes:
+                position = positions.get(old_order[index.row()]) if index.row() < len(old_order) else None
+                new_indexes.append(QModelIndex() if position is None else self.index(position, index.column()))
+            self.changePersistentIndexList(old_indexes, new_indexes)
+            self.layoutChanged.emit()
+
+    class CustomSortFilterProxyModel(QSortFilterProxyModel):
+        """
+        Проксі таблиці. Фільтр і сортування застосовує модель-джерело (order містить лише видимі рядки
+        в потрібному порядку), тому проксі не викликає Python-функцію для кожного рядка.
+        """
+        def sort(self, column, order=Qt.SortOrder.AscendingOrder):
+            """
+            Сортування виконує модель-джерело за кешованим порядком рядків,
+            тому проксі не порівнює рядки попарно і зберігає порядок джерела.
+            """
+            self.sourceModel().sort(column, order)
 
         def lessThan(self, left, right):
-            # Отримуємо індекс колонки
-            column = left.column()
-            
-            # Отримуємо значення для порівняння
-            left_data = self.sourceModel().data(left)
-            right_data = self.sourceModel().data(right)
-            
-            # Якщо колонка числова
-            if column in self.filter_columns_from_start:
-                try:
-                    # Конвертуємо строки в числа для порівняння
-                    left_num = float(str(left_data).replace(',', '.'))
-                    right_num = float(str(right_data).replace(',', '.'))
-                    return left_num < right_num
-                except (ValueError, TypeError):
-                    # Якщо конвертація не вдалась, повертаємось до строкового порівняння
-                    return str(left_data) < str(right_data)
-            
-            # Для нечислових колонок використовуємо звичайне порівняння
-            return str(left_data) < str(right_data)
+            # Порівняння за типізованими ключами сортування (числа як числа)
+            return left.data(self.sortRole()) < right.data(self.sortRole())
+
+    class FilterTask(QRunnable):
+        """Розрахунок рядків, що відповідають фільтрам, у пулі потоків - за незмінним знімком рядків моделі."""
+        class Signals(QObject):
+            # покоління фільтра, версія даних, (рядки, версія порядку, відфільтрований порядок рядків)
+            finished = pyqtSignal(int, int, object)
+
+        def __init__(self, filter_index: FilterIndex, snapshot, filters: dict, generation: int, is_cancelled):
+            super().__init__()
+            self.filter_index = filter_index
+            self.rows, self.data_generation, self.version, self.sorted_rows, self.sort_version = snapshot
+            self.filters = filters
+            self.generation = generation
+            self.is_cancelled = is_cancelled
+            self.signals = self.Signals()
+
+        def run(self):
+            if self.is_cancelled():
+                return
+            try:
+                with self.filter_index.lock:
+                    self.filter_index.update(self.rows, self.data_generation)
+                    accepted_rows = self.filter_index.match(self.filters, self.is_cancelled)
+            except FilterCancelled:
+                return
+            if self.is_cancelled():
+                return
+            # копія - результат у FilterIndex кешується, а модель доповнює свою множину новими рядками
+            if accepted_rows is None:
+                order = list(self.sorted_rows)
+            else:
+                accepted_rows = set(accepted_rows)
+                order = [row for row in self.sorted_rows if row in accepted_rows]
+            self.signals.finished.emit(self.generation, self.version, (accepted_rows, self.sort_version, order))
 
     class ResizableTable(QTableView):
         def __init__(self, *args, **kwargs):
@@ -107,13 +386,14 @@ class FilterableTableWidget(QWidget):
                 for i in range(self.model().columnCount()):
                     self.setColumnWidth(i, int(current_widths[i] * scale_factor))
 
-    def __init__(self, column_names, hiden_columns_id, cell_click_callback, filter_columns_from_start=None):
+    def __init__(self, column_names, hiden_columns_id, cell_click_callback, filter_columns_from_start=None, filter_debounce_ms=150):
         """
         Створює віджет таблиці з фільтрацією за колонками.
         
         :param column_names: Список назв колонок
         :param cell_click_callback: Функція для обробки кліку по клітинці
         :param filter_columns_from_start: Список індексів колонок, які використовують фільтрацію "від початку"
+        :param filter_debounce_ms: Затримка після останнього натискання клавіші перед фільтрацією
         """
         super().__init__()
 
@@ -121,16 +401,27 @@ class FilterableTableWidget(QWidget):
         self.hiden_columns = hiden_columns_id
         self.filter_columns_from_start = filter_columns_from_start or []
 
-        self.model = QStandardItemModel()
-        self.model.setHorizontalHeaderLabels(self.column_names)
+        self.filter_index = FilterIndex(self.filter_columns_from_start)
+        self.model = self.RecordTableModel(self.column_names, self.filter_columns_from_start)
 
         self.filters = {}  # Словник для збереження тексту фільтрів для кожної колонки
-        self.proxy_model = self.CustomSortFilterProxyModel(self.filters, self.filter_columns_from_start)
+        self.proxy_model = self.CustomSortFilterProxyModel()
         self.proxy_model.setSourceModel(self.model)
-        self.proxy_model.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
         # Дозволяємо сортування
-        self.proxy_model.setSortRole(Qt.ItemDataRole.DisplayRole)
-        self.proxy_model.setDynamicSortFilter(True)
+        self.proxy_model.setSortRole(self.RecordTableModel.SORT_ROLE)
+
+        # фільтрація запускається після паузи у введенні і рахується у фоновому потоці
+        self.filter_generation = 0
+        self.filter_task_signals = None
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(filter_debounce_ms)
+        self.filter_timer.timeout.connect(self.start_filtering)
+
+        # завантаження рядків у фоновому потоці (load_rows)
+        self.load_generation = 0
+        self.loading = None  # аргументи load_rows, поки завантаження триває
+        self.changed_while_loading = False
 
         self.table = self.ResizableTable()
         self.table.setModel(self.proxy_model)
@@ -169,6 +460,10 @@ class FilterableTableWidget(QWidget):
         main_layout.addWidget(get_label("Пошук:"))
         main_layout.addLayout(filter_layout)
         main_layout.addWidget(self.table)
+        self.loading_label = QLabel("Завантаження даних...")
+        self.loading_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.loading_label.hide()
+        main_layout.addWidget(self.loading_label, 1)
         self.setLayout(main_layout)
 
     def create_combined_filter_function(self, column_index):
@@ -179,21 +474,123 @@ class FilterableTableWidget(QWidget):
         """
         def update_filter(text):
             self.filters[column_index] = text
-            self.proxy_model.invalidateFilter()
+            self.filter_generation += 1  # попередні незавершені розрахунки стають неактуальними
+            self.filter_timer.start()
         return update_filter
 
+    def start_filtering(self):
+        """Запускає розрахунок фільтра для знімка поточних рядків і значень полів пошуку."""
+        generation = self.filter_generation
+        task = self.FilterTask(self.filter_index, self.model.get_snapshot(), dict(self.filters), generation,
+                               lambda: generation != self.filter_generation)
+        task.signals.finished.connect(self.apply_filter_result)
+        self.filter_task_signals = task.signals  # результат потрібен лише від останнього запуску
+        QThreadPool.globalInstance().start(task)
+
+    def apply_filter_result(self, generation, version, result):
+        """
+        Застосовує результат фільтрації, якщо за цей час не змінились ні фільтри, ні дані.
+        Якщо змінилось лише сортування, відфільтрований порядок рахується заново.
+        """
+        if generation != self.filter_generation or version != self.model.version:
+            return
+        accepted_rows, sort_version, order = result
+        self.model.set_accepted_rows(accepted_rows, order if sort_version == self.model.sort_version else None)
+
+    def on_rows_changed(self):
+        """
+        Після зміни рядків при активному фільтрі він перераховується у фоновому потоці (після тієї ж паузи,
+        що й при введенні). До того видимі рядки визначає попередній результат фільтра.
+        """
+        if any(self.filters.values()):
+            self.filter_generation += 1
+            self.filter_timer.start()
+
+    def load_rows(self, runner, name: str, function):
+        """
+        Завантажує всі рядки таблиці у фоновому потоці, поки замість таблиці показується заглушка.
+        Результат попереднього незавершеного завантаження відкидається.
+        Якщо рядки змінювались під час завантаження, воно запускається ще раз - результат міг застаріти.
+
+        :param runner: TaskRunner вікна
+        :param name: Назва задачі для індикатора в рядку стану
+        :param function: function(db) - повертає рядки, виконується в потоці пулу
+        """
+        self.load_generation += 1
+        generation = self.load_generation
+        self.loading = (runner, name, function)
+        self.changed_while_loading = False
+        self.set_loading(True)
+
+        def on_finished(rows):
+            if generation != self.load_generation:
+                return
+            if self.changed_while_loading:
+                self.load_rows(runner, name, function)
+                return
+            self.loading = None
+            self.set_rows(rows)
+            self.set_loading(False)
+
+        def on_failed(error):
+            if generation != self.load_generation:
+                return
+            self.loading = None
+            self.set_loading(False)
+            QMessageBox.critical(self, "Помилка", f"Не вдалося завантажити дані: {error}")
+
+        runner.start(name, lambda db, progress, is_cancelled: function(db),
+                     on_finished=on_finished, on_failed=on_failed, on_cancelled=on_failed)
+
+    def set_loading(self, loading: bool):
+        self.table.setVisible(not loading)
+        self.loading_label.setVisible(loading)
+
+    def is_loading(self) -> bool:
+        return self.loading is not None
+
     def add_row(self, row_data):
         """
         Додає рядок у таблицю.
         
         :param row_data: Список значень для кожної колонки
         """
-        items = [QStandardItem(str(value)) for value in row_data]
-        self.model.appendRow(items)
+        self.model.append_row(row_data)
+        self.on_rows_changed()
+
+    def set_rows(self, rows):
+        """
+        Замінює всі рядки таблиці за одну операцію.
+        
+        :param rows: Рядки з бази даних (список кортежів значень для кожної колонки)
+        """
+        self.changed_while_loading = self.is_loading()
+        self.model.set_rows(rows)
+        self.on_rows_changed()
+
+    def upsert_rows(self, rows):
+        """
+        Додає нові або оновлює існуючі рядки таблиці (за id у першій колонці).
+        
+        :param rows: Рядки з бази даних
+        """
+        self.changed_while_loading = self.is_loading()
+        self.model.upsert_rows(rows)
+        self.on_rows_changed()
+
+    def remove_rows_by_id(self, record_ids):
+        """
+        Видаляє рядки з таблиці.
+        
+        :param record_ids: Список id записів (перша колонка)
+        """
+        self.changed_while_loading = self.is_loading()
+        self.model.remove_rows_by_id(record_ids)
 
     def clear_rows(self):
         """Очищає всі рядки таблиці."""
-        self.model.removeRows(0, self.model.rowCount())
+        self.model.set_rows([])
+        self.on_rows_changed()
         
     def clearSelection(self):
         self.table.clearSelection()
@@ -1,42 +1,33 @@
 from PyQt6.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QLineEdit, QComboBox, QWidget,
-    QCompleter, QFrame, QLabel, QRadioButton, QMessageBox, QButtonGroup
+    QFrame, QLabel, QRadioButton, QMessageBox, QButtonGroup
 )
 from PyQt6.QtCore import Qt
 
 from ui.styles import apply_style
 from ui.utils import create_CUD_buttons, create_Vbox, confirm_delete, get_label
 from ui.filterable_table_view import FilterableTableWidget
+from ui.owner_search import OwnerSearchModel, OwnerComboBox
 
 from app.land_parcel_repository import LandParcelRepository, NormativeMonetaryValuesRepository
 from app.land_parcel_type_repository import LandParcelTypeRepository
-from app.user_repository import UserRepository
+from app.sheets import LAND_PARCEL_FIELDS, LAND_PARCEL_TABLE_COLUMNS
 
 class LandParcelWidget(QWidget):
-    def __init__(self, parent, db):
+    # поля і колонки таблиці спільні з експортом та імпортом (app/sheets.py)
+    fields_config = LAND_PARCEL_FIELDS
+    table_column = LAND_PARCEL_TABLE_COLUMNS
+    
+    def __init__(self, parent, db, owner_model: OwnerSearchModel):
         super().__init__(parent=parent)
         
         self.input_fields = {}
         self.db = db
-        self.land_repo = LandParcelRepository(db)
-        self.land_type_repo = LandParcelTypeRepository(db)
-        self.user_repo = UserRepository(db)
-        self.normative_monetary_value_repo = NormativeMonetaryValuesRepository(db)
+        self.land_repo = db.get_repository(LandParcelRepository)
+        self.land_type_repo = db.get_repository(LandParcelTypeRepository)
+        self.owner_model = owner_model
+        self.normative_monetary_value_repo = db.get_repository(NormativeMonetaryValuesRepository)
         self.input_fields = {}
-        self.fields_config = {
-            # ("name", "Назва земельної ділянки", "Введіть назву*"),
-            "address": ("Урочище, Адреса\nземельної ділянки", "Введіть адресу*"),
-            "area": ("Площа (га)", "Введіть площу*"),
-            "privileged": ("Пільговик", ""),
-            "normative_monetary_value": ("Нормативно\nгрошова оцінка", "Введіть грошову оцінку*"),
-            "tax": ("Податок\n(грн)", ""),
-            "paid": ("Сплачено", ""),
-            "sum_paid": ("Сплата\nподатку", "Сплачена сума"),
-            "owner": ("Власник ділянки", "Виберіть власника*"),
-            "type": ("Тип ділянки", "Виберіть тип*"),
-            "notes": ("Нотатки", "Ваші нотатки"),
-        }
-        self.table_column = ["id", "person_id"] + [value[0] for value in self.fields_config.values()]
         
         
         self.init_ui()
@@ -162,40 +153,11 @@ class LandParcelWidget(QWidget):
 
     
     def create_person_dropdown(self):
-        person_dropdown = QComboBox()
-        person_dropdown.setEditable(True)
-        person_dropdown.setPlaceholderText(self.fields_config["owner"][1])
-        person_dropdown.setCurrentIndex(-1)
-
-        self.person_data_list = self.user_repo.get_id_and_full_name()
-        for person in self.person_data_list:
-            person_dropdown.addItem(person[1], person[0])
-
-        # функціонал пошуку
-        person_names = [person[1] for person in self.person_data_list]
-        completer = QCompleter(person_names, person_dropdown)
-        completer.setFilterMode(Qt.MatchFlag.MatchContains)
-        completer.setCompletionMode(QCompleter.CompletionMode.PopupCompletion)
-        person_dropdown.setCompleter(completer)
-        
-        return person_dropdown
-
-    def update_person_dropdown(self):
-        person_dropdown:QComboBox = self.input_fields["owner"]
-        person_dropdown.clear()
-        
-        self.person_data_list = self.user_repo.get_id_and_full_name()
-        for person in self.person_data_list:
-            person_dropdown.addItem(person[1], person[0])
+        return OwnerComboBox(self.owner_model, self.fields_config["owner"][1])
 
-        # функціонал пошуку
-        person_names = [person[1] for person in self.person_data_list]
-        completer = QCompleter(person_names, person_dropdown)
-        completer.setFilterMode(Qt.MatchFlag.MatchContains)
-        completer.setCompletionMode(QCompleter.CompletionMode.PopupCompletion)
-        person_dropdown.setCompleter(completer)
-        
-        self.load_data()
+    def on_person_edited(self, user_id:int):
+        """Оновлення записів власника в таблиці після зміни в списку осіб (поле власника оновлює OwnerSearchModel)"""
+        self.refresh_user_rows(user_id)
 
     def update_type_dropdown(self):
         type_dropdown:QComboBox = self.input_fields["type"]
@@ -207,12 +169,24 @@ class LandParcelWidget(QWidget):
         type_dropdown.setCurrentIndex(-1)
     
     def load_data(self):
-        """Завантаження інформації з бази даних в таблицю"""
+        """Завантаження інформації з бази даних в таблицю (у фоновому потоці, вікно не блокується)"""
         self.table.clearSelection()
-        self.table.clear_rows()
-        records = self.land_repo.get_all_record_by_year(self.window().get_current_year())
-        
-        [self.table.add_row(row) for row in records]
+        year = self.window().get_current_year()
+        self.table.load_rows(self.window().task_runner, "Завантаження земельних ділянок",
+                             lambda db: db.get_repository(LandParcelRepository).get_all_record_by_year(year))
+
+    def refresh_rows(self, record_ids):
+        """Оновлення в таблиці лише вказаних записів, без повного перезавантаження"""
+        self.table.clearSelection()
+        records = self.land_repo.get_records_by_ids_and_year(record_ids, self.window().get_current_year())
+        self.table.upsert_rows(records)
+        self.table.remove_rows_by_id(set(record_ids) - {record[0] for record in records})
+
+    def refresh_user_rows(self, user_id):
+        """Оновлення в таблиці записів одного власника (після зміни його даних)"""
+        self.table.clearSelection()
+        records = self.land_repo.get_records_by_user_and_year(user_id, self.window().get_current_year())
+        self.table.upsert_rows(records)
 
     def clear_inputs(self):
         """Очищення всіх полів введення."""
@@ -280,9 +254,7 @@ class LandParcelWidget(QWidget):
         self.input_fields["sum_paid"].setText(row_data[8])
         
         # QComboBox ownner
-        index = self.input_fields["owner"].findText(row_data[9])
-        if index != -1:
-            self.input_fields["owner"].setCurrentIndex(index)
+        self.input_fields["owner"].set_owner(int(row_data[1]), row_data[9])
 
         # QComboBox type
         type_name = row_data[10]
@@ -320,12 +292,12 @@ class LandParcelWidget(QWidget):
                 return
             
             try:
-                self.land_repo.add_record(year, *data)
+                record_id = self.land_repo.add_record(year, *data)
+                self.refresh_rows([record_id])
                 # QMessageBox.information(self, "Успіх", "Інформацію про нерухомість успішно додано!")
             except Exception as e:
                 QMessageBox.critical(self, "Помилка", f"Щось пішло не так: {e}")
             self.clear_inputs()
-            self.load_data()
         else:
             QMessageBox.warning(self, "Помилка", "Заповніть усі поля!")
 
@@ -336,7 +308,7 @@ class LandParcelWidget(QWidget):
             QMessageBox.warning(self, "Помилка", "Виберіть запис для оновлення!")
             return
         
-        record_id = self.table.get_row_values_by_index(selected_row)[0]
+        record_id = int(self.table.get_row_values_by_index(selected_row)[0])
         data = [field for field in self.get_input_data().values()]
         if all(data[:-1]):
             try:
@@ -361,11 +333,11 @@ class LandParcelWidget(QWidget):
             
             try:
                 self.land_repo.update_record(record_id, year, *data)
+                self.refresh_rows([record_id])
                 # QMessageBox.information(self, "Успіх", "Інформацію про нерухомість успішно оновлено!")
             except Exception as e:
                 QMessageBox.critical(self, "Помилка", f"Щось пішло не так: {e}")
             self.clear_inputs()
-            self.load_data()
         else:
             QMessageBox.warning(self, "Помилка", "Заповніть усі поля!")
 
@@ -376,16 +348,17 @@ class LandParcelWidget(QWidget):
             QMessageBox.warning(self, "Помилка", "Виберіть запис для видалення!")
             return
             
-        record_id = self.table.get_row_values_by_index(selected_row)[0]
+        record_id = int(self.table.get_row_values_by_index(selected_row)[0])
         
         if confirm_delete() == QMessageBox.StandardButton.Yes:
             try:
                 self.land_repo.delete_record(record_id)
+                self.table.clearSelection()
+                self.table.remove_rows_by_id([record_id])
                 QMessageBox.information(self, "Успіх", "Земельну ділянку видалено!")
             except Exception as e:
                 QMessageBox.critical(self, "Помилка", f"Не вдалося видалити інформацію про земельну ділянку: {e}")
             self.clear_inputs()
-            self.load_data()
 
     def update_all_normative_monetary_values(self, old_value, new_value):
         year = self.window().get_current_year()
@@ -394,25 +367,19 @@ class LandParcelWidget(QWidget):
         # self.load_data()
     
     def insert_nmv_from_last_year(self):
-        try:
-            land_ids = [record[0] for record in self.land_repo.get_all_ids()]
-            current_year = self.window().get_current_year()
-            skiped_value = 0
-            not_finded_value = 0
-            completed_values = 0
-            for id in land_ids:
-                nmv_record = self.normative_monetary_value_repo.get_by_id_and_year(id, current_year)
-                if not nmv_record: # якщо значення немає - копіюємо за попередній рік
-                    old_normative_monetary_value = self.normative_monetary_value_repo.get_latest_value_by_id_and_year(id, current_year)
-                    if old_normative_monetary_value is not None:
-                        self.normative_monetary_value_repo.add_record((id, current_year, old_normative_monetary_value))
-                        completed_values += 1
-                    else:
-                        not_finded_value += 1
-                else:
-                    skiped_value += 1
-            QMessageBox.information(self, "Успіх!", f"Оновлення нормативно грошових оцінок завершено!\n Оновлено {completed_values} записів.\n Пропущено {skiped_value} заповнених значень.\n Пропущено {not_finded_value} не знайдених значень.")
-            self.window().update_all_land_tax() # load inside 
-            # self.load_data()
-        except Exception as e:
-            QMessageBox.critical(self, "Помилка!", f"Помилка при копіюванні нормативно грошових оцінок! {e}")
\ No newline at end of file
+        current_year = self.window().get_current_year()
+        self.window().task_runner.start(
+            "Копіювання нормативно грошових оцінок",
+            lambda db, progress, is_cancelled: db.get_repository(NormativeMonetaryValuesRepository).copy_values_from_last_year(current_year, progress, is_cancelled),
+            on_finished=self.on_nmv_copied,
+            on_failed=self.on_nmv_copy_failed,
+            dialog_parent=self.window()
+        )
+    
+    def on_nmv_copied(self, counts):
+        completed_values, skiped_value, not_finded_value = counts
+        QMessageBox.information(self, "Успіх!", f"Оновлення нормативно грошових оцінок завершено!\n Оновлено {completed_values} записів.\n Пропущено {skiped_value} заповнених значень.\n Пропущено {not_finded_value} не знайдених значень.")
+        self.window().update_all_land_tax() # load inside 
+    
+    def on_nmv_copy_failed(self, e):
+        QMessageBox.critical(self, "Помилка!", f"Помилка при копіюванні нормативно грошових оцінок! {e}")
\ No newline at end of file
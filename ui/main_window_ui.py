@@ -3,16 +3,12 @@ from PyQt6.QtWidgets import (
     QWidget, QMenuBar, QMenu, QLabel, QMessageBox, QStackedLayout, QApplication
 )
 from PyQt6.QtGui import QAction
-import pandas as pd
-from ui.add_person_ui import AddPersonDialog
+import os
 from ui.styles import apply_styles, get_button_style
 from ui.year_box import YearComboBox
-from ui.min_salary_ui import MinSalaryDialog
-from ui.change_estate_type_ui import EstateTypeDialog
-from ui.change_land_type_ui import LandTypeDialog
 from ui.real_estate_ui import RealEstateWidget
-from ui.land_parcel_ui import LandParcelWidget
-from ui.nmv_dialog import InputNMVDialog
+from ui.task_runner import TaskRunner, TaskStatusWidget
+from ui.owner_search import OwnerSearchModel
 
 from app.database import Database
 from app.salary_repository import SalaryRepository
@@ -20,19 +16,25 @@ from app.real_estate_repository import RealEstateRepository, SilentCloseExeption
 from app.land_parcel_repository import LandParcelRepository
 from app.real_estate_type_repository import RealEstateTypeBaseRepository
 from app.land_parcel_type_repository import LandParcelTypeBaseRepository
-from app.user_repository import UserRepository
+# діалоги, сторінка земельних ділянок, імпорт і експорт імпортуються при першому використанні,
+# щоб не сповільнювати запуск програми
 
 class MainWindow(QMainWindow):
     def __init__(self, db:Database):
         super().__init__()
         self.db = db
-        self.salary_repo = SalaryRepository(db)
-        self.estate_repo = RealEstateRepository(db)
-        self.land_repo = LandParcelRepository(db)
-        self.estate_type_base_repo = RealEstateTypeBaseRepository(db)
-        self.land_type_base_repo = LandParcelTypeBaseRepository(db)
+        self.salary_repo = db.get_repository(SalaryRepository)
+        self.estate_repo = db.get_repository(RealEstateRepository)
+        self.land_repo = db.get_repository(LandParcelRepository)
+        self.estate_type_base_repo = db.get_repository(RealEstateTypeBaseRepository)
+        self.land_type_base_repo = db.get_repository(LandParcelTypeBaseRepository)
         
-        QApplication.instance().aboutToQuit.connect(db.save_DB_backup)
+        QApplication.instance().aboutToQuit.connect(db.start_DB_backup)
+        self.task_runner = TaskRunner(db, self)
+        self.owner_model = OwnerSearchModel(db, self)  # спільна для полів вибору власника обох сторінок
+        self.export_job = None
+        self.statements_job = None
+        self.import_job = None
         
         self.init_ui()
 
@@ -52,31 +54,51 @@ class MainWindow(QMainWindow):
 
         top_button_layout = self.create_top_button_layout()
 
+        # сторінки таблиць створюються при першому показі, дані завантажуються у фоновому потоці
         self.stacked_layout = QStackedLayout()
-        self.estate_widget = RealEstateWidget(self, self.db)
-        self.land_widget = LandParcelWidget(self, self.db)
-        self.stacked_layout.addWidget(self.estate_widget)
-        self.stacked_layout.addWidget(self.land_widget)
+        self.pages = {}
+        self.get_page(0)
 
         self.create_menu_bar()
+        self.statusBar().addPermanentWidget(TaskStatusWidget(self.task_runner))
         main_layout.addLayout(top_button_layout)
         main_layout.addLayout(self.stacked_layout)
         central_widget.setLayout(main_layout)
         
         self.combo_check()
     
+    def get_page(self, index:int):
+        """Сторінка таблиці (0 - нерухомість, 1 - земельні ділянки). Створюється при першому зверненні і сама завантажує дані."""
+        page = self.pages.get(index)
+        if page is None:
+            if index == 0:
+                page = RealEstateWidget(self, self.db, self.owner_model)
+            else:
+                from ui.land_parcel_ui import LandParcelWidget
+                page = LandParcelWidget(self, self.db, self.owner_model)
+            self.pages[index] = page
+            self.stacked_layout.insertWidget(index, page)
+        return page
+    
+    def reload_page(self, index:int):
+        """Перезавантажує дані сторінки, лише якщо вона вже створена."""
+        if index in self.pages:
+            self.pages[index].load_data()
+    
     def change_table_action(self):
         self.change_type_button.clicked.disconnect()
-        if self.stacked_layout.currentIndex() == 0:
-            self.stacked_layout.setCurrentIndex(1)
+        index = 1 if self.stacked_layout.currentIndex() == 0 else 0
+        is_new_page = index not in self.pages
+        self.stacked_layout.setCurrentWidget(self.get_page(index))
+        if index == 1:
             self.change_type_button.setText("Типи земельних ділянок")
             self.change_type_button.clicked.connect(self.open_change_land_type_dialog)
         else:
-            self.stacked_layout.setCurrentIndex(0)
             self.change_type_button.setText("Типи нерухомості\nвідмінні від земельних ділянок")
             self.change_type_button.clicked.connect(self.open_change_estate_type_dialog)
         self.check_type_button()
-        self.load_data()
+        if not is_new_page:
+            self.load_data()
 
     def create_menu_bar(self):
         """Створення меню бару"""
@@ -85,21 +107,28 @@ class MainWindow(QMainWindow):
 
         # Actions Menu
         actions_menu = QMenu("Дії", self)
-        # import_action = QAction("Імпорт з Excel", self)
+        import_action = QAction("Імпорт з Excel", self)
+        import_action.triggered.connect(self.import_from_excel)
         export_action = QAction("Експорт в Excel", self)
         export_action.triggered.connect(self.export_to_excel)
         restore_action = QAction("Відновити резервну копію бази даних", self)
         restore_action.triggered.connect(self.restore_db_backup_action)
         place_value_action = QAction("Вставити значення нормативно грошової оцінки як за попередній рік", self)
-        place_value_action.triggered.connect(self.stacked_layout.widget(1).insert_nmv_from_last_year)
+        place_value_action.triggered.connect(self.insert_nmv_from_last_year)
         change_value_action = QAction("Змінити всі значення нормативно грошової оцінки", self)
         change_value_action.triggered.connect(self.open_nmv_dialog)
+        statements_action = QAction("Сформувати податкові повідомлення", self)
+        statements_action.triggered.connect(self.generate_statements)
+        summary_action = QAction("Підсумки за рік", self)
+        summary_action.triggered.connect(self.open_year_summary_dialog)
         
-        # actions_menu.addAction(import_action)
+        actions_menu.addAction(import_action)
         actions_menu.addAction(export_action)
         actions_menu.addAction(restore_action)
         actions_menu.addAction(place_value_action)
         actions_menu.addAction(change_value_action)
+        actions_menu.addAction(statements_action)
+        actions_menu.addAction(summary_action)
         menu_bar.addMenu(actions_menu)
 
     def create_top_button_layout(self):
@@ -155,26 +184,41 @@ class MainWindow(QMainWindow):
 
         return button_layout
 
+    def insert_nmv_from_last_year(self):
+        self.get_page(1).insert_nmv_from_last_year()
+    
     def open_nmv_dialog(self):
+        from ui.nmv_dialog import InputNMVDialog
         dialog = InputNMVDialog()
         if dialog.exec() == QDialog.DialogCode.Accepted:
-            self.stacked_layout.widget(1).update_all_normative_monetary_values(dialog.value1, dialog.value2)
+            self.get_page(1).update_all_normative_monetary_values(dialog.value1, dialog.value2)
+    
+    def open_year_summary_dialog(self):
+        from ui.year_summary_ui import YearSummaryDialog
+        self.summary_window = YearSummaryDialog(self.task_runner, self.get_current_year())
+        self.summary_window.show()
     
     def open_add_person_dialog(self):
         """Відкриття діалогу додавання користувача."""
-        current_layout = self.stacked_layout.currentWidget()
-        
+        from ui.add_person_ui import AddPersonDialog
         self.person_dialog = AddPersonDialog(self.db)
-        self.person_dialog.edited_signal.connect(current_layout.update_person_dropdown)
+        self.person_dialog.edited_signal.connect(self.on_person_edited)
         self.person_dialog.show()
         
+    def on_person_edited(self, user_id:int):
+        self.owner_model.refresh_owner(user_id)
+        for page in self.pages.values():
+            page.on_person_edited(user_id)
+    
     def open_min_salary_dialog(self):
+        from ui.min_salary_ui import MinSalaryDialog
         self.salary_window = MinSalaryDialog(self.db, self.get_current_year())
         self.salary_window.close_signal.connect(self.combo_check)
         self.salary_window.edited_signal.connect(self.update_all_estate_tax)
         self.salary_window.exec()
     
     def open_change_estate_type_dialog(self):
+        from ui.change_estate_type_ui import EstateTypeDialog
         estate_type_window = EstateTypeDialog(self.db, self.get_current_year())
         estate_type_window.close_signal.connect(self.combo_check)
         estate_type_window.edited_signal.connect(self.update_all_estate_tax)
@@ -183,6 +227,7 @@ class MainWindow(QMainWindow):
         estate_type_window.exec()
     
     def open_change_land_type_dialog(self):
+        from ui.change_land_type_ui import LandTypeDialog
         land_type_window = LandTypeDialog(self.db, self.get_current_year())
         land_type_window.close_signal.connect(self.combo_check)
         land_type_window.edited_signal.connect(self.update_all_land_tax)
@@ -191,24 +236,39 @@ class MainWindow(QMainWindow):
         land_type_window.exec()
     
     def update_all_estate_tax(self, type_record_id:int = None):
-        try:
-            self.estate_repo.update_all_tax(self.get_current_year(), type_record_id)
-            QMessageBox.information(self, "Успіх!", "Нові податки було успішно розраховано!")
-        except SilentCloseExeption:
-            pass
-        except Exception as e:
-            QMessageBox.warning(self, "Попередження!", f"Не вдалося розрахувати нові податки: {e}")
-        self.load_data()
+        year = self.get_current_year()
+        self.task_runner.start(
+            "Розрахунок податків на нерухомість",
+            lambda db, progress, is_cancelled: db.get_repository(RealEstateRepository).update_all_tax(year, type_record_id, progress, is_cancelled),
+            on_finished=lambda result: self.on_tax_updated(0),
+            on_failed=lambda error: self.on_tax_update_failed(0, error),
+            on_cancelled=lambda error: self.on_tax_update_cancelled(0),
+            dialog_parent=self
+        )
     
     def update_all_land_tax(self, type_record_id:int = None):
-        try:
-            self.land_repo.update_all_tax(self.get_current_year(), type_record_id)
-            QMessageBox.information(self, "Успіх!", "Нові податки було успішно розраховано!")
-        except SilentCloseExeption:
-            pass
-        except Exception as e:
-            QMessageBox.warning(self, "Попередження!", f"Не вдалося розрахувати нові податки: {e}")
-        self.stacked_layout.widget(1).load_data()
+        year = self.get_current_year()
+        self.task_runner.start(
+            "Розрахунок податків на земельні ділянки",
+            lambda db, progress, is_cancelled: db.get_repository(LandParcelRepository).update_all_tax(year, type_record_id, progress, is_cancelled),
+            on_finished=lambda result: self.on_tax_updated(1),
+            on_failed=lambda error: self.on_tax_update_failed(1, error),
+            on_cancelled=lambda error: self.on_tax_update_cancelled(1),
+            dialog_parent=self
+        )
+    
+    def on_tax_updated(self, page_index):
+        QMessageBox.information(self, "Успіх!", "Нові податки було успішно розраховано!")
+        self.reload_page(page_index)
+    
+    def on_tax_update_failed(self, page_index, error):
+        if not isinstance(error, SilentCloseExeption):
+            QMessageBox.warning(self, "Попередження!", f"Не вдалося розрахувати нові податки: {error}")
+        self.reload_page(page_index)
+    
+    def on_tax_update_cancelled(self, page_index):
+        QMessageBox.information(self, "Розрахунок податків", "Розрахунок податків скасовано, зміни не збережено.")
+        self.reload_page(page_index)
 
     def year_changed(self):
         self.combo_check()
@@ -261,7 +321,12 @@ class MainWindow(QMainWindow):
 
     def restore_db_backup_action(self):
         """Обробка кнопки завантаження копії."""
-        file_path, _ = QFileDialog.getOpenFileName(self, "Виберіть резервну копію", self.db.backup_dir, "SQLite Files (*.db)")
+        if self.task_runner.jobs:
+            QMessageBox.warning(self, "Попередження",
+                                "Дочекайтесь завершення фонових задач (експорт, повідомлення, завантаження таблиці) "
+                                "або скасуйте їх перед відновленням бази даних.")
+            return
+        file_path, _ = QFileDialog.getOpenFileName(self, "Виберіть резервну копію", self.db.backup_dir, "SQLite Files (*.db *.db.gz *.db.zst)")
         if file_path:
             if self.db.load_DB_backup(file_path):
                 QMessageBox.information(self, "Успіх", "Базу даних успішно відновлено!")
@@ -271,26 +336,109 @@ class MainWindow(QMainWindow):
                 QMessageBox.critical(self, "Помилка", "Не вдалося відновити базу даних.")
 
     def export_to_excel(self):
+        """Запускає експорт у фоновому потоці; прогрес і скасування - в рядку стану."""
+        if self.export_job is not None:
+            return
+        from app.export import Exporter, get_export_writer
+        from app.sheets import get_export_sheets
         year = self.get_current_year()
         output_file = f"exported_data_{year}.xlsx"
-        with pd.ExcelWriter(output_file, engine="openpyxl") as writer:
-            user_repo = UserRepository(self.db)
-            records = user_repo.get_all_record()
-            df = pd.DataFrame(records, columns=["id","Прізвище","Ім'я","По батькові","Код платника податків","Адреса","Електронна пошта","Телефон"])
-            df = df.drop("id", axis=1)
-            df.to_excel(writer, sheet_name="Люди", index=False)
-            
-            records = self.estate_repo.get_all_record_by_year(year)
-            estate_col_names = self.stacked_layout.widget(0).table_column
-            df = pd.DataFrame(records, columns=estate_col_names)
-            df = df.drop([estate_col_names[0],estate_col_names[1]], axis=1)
-            df.to_excel(writer, sheet_name="Нерухомість", index=False)
-            
-            records = self.land_repo.get_all_record_by_year(year)
-            land_col_names = self.stacked_layout.widget(1).table_column
-            df = pd.DataFrame(records, columns=land_col_names)
-            df = df.drop([land_col_names[0],land_col_names[1]], axis=1)
-            df.to_excel(writer, sheet_name="Земельні ділянки", index=False)
+        sheets = get_export_sheets(self.db, year)
+
+        def export(db, progress, is_cancelled):
+            Exporter(db, sheets).export(get_export_writer("xlsx", output_file), progress, is_cancelled)
+            return output_file
 
+        self.export_job = self.task_runner.start(
+            "Експорт в Excel", export,
+            on_finished=self.on_export_finished,
+            on_failed=self.on_export_failed,
+            on_cancelled=self.on_export_cancelled
+        )
+
+    def on_export_finished(self, output_file):
+        self.export_job = None
         QMessageBox.information(self, "Успіх!", f"Дані успішно експортовані до файлу: {output_file}")
-    
\ No newline at end of file
+
+    def on_export_cancelled(self, error):
+        self.export_job = None
+        QMessageBox.information(self, "Експорт", "Експорт скасовано.")
+
+    def on_export_failed(self, error):
+        self.export_job = None
+        QMessageBox.critical(self, "Помилка", f"Не вдалося експортувати дані: {error}")
+
+    def generate_statements(self):
+        """Формує податкові повідомлення власників за поточний рік (html) у вибрану папку у фоновому потоці."""
+        if self.statements_job is not None:
+            return
+        folder = QFileDialog.getExistingDirectory(self, "Виберіть папку для податкових повідомлень")
+        if not folder:
+            return
+        from app.statements import StatementGenerator
+        year = self.get_current_year()
+        output_folder = os.path.join(folder, f"tax_statements_{year}")
+
+        self.statements_job = self.task_runner.start(
+            "Формування податкових повідомлень",
+            lambda db, progress, is_cancelled: StatementGenerator(db, year, output_folder).generate(progress, is_cancelled),
+            on_finished=lambda count: self.on_statements_finished(count, output_folder),
+            on_failed=self.on_statements_failed,
+            on_cancelled=self.on_statements_cancelled
+        )
+
+    def on_statements_finished(self, count, output_folder):
+        self.statements_job = None
+        QMessageBox.information(self, "Успіх!", f"Сформовано {count} повідомлень у папці: {output_folder}")
+
+    def on_statements_cancelled(self, error):
+        self.statements_job = None
+        QMessageBox.information(self, "Податкові повідомлення", "Формування повідомлень скасовано.")
+
+    def on_statements_failed(self, error):
+        self.statements_job = None
+        QMessageBox.critical(self, "Помилка", f"Не вдалося сформувати повідомлення: {error}")
+
+    def import_from_excel(self):
+        """
+        Імпорт людей, нерухомості та земельних ділянок за поточний рік з файлу у форматі експорту
+        (.xlsx або .csv) у фоновому потоці з вікном прогресу.
+        """
+        if self.import_job is not None:
+            return
+        file_path, _ = QFileDialog.getOpenFileName(self, "Виберіть файл для імпорту", "", "Excel або CSV (*.xlsx *.csv)")
+        if not file_path:
+            return
+        report_path = os.path.splitext(file_path)[0] + "_rejected.csv"
+        from app.importer import Importer
+        from app.sheets import get_import_sheets
+        importer = Importer(self.db, get_import_sheets(), self.get_current_year())
+
+        self.import_job = self.task_runner.start(
+            "Імпорт з Excel",
+            lambda db, progress, is_cancelled: importer.import_file(file_path, report_path, progress, is_cancelled),
+            on_finished=self.on_import_finished,
+            on_failed=self.on_import_failed,
+            on_cancelled=self.on_import_cancelled,
+            dialog_parent=self
+        )
+
+    def close_import_job(self):
+        self.import_job = None
+        self.load_data()
+        self.combo_check()
+
+    def on_import_finished(self, result):
+        self.close_import_job()
+        if result.has_rejected():
+            QMessageBox.warning(self, "Імпорт", f"Імпорт завершено, але частину рядків відхилено.\n{result.get_summary()}")
+        else:
+            QMessageBox.information(self, "Успіх!", f"Дані успішно імпортовано.\n{result.get_summary()}")
+
+    def on_import_cancelled(self, error):
+        self.close_import_job()
+        QMessageBox.information(self, "Імпорт", f"Імпорт скасовано. Вже імпортовані рядки збережено.\n{error.result.get_summary()}")
+
+    def on_import_failed(self, error):
+        self.close_import_job()
+        QMessageBox.critical(self, "Помилка", f"Не вдалося імпортувати дані: {error}")
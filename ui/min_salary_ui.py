@@ -13,7 +13,7 @@ class MinSalaryDialog(QDialog):
     edited_signal = pyqtSignal()
     def __init__(self, database:Database, year:int):
         super().__init__()
-        self.salary_repository = SalaryRepository(database)
+        self.salary_repository = database.get_repository(SalaryRepository)
         self.year = year
         self.setWindowTitle("Мінімальна зарплата")
         self.setStyleSheet("background-color: #f0f4f8;")
@@ -0,0 +1,120 @@
+from PyQt6.QtWidgets import QComboBox, QCompleter
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QTimer, pyqtSignal
+from app.database import Database
+from app.user_repository import UserRepository
+
+SEARCH_DELAY_MS = 150  # пошук запускається після паузи у введенні, а не на кожну літеру
+
+
+class OwnerSearchModel(QAbstractListModel):
+    # id власника і новий ПІБ з кодом (None - власника видалено)
+    owner_changed = pyqtSignal(int, object)
+
+    def __init__(self, db: Database, parent=None):
+        """
+        Результати пошуку власників для підказок у полях вибору власника.
+        Містить лише знайдені за введеним текстом записи (UserRepository.search_id_and_full_name),
+        а не всіх людей. Одна модель спільна для сторінок нерухомості і земельних ділянок.
+        """
+        super().__init__(parent)
+        self.user_repo = db.get_repository(UserRepository)
+        self.owners = []  # [(id, ПІБ і код)]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.owners)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            return self.owners[index.row()][1]
+        if role == Qt.ItemDataRole.UserRole:
+            return self.owners[index.row()][0]
+        return None
+
+    def search(self, text: str):
+        owners = self.user_repo.search_id_and_full_name(text)
+        self.beginResetModel()
+        self.owners = owners
+        self.endResetModel()
+
+    def find_owner_id(self, full_name: str):
+        for owner_id, name in self.owners:
+            if name == full_name:
+                return owner_id
+        return None
+
+    def refresh_owner(self, user_id: int):
+        """Оновлює одного власника після додавання, зміни або видалення (сигнал edited_signal списку осіб)."""
+        full_name = self.user_repo.get_full_name(user_id)
+        for row, (owner_id, _) in enumerate(self.owners):
+            if owner_id != user_id:
+                continue
+            if full_name is None:
+                self.beginRemoveRows(QModelIndex(), row, row)
+                del self.owners[row]
+                self.endRemoveRows()
+            else:
+                self.owners[row] = (owner_id, full_name)
+                self.dataChanged.emit(self.index(row), self.index(row))
+            break
+        self.owner_changed.emit(user_id, full_name)
+
+
+class OwnerComboBox(QComboBox):
+    def __init__(self, model: OwnerSearchModel, placeholder: str, parent=None):
+        """
+        Поле вибору власника з пошуком: під час введення показує підказки з OwnerSearchModel.
+        Зберігає лише вибраного власника (текст - ПІБ і код, currentData() - id).
+        """
+        super().__init__(parent)
+        self.owner_model = model
+        self.setEditable(True)
+        self.setInsertPolicy(QComboBox.InsertPolicy.NoInsert)
+        self.setPlaceholderText(placeholder)
+        self.lineEdit().setPlaceholderText(placeholder)
+
+        completer = QCompleter(model, self)
+        completer.setCompletionMode(QCompleter.CompletionMode.UnfilteredPopupCompletion)
+        completer.activated[str].connect(self.on_owner_activated)
+        self.setCompleter(completer)
+
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(SEARCH_DELAY_MS)
+        self.search_timer.timeout.connect(self.search)
+        self.lineEdit().textEdited.connect(lambda text: self.search_timer.start())
+        model.owner_changed.connect(self.on_owner_changed)
+
+    def search(self):
+        text = self.lineEdit().text()
+        self.owner_model.search(text)
+        if self.owner_model.owners and self.hasFocus():
+            self.completer().complete()
+
+    def on_owner_activated(self, full_name: str):
+        owner_id = self.owner_model.find_owner_id(full_name)
+        if owner_id is not None:
+            self.set_owner(owner_id, full_name)
+
+    def set_owner(self, owner_id: int, full_name: str):
+        self.clear()
+        self.addItem(full_name, owner_id)
+        self.setCurrentIndex(0)
+
+    def currentData(self, role=Qt.ItemDataRole.UserRole):
+        """id вибраного власника; None, якщо текст поля змінили після вибору."""
+        if self.currentIndex() == -1 or self.currentText() != self.itemText(self.currentIndex()):
+            return None
+        return super().currentData(role)
+
+    def on_owner_changed(self, user_id: int, full_name):
+        if self.count() == 0 or self.itemData(0) != user_id:
+            return
+        if full_name is None:
+            self.clear()
+        else:
+            selected = self.currentIndex() == 0
+            self.setItemText(0, full_name)
+            if selected:
+                self.setEditText(full_name)
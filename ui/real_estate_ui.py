@@ -1,40 +1,32 @@
 from PyQt6.QtWidgets import (
     QVBoxLayout, QHBoxLayout, QLineEdit, QComboBox, QWidget,
-    QCompleter, QFrame, QLabel, QRadioButton, QMessageBox
+    QFrame, QLabel, QRadioButton, QMessageBox
 )
 from PyQt6.QtCore import Qt
 
 from ui.styles import apply_style
 from ui.utils import create_CUD_buttons, create_Vbox, confirm_delete, get_label
 from ui.filterable_table_view import FilterableTableWidget
+from ui.owner_search import OwnerSearchModel, OwnerComboBox
 
 from app.real_estate_repository import RealEstateRepository
 from app.real_estate_type_repository import RealEstateTypeRepository
-from app.user_repository import UserRepository
+from app.sheets import REAL_ESTATE_FIELDS, REAL_ESTATE_TABLE_COLUMNS
 
 class RealEstateWidget(QWidget):
-    def __init__(self, parent, db):
+    # поля і колонки таблиці спільні з експортом та імпортом (app/sheets.py)
+    fields_config = REAL_ESTATE_FIELDS
+    table_column = REAL_ESTATE_TABLE_COLUMNS
+    
+    def __init__(self, parent, db, owner_model: OwnerSearchModel):
         super().__init__(parent=parent)
         
         self.input_fields = {}
         self.db = db
-        self.estate_repo = RealEstateRepository(db)
-        self.type_repo = RealEstateTypeRepository(db)
-        self.user_repo = UserRepository(db)
+        self.estate_repo = db.get_repository(RealEstateRepository)
+        self.type_repo = db.get_repository(RealEstateTypeRepository)
+        self.owner_model = owner_model
         self.input_fields = {}
-        self.fields_config = {
-            "name": ("Назва нерухомості", "Введіть назву*"),
-            "address": ("Адреса нерухомості", "Введіть адресу*"),
-            "area": ("Площа\nм^2", "Введіть площу*"),
-            "area_tax": ("Площа\nподатку", "Площа податку"),
-            "tax": ("Податок\n(грн)", "Податок"),
-            "paid": ("Сплачено", "Сплачено"),
-            "sum_paid": ("Сплата\nподатку", "Сплачена сума"),
-            "owner": ("Власник нерухомості", "Виберіть власника*"),
-            "type": ("Тип\nнерухомості", "Виберіть тип*"),
-            "notes": ("Нотатки", "Ваші нотатки"),
-        }
-        self.table_column = ["id", "person_id"] + [value[0] for value in self.fields_config.values()]
         
         
         self.init_ui()
@@ -128,39 +120,11 @@ class RealEstateWidget(QWidget):
         return input_container
     
     def create_person_dropdown(self):
-        person_dropdown = QComboBox()
-        person_dropdown.setEditable(True)
-        person_dropdown.setPlaceholderText(self.fields_config["owner"][1])
-        person_dropdown.setCurrentIndex(-1)
-
-        self.person_data_list = self.user_repo.get_id_and_full_name()
-        for person in self.person_data_list:
-            person_dropdown.addItem(person[1], person[0])
-
-        # функціонал пошуку
-        person_names = [person[1] for person in self.person_data_list]
-        completer = QCompleter(person_names, person_dropdown)
-        completer.setFilterMode(Qt.MatchFlag.MatchContains)
-        completer.setCompletionMode(QCompleter.CompletionMode.PopupCompletion)
-        person_dropdown.setCompleter(completer)
-        
-        return person_dropdown
+        return OwnerComboBox(self.owner_model, self.fields_config["owner"][1])
 
-    def update_person_dropdown(self):
-        person_dropdown:QComboBox = self.input_fields["owner"]
-        person_dropdown.clear()
-        self.person_data_list = self.user_repo.get_id_and_full_name()
-        for person in self.person_data_list:
-            person_dropdown.addItem(person[1], person[0])
-
-        # функціонал пошуку
-        person_names = [person[1] for person in self.person_data_list]
-        completer = QCompleter(person_names, person_dropdown)
-        completer.setFilterMode(Qt.MatchFlag.MatchContains)
-        completer.setCompletionMode(QCompleter.CompletionMode.PopupCompletion)
-        person_dropdown.setCompleter(completer)
-        
-        self.load_data()
+    def on_person_edited(self, user_id:int):
+        """Оновлення записів власника в таблиці після зміни в списку осіб (поле власника оновлює OwnerSearchModel)"""
+        self.refresh_user_rows(user_id)
 
     def update_type_dropdown(self):
         type_dropdown:QComboBox = self.input_fields["type"]
@@ -172,12 +136,24 @@ class RealEstateWidget(QWidget):
         type_dropdown.setCurrentIndex(-1)
 
     def load_data(self):
-        """Завантаження інформації з бази даних в таблицю"""
+        """Завантаження інформації з бази даних в таблицю (у фоновому потоці, вікно не блокується)"""
         self.table.clearSelection()
-        self.table.clear_rows()
-        records = self.estate_repo.get_all_record_by_year(self.window().get_current_year())
-        
-        [self.table.add_row(row) for row in records]
+        year = self.window().get_current_year()
+        self.table.load_rows(self.window().task_runner, "Завантаження нерухомості",
+                             lambda db: db.get_repository(RealEstateRepository).get_all_record_by_year(year))
+
+    def refresh_rows(self, record_ids):
+        """Оновлення в таблиці лише вказаних записів, без повного перезавантаження"""
+        self.table.clearSelection()
+        records = self.estate_repo.get_records_by_ids_and_year(record_ids, self.window().get_current_year())
+        self.table.upsert_rows(records)
+        self.table.remove_rows_by_id(set(record_ids) - {record[0] for record in records})
+
+    def refresh_user_rows(self, user_id):
+        """Оновлення в таблиці записів одного власника (після зміни його даних)"""
+        self.table.clearSelection()
+        records = self.estate_repo.get_records_by_user_and_year(user_id, self.window().get_current_year())
+        self.table.upsert_rows(records)
 
     def clear_inputs(self):
         """Очищення всіх полів введення."""
@@ -236,9 +212,7 @@ class RealEstateWidget(QWidget):
         self.input_fields["sum_paid"].setText(row_data[8])
         
         # QComboBox ownner
-        index = self.input_fields["owner"].findText(row_data[9])
-        if index != -1:
-            self.input_fields["owner"].setCurrentIndex(index)
+        self.input_fields["owner"].set_owner(int(row_data[1]), row_data[9])
 
         # QComboBox type
         type_name = row_data[10].split(" (")[0]
@@ -269,12 +243,12 @@ class RealEstateWidget(QWidget):
                 return
                 
             try:
-                self.estate_repo.add_record(year, *data)
+                record_id = self.estate_repo.add_record(year, *data)
+                self.refresh_rows([record_id])
                 # QMessageBox.information(self, "Успіх", "Інформацію про нерухомість успішно додано!")
             except Exception as e:
                 QMessageBox.critical(self, "Помилка", f"Щось пішло не так: {e}")
             self.clear_inputs()
-            self.load_data()
         else:
             QMessageBox.warning(self, "Помилка", "Заповніть усі поля!")
 
@@ -285,7 +259,7 @@ class RealEstateWidget(QWidget):
             QMessageBox.warning(self, "Помилка", "Виберіть запис для оновлення!")
             return
         
-        record_id = self.table.get_row_values_by_index(selected_row)[0]
+        record_id = int(self.table.get_row_values_by_index(selected_row)[0])
         data = [field for field in self.get_input_data().values()]
         if all(data[:-1]):
             try:
@@ -305,11 +279,11 @@ class RealEstateWidget(QWidget):
             
             try:
                 self.estate_repo.update_record(record_id, year, *data)
+                self.refresh_rows([record_id])
                 # QMessageBox.information(self, "Успіх", "Інформацію про нерухомість успішно оновлено!")
             except Exception as e:
                 QMessageBox.critical(self, "Помилка", f"Щось пішло не так: {e}")
             self.clear_inputs()
-            self.load_data()
         else:
             QMessageBox.warning(self, "Помилка", "Заповніть усі поля!")
 
@@ -320,14 +294,15 @@ class RealEstateWidget(QWidget):
             QMessageBox.warning(self, "Помилка", "Виберіть запис для видалення!")
             return
             
-        record_id = self.table.get_row_values_by_index(selected_row)[0]
+        record_id = int(self.table.get_row_values_by_index(selected_row)[0])
         
         if confirm_delete() == QMessageBox.StandardButton.Yes:
             try:
                 self.estate_repo.delete_record(record_id)
+                self.table.clearSelection()
+                self.table.remove_rows_by_id([record_id])
                 QMessageBox.information(self, "Успіх", "Нерухомість видалено!")
             except Exception as e:
                 QMessageBox.critical(self, "Помилка", f"Не вдалося видалити інформацію про нерухомість: {e}")
             self.clear_inputs()
-            self.load_data()
    
\ No newline at end of file
@@ -0,0 +1,145 @@
+from PyQt6.QtWidgets import QWidget, QHBoxLayout, QLabel, QProgressBar, QPushButton, QProgressDialog
+from PyQt6.QtCore import Qt, QObject, QRunnable, QThreadPool, pyqtSignal
+from threading import Event
+from app.database import Database
+from app.base_repository import OperationCancelled
+
+
+class Job(QRunnable):
+    class Signals(QObject):
+        # сигнали створюються в потоці інтерфейсу, тому обробники виконуються в ньому ж
+        progress = pyqtSignal(int)
+        finished = pyqtSignal(object)  # результат функції
+        cancelled = pyqtSignal(object)  # виняток OperationCancelled
+        failed = pyqtSignal(object)  # виняток
+
+    def __init__(self, name: str, db: Database, function):
+        """
+        Фонова задача для пулу потоків.
+
+        :param name: Назва задачі для індикатора
+        :param db: База даних - читання з потоку задачі йде через пул з'єднань для читання,
+            запис - через з'єднання для запису, яке потоки використовують по черзі
+        :param function: function(db, progress, is_cancelled) - виконується в потоці пулу.
+            progress(percent) повідомляє прогрес, is_cancelled() повертає True після скасування
+            (функція має перервати роботу винятком OperationCancelled)
+        """
+        super().__init__()
+        self.name = name
+        self.db = db
+        self.function = function
+        self.cancel_event = Event()
+        self.progress = 0
+        self.signals = self.Signals()
+
+    def cancel(self):
+        self.cancel_event.set()
+
+    def is_cancelled(self):
+        return self.cancel_event.is_set()
+
+    def run(self):
+        try:
+            result = self.function(self.db, self.signals.progress.emit, self.is_cancelled)
+        except OperationCancelled as e:
+            self.signals.cancelled.emit(e)
+        except Exception as e:
+            self.signals.failed.emit(e)
+        else:
+            self.signals.finished.emit(result)
+
+
+class TaskRunner(QObject):
+    jobs_changed = pyqtSignal()
+
+    def __init__(self, db: Database, parent=None):
+        """Запускає задачі Job у глобальному пулі потоків і зберігає перелік активних задач."""
+        super().__init__(parent)
+        self.db = db
+        self.jobs = []
+
+    def start(self, name: str, function, on_finished=None, on_failed=None, on_cancelled=None, dialog_parent=None):
+        """
+        Запускає function(db, progress, is_cancelled) у фоновому потоці.
+        Обробники результату (on_finished(result), on_failed(error), on_cancelled(error))
+        викликаються в потоці інтерфейсу.
+
+        :param dialog_parent: Якщо задано - поки задача виконується, показується модальне вікно прогресу
+            (для задач, що змінюють дані, щоб користувач не редагував ті самі записи одночасно)
+        :return: Job
+        """
+        job = Job(name, self.db, function)
+        dialog = None
+        if dialog_parent is not None:
+            dialog = QProgressDialog(f"{name}...", "Скасувати", 0, 100, dialog_parent)
+            dialog.setWindowTitle(name)
+            dialog.setWindowModality(Qt.WindowModality.WindowModal)
+            dialog.setAutoClose(False)
+            dialog.setAutoReset(False)
+            dialog.setMinimumDuration(300)
+            dialog.canceled.connect(job.cancel)
+            job.signals.progress.connect(dialog.setValue)
+
+        def on_progress(value):
+            job.progress = value
+            self.jobs_changed.emit()
+
+        def on_done():
+            if dialog is not None:
+                dialog.close()
+            self.jobs.remove(job)
+            self.jobs_changed.emit()
+
+        job.signals.progress.connect(on_progress)
+        # спочатку закривається вікно прогресу, потім викликається обробник результату
+        for signal, handler in ((job.signals.finished, on_finished),
+                                (job.signals.failed, on_failed),
+                                (job.signals.cancelled, on_cancelled)):
+            signal.connect(on_done)
+            if handler:
+                signal.connect(handler)
+        if on_failed is None:
+            job.signals.failed.connect(lambda error: print(f"Помилка фонової задачі '{name}': {error}"))
+
+        self.jobs.append(job)
+        self.jobs_changed.emit()
+        QThreadPool.globalInstance().start(job)
+        return job
+
+    def cancel_all(self):
+        for job in self.jobs:
+            job.cancel()
+
+
+class TaskStatusWidget(QWidget):
+    def __init__(self, runner: TaskRunner, parent=None):
+        """Індикатор фонових задач для рядка стану: назва, прогрес і кнопка скасування."""
+        super().__init__(parent)
+        self.runner = runner
+
+        layout = QHBoxLayout()
+        layout.setContentsMargins(0, 0, 0, 0)
+        self.label = QLabel()
+        self.progress_bar = QProgressBar()
+        self.progress_bar.setRange(0, 100)
+        self.progress_bar.setMaximumWidth(200)
+        self.cancel_button = QPushButton("Скасувати")
+        self.cancel_button.clicked.connect(self.runner.cancel_all)
+        layout.addWidget(self.label)
+        layout.addWidget(self.progress_bar)
+        layout.addWidget(self.cancel_button)
+        self.setLayout(layout)
+
+        self.runner.jobs_changed.connect(self.update_status)
+        self.update_status()
+
+    def update_status(self):
+        jobs = self.runner.jobs
+        self.setVisible(bool(jobs))
+        if not jobs:
+            return
+        text = f"Виконується: {jobs[0].name}"
+        if len(jobs) > 1:
+            text += f" (+{len(jobs) - 1})"
+        self.label.setText(text)
+        self.progress_bar.setValue(min(job.progress for job in jobs))
@@ -0,0 +1,89 @@
+from PyQt6.QtWidgets import QLabel, QVBoxLayout, QDialog, QTableWidgetItem, QMessageBox
+from PyQt6.QtGui import QFont
+from PyQt6.QtCore import Qt
+from ui.styles import apply_styles
+from ui.utils import create_table_widget
+from ui.task_runner import TaskRunner
+from app.summary_repository import YearSummaryRepository
+
+
+class YearSummaryDialog(QDialog):
+    TYPE_COLUMNS = ["id", "Тип", "Об'єктів", "З податком", "Нараховано", "Сплачено", "Сплачених", "Борг"]
+    DEBTOR_COLUMNS = ["id", "Власник", "Борг"]
+
+    def __init__(self, task_runner: TaskRunner, year: int):
+        """Підсумки податків за рік: по типах нерухомості, по типах земельних ділянок і найбільші боржники."""
+        super().__init__()
+        self.task_runner = task_runner
+        self.year = year
+        self.init_ui()
+        self.load_data()
+
+    def init_ui(self):
+        """Ініціалізація основного інтерфейсу"""
+        self.setWindowTitle(f"Підсумки за {self.year} рік")
+        self.setStyleSheet("background-color: #f0f4f8;")
+        self.resize(900, 700)
+
+        apply_styles(self, ["base", "label"])
+
+        self.status_label = QLabel("Розрахунок підсумків...")
+        self.status_label.setFont(QFont("Arial", 14))
+        self.status_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+
+        self.estate_table = create_table_widget(len(self.TYPE_COLUMNS), self.TYPE_COLUMNS, lambda row, column: None)
+        self.land_table = create_table_widget(len(self.TYPE_COLUMNS), self.TYPE_COLUMNS, lambda row, column: None)
+        self.debtors_table = create_table_widget(len(self.DEBTOR_COLUMNS), self.DEBTOR_COLUMNS, lambda row, column: None)
+
+        main_layout = QVBoxLayout()
+        main_layout.addWidget(self.status_label)
+        main_layout.addWidget(QLabel("Нерухомість"))
+        main_layout.addWidget(self.estate_table)
+        main_layout.addWidget(QLabel("Земельні ділянки"))
+        main_layout.addWidget(self.land_table)
+        main_layout.addWidget(QLabel(f"Найбільші боржники (до {YearSummaryRepository.DEBTORS_LIMIT})"))
+        main_layout.addWidget(self.debtors_table)
+        self.setLayout(main_layout)
+
+    def load_data(self):
+        """Підсумки рахуються у фоновій задачі; повторне відкриття без змін даних бере їх з кешу."""
+        year = self.year
+        self.task_runner.start(
+            "Розрахунок підсумків за рік",
+            lambda db, progress, is_cancelled: YearSummaryRepository(db).get_summary(year),
+            on_finished=self.show_summary,
+            on_failed=self.show_error,
+        )
+
+    def show_summary(self, summary: dict):
+        self.status_label.setVisible(False)
+        self.fill_type_table(self.estate_table, summary["real_estate"])
+        self.fill_type_table(self.land_table, summary["land_parcel"])
+        self.fill_table(self.debtors_table, [(row[0], row[1], self.format_value(row[2])) for row in summary["debtors"]])
+
+    def show_error(self, error):
+        self.status_label.setText("Не вдалося розрахувати підсумки")
+        QMessageBox.critical(self, "Помилка", f"Не вдалося розрахувати підсумки: {error}")
+
+    def fill_type_table(self, table, rows):
+        """Рядки типів і рядок "Разом" з сумами всіх числових колонок."""
+        totals = [sum(row[column] for row in rows) for column in range(2, len(self.TYPE_COLUMNS))]
+        rows = list(rows) + [("", "Разом", *totals)]
+        self.fill_table(table, [(row[0], row[1], *(self.format_value(value) for value in row[2:])) for row in rows])
+
+    @staticmethod
+    def fill_table(table, rows):
+        table.setRowCount(len(rows))
+        for row_index, row in enumerate(rows):
+            for column, value in enumerate(row):
+                item = QTableWidgetItem(str(value))
+                if column > 1:
+                    item.setTextAlignment(Qt.AlignmentFlag.AlignRight | Qt.AlignmentFlag.AlignVCenter)
+                table.setItem(row_index, column, item)
+        table.resizeColumnsToContents()
+
+    @staticmethod
+    def format_value(value):
+        if isinstance(value, float):
+            return f"{value:,.2f}".replace(",", " ")
+        return value